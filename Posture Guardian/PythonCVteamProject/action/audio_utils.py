@@ -1,51 +1,393 @@
 # audio_utils.py
-# 목적: 오디오 큐를 사용하여 경고음을 순차적으로 재생
+# 목적: 경고음 재생 엔진 (MP3를 시작할 때 한 번만 PCM으로 디코딩해 메모리에 보관 + 밀린 경고 정리 + 교체 가능한 출력 장치)
 # Workflow:
-# 1. 프로그램 시작 시 오디오 재생 전용 스레드(_audio_worker) 1개 실행
-# 2. play_alert()가 호출되면, 오디오 파일을 큐(audio_queue)에 추가
-# 3. _audio_worker는 큐를 감시하다가, 파일이 들어오면 순서대로 재생
+# 1. preload()로 data/*.mp3 경고음을 PCM으로 디코딩 (main.py는 카메라 연결과 동시에 실행)
+# 2. play_alert()가 호출되면 재생 대기 목록에 추가 (같은 경고음이 이미 대기 중이면 하나로 합침)
+# 3. 재생 스레드는 우선순위가 높고 최신인 경고부터 재생하고, ALERT_MAX_AGE_SEC보다 오래 기다린 경고는 버림
+#    (자세를 이미 고친 뒤에 밀린 경고가 줄줄이 나오지 않도록)
+#
+# 출력 장치 (configure(backend=...)):
+#   "pcm"       : 디코딩한 PCM을 simpleaudio로 재생 (pydub + ffmpeg, simpleaudio 필요)
+#   "playsound" : 이전 방식, 매번 MP3 파일 경로로 재생 (디코딩 라이브러리가 없을 때)
+#   "null"      : 소리 없이 재생한 것으로 처리 (사운드 카드 없는 머신에서 경고 처리량 측정)
+#   "wav"       : 재생할 PCM을 WAV 파일 하나에 이어서 기록
+#   "auto"      : pcm을 쓸 수 있으면 pcm, 아니면 playsound
+#   (pcm에서 디코딩에 실패한 경고음(ffmpeg 없음 등)은 그 경고음만 playsound로 파일 경로 재생)
+#
+# 부하 테스트 예: python audio_utils.py --backend null --alerts 5000 --rate 500
 
+import argparse
+import math
+import random
 import threading
-import queue
-from playsound import playsound
+import time
+import wave
 
-# 오디오 재생 요청을 처리하기 위한 큐
-audio_queue = queue.Queue()
+from config import (
+    SOUND_NECK, SOUND_LEAN_FORWARD, SOUND_LEAN_BACK, SOUND_SLOUCH,
+    ALERT_BACKEND, ALERT_MAX_AGE_SEC, ALERT_QUEUE_SIZE, ALERT_PRIORITIES, ALERT_SAMPLE_RATE,
+)
 
-def _audio_worker():
-    """
-    오디오 큐를 감시하고 순서대로 재생하는
-    백그라운드 워커 스레드 함수
-    """
-    while True:
-        # 큐에 작업(사운드 파일)이 들어올 때까지 대기
-        sound_file = audio_queue.get()
-        
-        # 작업(사운드) 재생 (block=True)
-        # 워커 스레드에서 실행되므로 메인 루프(영상 처리 등)는 멈추지 않음
+ALERT_SOUNDS = [SOUND_NECK, SOUND_LEAN_FORWARD, SOUND_LEAN_BACK, SOUND_SLOUCH]
+
+
+# === 1. 경고음 PCM ===
+class AlertClip:
+    """디코딩된 경고음 (16bit PCM). pcm이 None이면 파일 경로로만 재생 가능"""
+
+    def __init__(self, path, pcm=None, sample_rate=ALERT_SAMPLE_RATE, channels=1):
+        self.path = path
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+    @property
+    def duration(self):
+        if self.pcm is None:
+            return 0.0
+        return len(self.pcm) / (2 * self.channels * self.sample_rate)
+
+
+def decode_clip(path, sample_rate=ALERT_SAMPLE_RATE):
+    """MP3 → 모노 16bit PCM (pydub + ffmpeg). 디코딩할 수 없으면 None"""
+    try:
+        from pydub import AudioSegment
+        segment = AudioSegment.from_file(path).set_frame_rate(sample_rate).set_channels(1).set_sample_width(2)
+    except Exception:
+        return None
+    return AlertClip(path, segment.raw_data, sample_rate)
+
+
+def tone_clip(path, seconds=0.4, frequency=880, sample_rate=ALERT_SAMPLE_RATE):
+    """디코딩할 수 없을 때 null/wav 출력에서 대신 쓰는 짧은 비프음"""
+    n = int(seconds * sample_rate)
+    samples = bytearray()
+    for i in range(n):
+        value = int(12000 * math.sin(2 * math.pi * frequency * i / sample_rate))
+        samples += value.to_bytes(2, "little", signed=True)
+    return AlertClip(path, bytes(samples), sample_rate)
+
+
+# === 2. 출력 장치 ===
+class PcmSink:
+    """디코딩한 PCM을 simpleaudio로 재생"""
+    needs_pcm = True
+
+    def __init__(self):
+        import simpleaudio
+        self._simpleaudio = simpleaudio
+
+    def play(self, clip):
+        self._simpleaudio.play_buffer(clip.pcm, clip.channels, 2, clip.sample_rate).wait_done()
+
+    def close(self):
+        pass
+
+
+class PlaysoundSink:
+    """이전 방식: MP3 파일 경로를 playsound로 재생 (재생할 때마다 디코딩)"""
+    needs_pcm = False
+
+    def __init__(self):
+        # playsound는 첫 경고음이 필요할 때 로드 (프로그램 시작 시간 단축)
+        self._playsound = None
+
+    def play(self, clip):
+        if self._playsound is None:
+            from playsound import playsound
+            self._playsound = playsound
         try:
-            playsound(sound_file, block=True)
+            self._playsound(clip.path, block=True)
         except Exception as e:
             # [중요] playsound는 경로에 한글이 포함되어 있으면
             # Unicode 관련 에러가 발생할 수 있습니다.
             # (예: C:\Users\사용자\ -> C:\Users\User\)
             if 'Unicode' in str(e):
                 print(f"🚨 [오디오 에러] 'playsound'는 한글 경로를 지원하지 않습니다!")
-                print(f"   -> 경로: {sound_file}")
+                print(f"   -> 경로: {clip.path}")
+            raise   # 재생 실패로 집계 (AlertEngine.failed)
+
+    def close(self):
+        pass
+
+
+class NullSink:
+    """소리를 내지 않는 출력 (realtime=True면 경고음 길이만큼 기다려 실제 재생 시간을 흉내 냄)"""
+    needs_pcm = True
+
+    def __init__(self, realtime=False):
+        self.realtime = realtime
+        self.played_seconds = 0.0
+
+    def play(self, clip):
+        self.played_seconds += clip.duration
+        if self.realtime:
+            time.sleep(clip.duration)
+
+    def close(self):
+        pass
+
+
+class WavSink:
+    """재생할 PCM을 WAV 파일 하나에 순서대로 이어서 기록 (소리 없이 무엇이 재생됐을지 확인용)"""
+    needs_pcm = True
+
+    def __init__(self, path, sample_rate=ALERT_SAMPLE_RATE):
+        self._wav = wave.open(str(path), "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(sample_rate)
+
+    def play(self, clip):
+        self._wav.writeframes(clip.pcm)
+
+    def close(self):
+        self._wav.close()
+
+
+def make_sink(backend=ALERT_BACKEND, wav_path=None, realtime=False):
+    """backend 이름으로 출력 장치 생성 ("auto"는 pcm 재생을 쓸 수 있으면 pcm, 아니면 playsound)"""
+    if backend == "auto":
+        try:
+            import pydub, simpleaudio  # noqa: F401
+            backend = "pcm"
+        except ImportError:
+            backend = "playsound"
+    if backend == "pcm":
+        return PcmSink()
+    if backend == "playsound":
+        return PlaysoundSink()
+    if backend == "null":
+        return NullSink(realtime)
+    if backend == "wav":
+        return WavSink(wav_path or "alerts.wav")
+    raise ValueError(f"unknown alert backend: {backend}")
+
+
+# === 3. 재생 엔진 ===
+class AlertEngine:
+    """
+    경고 재생 대기 목록 + 재생 스레드.
+    - 같은 경고음은 대기 목록에 하나만 (새로 들어오면 요청 시각만 갱신 = merged)
+    - 재생 순서: 우선순위(ALERT_PRIORITIES) 높은 것 → 요청 시각이 최신인 것
+    - 재생 차례가 왔을 때 max_age초보다 오래된 요청은 버림 (stale)
+    - 대기 목록이 queue_size를 넘으면 우선순위가 가장 낮고 오래된 요청을 버림 (overflow)
+    """
+
+    def __init__(self, sink, max_age=ALERT_MAX_AGE_SEC, queue_size=ALERT_QUEUE_SIZE, priorities=ALERT_PRIORITIES):
+        self.sink = sink
+        self.max_age = max_age
+        self.queue_size = queue_size
+        self.priorities = priorities
+        self.clips = {}          # 경로 → AlertClip
+        self._fallback = None    # 디코딩 실패한 경고음용 PlaysoundSink (처음 필요할 때 생성)
+        self._pending = {}       # 경로 → [우선순위, 최근 요청 시각, 첫 요청 시각]
+        self._cond = threading.Condition()
+        self._playing = False
+        self._closed = False
+        self._thread = None
+
+        # 통계
+        self.submitted = 0
+        self.merged = 0
+        self.dropped_stale = 0
+        self.dropped_overflow = 0
+        self.played = 0
+        self.failed = 0          # 재생 중 에러 (재생한 것으로 세지 않음)
+        self.wait_sum = 0.0      # 첫 요청 → 재생 시작 (초)
+        self.wait_max = 0.0
+
+    def preload(self, paths=ALERT_SOUNDS):
+        """경고음을 미리 디코딩 (출력 장치가 PCM을 쓰지 않으면 경로만 등록)"""
+        for path in paths:
+            self.clip(path)
+        return self
+
+    def clip(self, path):
+        clip = self.clips.get(path)
+        if clip is None:
+            if self.sink.needs_pcm:
+                clip = decode_clip(path)
+                if clip is None:
+                    if isinstance(self.sink, PcmSink):
+                        print(f"⚠️ 경고음을 디코딩할 수 없어 playsound로 재생합니다: {path}")
+                        clip = AlertClip(path)
+                    else:
+                        clip = tone_clip(path)
+            else:
+                clip = AlertClip(path)
+            self.clips[path] = clip
+        return clip
+
+    def _sink_for(self, clip):
+        """경고음별 출력 장치: PCM이 없으면(디코딩 실패) 파일 경로로 재생하는 playsound로 대체"""
+        if clip.pcm is not None or not self.sink.needs_pcm:
+            return self.sink
+        if self._fallback is None:
+            self._fallback = PlaysoundSink()
+        return self._fallback
+
+    def submit(self, sound_file, priority=None):
+        """경고 요청 (대기 목록에 추가하거나 같은 경고음 요청과 합침, 바로 반환)"""
+        now = time.monotonic()
+        if priority is None:
+            priority = self.priorities.get(sound_file, 0)
+        with self._cond:
+            self._ensure_worker()
+            self.submitted += 1
+            request = self._pending.get(sound_file)
+            if request is not None:
+                request[0] = max(request[0], priority)
+                request[1] = now
+                self.merged += 1
             else:
+                self._pending[sound_file] = [priority, now, now]
+                if len(self._pending) > self.queue_size:
+                    oldest = min(self._pending, key=lambda k: self._pending[k][:2])
+                    del self._pending[oldest]
+                    self.dropped_overflow += 1
+            self._cond.notify()
+
+    def _ensure_worker(self):
+        """재생 스레드를 처음 요청이 들어올 때 1회만 실행 (daemon이라 메인 프로그램 종료 시 함께 종료)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name="alert-player", daemon=True)
+            self._thread.start()
+
+    def _next(self):
+        """재생할 요청 꺼내기 (오래된 요청은 버림). 종료되었으면 None"""
+        with self._cond:
+            while True:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return None
+                sound_file = max(self._pending, key=lambda k: self._pending[k][:2])
+                _, last, first = self._pending.pop(sound_file)
+                now = time.monotonic()
+                if now - last > self.max_age:
+                    self.dropped_stale += 1
+                    continue
+                self._playing = True
+                wait = now - first
+                self.wait_sum += wait
+                self.wait_max = max(self.wait_max, wait)
+                return sound_file
+
+    def _worker(self):
+        while True:
+            sound_file = self._next()
+            if sound_file is None:
+                return
+            try:
+                clip = self.clip(sound_file)
+                self._sink_for(clip).play(clip)
+                self.played += 1
+            except Exception as e:
+                self.failed += 1
                 print(f"🚨 [오디오 에러] {e}")
-        
-        # 작업 완료를 큐에 알림
-        audio_queue.task_done()
+            finally:
+                with self._cond:
+                    self._playing = False
+                    self._cond.notify_all()
+
+    def pending(self):
+        """재생 대기 중인 경고 수"""
+        return len(self._pending)
 
-# 프로그램 시작 시 오디오 워커 스레드를 1회만 실행
-# (daemon=True는 메인 프로그램이 종료되면 이 스레드도 자동 종료)
-threading.Thread(target=_audio_worker, daemon=True).start()
+    def drain(self, timeout=None):
+        """대기 목록이 비고 재생 중인 경고가 끝날 때까지 기다림 (부하 테스트/종료용)"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._playing, timeout)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._pending.clear()
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self.sink.close()
+        if self._fallback is not None:
+            self._fallback.close()
+
+    def stats(self):
+        return {
+            "submitted": self.submitted,
+            "merged": self.merged,
+            "played": self.played,
+            "failed": self.failed,
+            "dropped_stale": self.dropped_stale,
+            "dropped_overflow": self.dropped_overflow,
+            "pending": self.pending(),
+            "wait_avg_ms": round(self.wait_sum / self.played * 1000, 1) if self.played else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 1),
+        }
+
+
+# === 4. 프로그램 전체에서 쓰는 기본 엔진 ===
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def configure(backend=ALERT_BACKEND, wav_path=None, realtime=False):
+    """기본 엔진의 출력 장치 선택 (이전 엔진은 닫음)"""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.close()
+        _engine = AlertEngine(make_sink(backend, wav_path, realtime))
+        return _engine
+
+
+def get_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AlertEngine(make_sink())
+        return _engine
+
+
+def preload():
+    """기본 엔진의 경고음 미리 디코딩 (main.py가 시작할 때 카메라 연결과 동시에 호출)"""
+    return get_engine().preload()
+
+
+def pending_alerts():
+    return _engine.pending() if _engine is not None else 0
 
 
 def play_alert(sound_file):
     """
     경고음 재생을 요청하는 함수.
-    실제 재생은 하지 않고, 오디오 큐에 파일 경로를 추가합니다.
+    실제 재생은 하지 않고, 재생 대기 목록에 추가합니다.
     """
-    audio_queue.put(sound_file)
\ No newline at end of file
+    get_engine().submit(sound_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="경고음 엔진 부하 테스트 (무작위 경고 요청 → 재생/합침/버림 집계)")
+    parser.add_argument("--backend", default="null", help="pcm / playsound / null / wav")
+    parser.add_argument("--wav", default="alerts.wav", help="--backend wav 출력 파일")
+    parser.add_argument("--alerts", type=int, default=1000, help="요청할 경고 수")
+    parser.add_argument("--rate", type=float, default=100.0, help="초당 요청 수")
+    parser.add_argument("--realtime", action="store_true", help="null 출력에서도 경고음 길이만큼 재생 시간 소요")
+    args = parser.parse_args()
+
+    engine = AlertEngine(make_sink(args.backend, args.wav, args.realtime))
+    t0 = time.perf_counter()
+    engine.preload()
+    print(f"🔊 preload {len(engine.clips)} clips in {(time.perf_counter() - t0) * 1000:.1f} ms "
+          f"({sum(c.duration for c in engine.clips.values()):.1f}s of audio)")
+
+    rng = random.Random(0)
+    t0 = time.perf_counter()
+    for i in range(args.alerts):
+        engine.submit(rng.choice(ALERT_SOUNDS))
+        delay = t0 + (i + 1) / args.rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    engine.drain(timeout=ALERT_MAX_AGE_SEC * 2)
+    elapsed = time.perf_counter() - t0
+    stats = engine.stats()
+    engine.close()
+    print(f"✅ {args.alerts} alerts in {elapsed:.2f}s ({args.alerts / elapsed:.0f}/s): {stats}")
@@ -0,0 +1,377 @@
+# benchmark.py
+# 목적: 녹화된 영상 파일로 전체 파이프라인(디코드 → 전처리 → Pose/Hands → Stage 분석 → 렌더링)을 오프라인 재생하며 성능 측정
+# Workflow: 영상 파일 목록 입력 → 프레임마다 PostureEngine.process() 실행 (최대 속도 또는 고정 FPS 시뮬레이션)
+#           → 단계별 지연시간 p50/p95/p99, 전체 FPS 집계 → JSON 파일로 저장 (커밋/머신 간 비교용)
+#
+# 사용 예:
+#   python benchmark.py session1.mp4 session2.mp4 --output bench_results/base.json
+#   python benchmark.py session1.mp4 --fps 15 --render --max-frames 600
+#   python benchmark.py --kernel 100000      (자세 계산 커널: 프레임별 호출 vs 배치 1회 호출)
+#   python benchmark.py --render-bench 300   (화면 텍스트: 기존 PIL 전체 변환 vs 스프라이트 합성)
+#   python benchmark.py --preprocess-bench 1000 --source-size 1280x720  (전처리: 매 프레임 할당 vs 버퍼 재사용)
+#   python benchmark.py --gesture-bench 20000  (손 제스처: 손별 객체 판정 vs 배열 변환 + 벡터 판정)
+
+import warnings
+warnings.filterwarnings("ignore") # 라이브러리 내부 경고문 무시 (출력하지 않음)
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from posture_analysis import compute_posture_metrics, NUM_POSE_LANDMARKS
+from frame_preprocessor import FramePreprocessor, legacy_preprocess
+from gesture_utils import (
+    NUM_HAND_LANDMARKS, hands_to_array, gesture_margins, classify_hands, detect_gesture, legacy_gesture,
+)
+
+# 보고할 단계 순서 (decode/render는 벤치마크에서, 나머지는 PostureEngine이 측정)
+STAGES = ["decode", "preprocess", "pose", "hands", "analysis", "render", "total"]
+PERCENTILES = [50, 95, 99]
+
+
+def _git_commit():
+    """현재 git 커밋 해시 (git이 없으면 None)"""
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).parent, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def summarize(samples):
+    """단계별 샘플(초) 목록 → {count, mean_ms, p50_ms, p95_ms, p99_ms}"""
+    summary = {}
+    for stage in STAGES:
+        values = samples.get(stage)
+        if not values:
+            continue
+        arr = np.asarray(values) * 1000.0
+        entry = {"count": int(arr.size), "mean_ms": round(float(arr.mean()), 3)}
+        for p, v in zip(PERCENTILES, np.percentile(arr, PERCENTILES)):
+            entry[f"p{p}_ms"] = round(float(v), 3)
+        summary[stage] = entry
+    return summary
+
+
+def replay_file(path, engine, renderer=None, fps=None, max_frames=None, samples=None):
+    """
+    영상 파일 하나를 재생하며 단계별 처리 시간을 samples에 누적합니다.
+    - fps: None이면 최대 속도, 숫자면 해당 FPS 카메라처럼 프레임 간격을 맞춰 재생
+    - 반환: {"frames", "elapsed_sec", "fps"}
+    """
+    if samples is None:
+        samples = {}
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        print(f"🚨 ERROR: 영상 파일을 열 수 없습니다: {path}")
+        return {"frames": 0, "elapsed_sec": 0.0, "fps": 0.0}
+
+    source_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_interval = 1.0 / fps if fps else None
+    frames = 0
+    start = time.perf_counter()
+
+    while max_frames is None or frames < max_frames:
+        t0 = time.perf_counter()
+        ret, frame = cap.read()
+        t1 = time.perf_counter()
+        if not ret:
+            break
+
+        # 타이머(Stage 유지 시간 등)는 영상 시각 기준으로 진행
+        video_time = frames / source_fps
+        result = engine.process(frame, video_time)
+
+        t2 = time.perf_counter()
+        if renderer is not None:
+            renderer.render(result)
+        t3 = time.perf_counter()
+
+        samples.setdefault("decode", []).append(t1 - t0)
+        for stage, sec in result.timings.items():
+            samples.setdefault(stage, []).append(sec)
+        if renderer is not None:
+            samples.setdefault("render", []).append(t3 - t2)
+        samples.setdefault("total", []).append(t3 - t0)
+        frames += 1
+
+        if frame_interval is not None:
+            # 고정 FPS 시뮬레이션: 다음 프레임 도착 시각까지 대기
+            wait = start + frames * frame_interval - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+
+    cap.release()
+    elapsed = time.perf_counter() - start
+    return {"frames": frames, "elapsed_sec": round(elapsed, 3),
+            "fps": round(frames / elapsed, 2) if elapsed > 0 else 0.0}
+
+
+def bench_kernel(n_frames, seed=0):
+    """
+    compute_posture_metrics를 프레임마다 호출할 때와 (frames, 33, 4) 배열로 한 번에 호출할 때의
+    프레임당 처리 시간 비교 (녹화 세션 재분석 속도 확인용)
+    """
+    rng = np.random.default_rng(seed)
+    landmarks = rng.random((n_frames, NUM_POSE_LANDMARKS, 4), dtype=np.float32)
+
+    t0 = time.perf_counter()
+    for i in range(n_frames):
+        compute_posture_metrics(landmarks[i])
+    t1 = time.perf_counter()
+    compute_posture_metrics(landmarks)
+    t2 = time.perf_counter()
+
+    per_frame_us = (t1 - t0) / n_frames * 1e6
+    batch_us = (t2 - t1) / n_frames * 1e6
+    return {
+        "frames": n_frames,
+        "per_frame_call_us": round(per_frame_us, 3),
+        "batched_us_per_frame": round(batch_us, 4),
+        "speedup": round(per_frame_us / batch_us, 1) if batch_us > 0 else None,
+    }
+
+
+def bench_preprocess(n_frames, source_size=(1280, 720)):
+    """
+    전처리 비교: 이전 방식(flip/resize/cvtColor마다 새 배열) vs FramePreprocessor(버퍼 재사용).
+    source_size가 FRAME_WIDTH×FRAME_HEIGHT와 같으면 리사이즈 생략 경로가 측정됩니다.
+    """
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (source_size[1], source_size[0], 3), dtype=np.uint8)
+    preprocessor = FramePreprocessor()
+
+    t0 = time.perf_counter()
+    for _ in range(n_frames):
+        legacy_preprocess(frame)
+    t1 = time.perf_counter()
+    for _ in range(n_frames):
+        preprocessor.process(frame)
+    t2 = time.perf_counter()
+
+    legacy_ms = (t1 - t0) / n_frames * 1000
+    prealloc_ms = (t2 - t1) / n_frames * 1000
+    return {
+        "frames": n_frames,
+        "source_size": list(source_size),
+        # 이전 방식은 OpenCV 호출 3번이 모두 새 출력 배열을 할당
+        "legacy": {"mean_ms": round(legacy_ms, 3), "allocations": 3 * n_frames,
+                   "fps": round(1000 / legacy_ms, 1) if legacy_ms > 0 else None},
+        "preallocated": {"mean_ms": round(prealloc_ms, 3), "allocations": preprocessor.allocations,
+                         "fps": round(1000 / prealloc_ms, 1) if prealloc_ms > 0 else None,
+                         "resize_skipped": preprocessor.resize_skipped},
+    }
+
+
+def bench_gesture(n_frames, n_hands=2, seed=0):
+    """
+    손 제스처 판정의 프레임당 비용 비교 (한 프레임에 손 n_hands개):
+    이전 방식(손마다 랜드마크 객체로 판정) vs detect_gesture(배열 변환 + 벡터 판정) vs classify_hands(판정만)
+    """
+    rng = np.random.default_rng(seed)
+    arrays = rng.random((n_frames, n_hands, NUM_HAND_LANDMARKS, 3), dtype=np.float32)
+    # MediaPipe 결과처럼 .landmark[i].x/.y/.z 로 접근하는 객체
+    frames = [[SimpleNamespace(landmark=[SimpleNamespace(x=float(x), y=float(y), z=float(z)) for x, y, z in hand])
+               for hand in hands] for hands in arrays]
+
+    t0 = time.perf_counter()
+    legacy = [[legacy_gesture(hand) for hand in hands] for hands in frames]
+    t1 = time.perf_counter()
+    for hands in frames:
+        detect_gesture(hands)
+    t2 = time.perf_counter()
+    for hands in arrays:
+        classify_hands(hands)
+    t3 = time.perf_counter()
+    gesture_margins(arrays.reshape(-1, NUM_HAND_LANDMARKS, 3))   # 녹화 분석처럼 모든 손을 한 번에
+    t4 = time.perf_counter()
+
+    # 이전 방식이 인식한 손은 같은 제스처로 인식해야 함 (FIST는 새로 추가된 제스처)
+    vectorized = [classify_hands(hands_to_array(hands))[0] for hands in frames]
+    agree = sum(old == (new if new != "FIST" else None)
+                for olds, news in zip(legacy, vectorized) for old, new in zip(olds, news))
+    return {
+        "frames": n_frames,
+        "hands_per_frame": n_hands,
+        "legacy_us": round((t1 - t0) / n_frames * 1e6, 2),
+        "vectorized_us": round((t2 - t1) / n_frames * 1e6, 2),
+        "classify_only_us": round((t3 - t2) / n_frames * 1e6, 2),
+        "batched_us_per_frame": round((t4 - t3) / n_frames * 1e6, 3),
+        "agreement": round(agree / (n_frames * n_hands), 4),
+    }
+
+
+def bench_render(n_frames, font_path=None):
+    """
+    안내 메시지 렌더링 비용 비교: 이전 방식(메시지마다 PIL 전체 변환 + 배너 복사) vs 스프라이트 합성.
+    Stage 3 경고 화면과 비슷하게 배너 1개 + 메시지 4줄(카운트다운 숫자가 바뀌는 줄 포함)을 그립니다.
+    """
+    from config import FRAME_WIDTH, FRAME_HEIGHT
+    from renderer import PostureRenderer, FONT_PATH
+
+    renderer = PostureRenderer(font_path or FONT_PATH)
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 256, (FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+
+    def fake_result(i):
+        return SimpleNamespace(stretch_alert=True, messages=[
+            "[ STAGE 3 ] Monitoring... (Show 브이 Victory to STOP)",
+            f"[WARNING] Turtle Neck! (142deg, {5 + (i % 50) / 10:.1f}s)",
+            "[WARNING] Slouching! (ratio=0.12,  6.0s)",
+            f"[ GESTURE ] Hold Victory {3 - (i % 30) / 10:.1f}s",
+        ])
+
+    timings = {}
+    for name, draw in [("pil_per_message", renderer._draw_overlay_pil), ("sprite_cache", renderer._draw_overlay)]:
+        samples = []
+        for i in range(n_frames):
+            frame = base.copy()
+            t0 = time.perf_counter()
+            draw(frame, fake_result(i))
+            samples.append(time.perf_counter() - t0)
+        arr = np.asarray(samples) * 1000.0
+        timings[name] = {"mean_ms": round(float(arr.mean()), 3),
+                         "p50_ms": round(float(np.percentile(arr, 50)), 3),
+                         "p95_ms": round(float(np.percentile(arr, 95)), 3)}
+
+    before, after = timings["pil_per_message"]["mean_ms"], timings["sprite_cache"]["mean_ms"]
+    timings["frames"] = n_frames
+    timings["font_loaded"] = renderer.font is not None
+    timings["speedup"] = round(before / after, 1) if after > 0 else None
+    timings["cache"] = renderer.compositor.stats()
+    return timings
+
+
+def run_benchmark(paths, fps=None, render=False, max_frames=None, motion_gate=True, pose_roi=True, predict_fps=0):
+    """영상 파일 목록 전체를 재생하고 결과 dict 반환"""
+    renderer = None
+    if paths:
+        # MediaPipe 등 무거운 의존성은 영상을 재생할 때만 로드
+        from posture_engine import PostureEngine
+    if render and paths:
+        from renderer import PostureRenderer
+        renderer = PostureRenderer()
+
+    samples = {}
+    files = []
+    for path in paths:
+        # 파일(세션)마다 새 엔진으로 Stage 1부터 시작, 경고음/로그 파일 기록은 하지 않음
+        engine = PostureEngine(log_filename=os.devnull, alert=lambda sound_file: None,
+                               motion_gate=motion_gate, pose_roi=pose_roi, predict_fps=predict_fps)
+        engine.warm_up()  # 모델 초기화 시간이 첫 프레임 pose 시간에 섞이지 않도록
+        print(f"▶ Replaying {path} ...")
+        try:
+            stats = replay_file(path, engine, renderer, fps=fps, max_frames=max_frames, samples=samples)
+        finally:
+            engine.close()
+        stats["path"] = str(path)
+        if engine.scheduler is not None:
+            stats["scheduler"] = engine.scheduler.stats()
+        stats["hands_gate"] = engine.hand_detector.stats()
+        stats["preprocess"] = engine.preprocessor.stats()
+        if engine.roi_tracker is not None:
+            stats["pose_roi"] = engine.roi_tracker.stats()
+        if engine.predictor is not None:
+            stats["prediction"] = engine.predictor.stats()
+        files.append(stats)
+        print(f"   {stats['frames']} frames, {stats['fps']} FPS")
+        if "scheduler" in stats:
+            print(f"   inference skipped on {stats['scheduler']['skip_ratio'] * 100:.0f}% of frames")
+
+    total_frames = sum(f["frames"] for f in files)
+    total_elapsed = sum(f["elapsed_sec"] for f in files)
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+        },
+        "config": {"fps": fps, "render": render, "max_frames": max_frames, "motion_gate": motion_gate,
+                   "pose_roi": pose_roi, "predict_fps": predict_fps},
+        "files": files,
+        "frames": total_frames,
+        "fps": round(total_frames / total_elapsed, 2) if total_elapsed > 0 else 0.0,
+        "stages": summarize(samples),
+    }
+
+
+def print_report(report):
+    """단계별 지연시간 표 출력"""
+    if report.get("files"):
+        print(f"\n📊 {report['frames']} frames, {report['fps']} FPS (commit={report['commit']})")
+        print(f"{'stage':<12}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+        for stage, s in report["stages"].items():
+            print(f"{stage:<12}{s['count']:>8}{s['mean_ms']:>10.2f}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}")
+    if "render_bench" in report:
+        r = report["render_bench"]
+        print(f"\n🖌 overlay render ({r['frames']} frames, font={'PIL' if r['font_loaded'] else 'cv2 fallback'}): "
+              f"PIL per message {r['pil_per_message']['mean_ms']:.2f}ms → sprite cache {r['sprite_cache']['mean_ms']:.2f}ms "
+              f"(x{r['speedup']}, hit ratio {r['cache']['hit_ratio']})")
+    if "preprocess_bench" in report:
+        p = report["preprocess_bench"]
+        print(f"\n🎞 preprocess ({p['frames']} frames from {p['source_size'][0]}x{p['source_size'][1]}): "
+              f"legacy {p['legacy']['mean_ms']:.3f}ms / {p['legacy']['allocations']} allocs → "
+              f"preallocated {p['preallocated']['mean_ms']:.3f}ms / {p['preallocated']['allocations']} allocs")
+    if "gesture_bench" in report:
+        g = report["gesture_bench"]
+        print(f"\n✋ gesture ({g['frames']} frames x {g['hands_per_frame']} hands): legacy {g['legacy_us']:.2f}us → "
+              f"array + vectorized {g['vectorized_us']:.2f}us (classify only {g['classify_only_us']:.2f}us, "
+              f"batched {g['batched_us_per_frame']:.3f}us/frame), "
+              f"agreement {g['agreement']:.2%}")
+    if "kernel" in report:
+        k = report["kernel"]
+        print(f"\n🧮 posture kernel ({k['frames']} frames): per-frame {k['per_frame_call_us']:.2f}us, "
+              f"batched {k['batched_us_per_frame']:.4f}us/frame (x{k['speedup']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Posture Guardian - 오프라인 재생 벤치마크")
+    parser.add_argument("videos", nargs="*", help="녹화된 영상 파일 경로")
+    parser.add_argument("--fps", type=float, default=None, help="고정 FPS로 재생 (기본: 최대 속도)")
+    parser.add_argument("--render", action="store_true", help="렌더링(PIL 텍스트/랜드마크) 비용도 측정")
+    parser.add_argument("--max-frames", type=int, default=None, help="파일당 최대 프레임 수")
+    parser.add_argument("--no-motion-gate", action="store_true", help="움직임 기반 추론 생략을 끄고 매 프레임 추론")
+    parser.add_argument("--no-pose-roi", action="store_true", help="사람 영역 자르기 없이 전체 프레임으로 포즈 추론")
+    parser.add_argument("--predict-fps", type=float, default=0, help="포즈 추론 주기 (그 사이 프레임은 랜드마크 예측)")
+    parser.add_argument("--kernel", type=int, default=None, metavar="N", help="N개 합성 프레임으로 자세 계산 커널 측정")
+    parser.add_argument("--render-bench", type=int, default=None, metavar="N", help="N프레임으로 화면 텍스트 렌더링 비용 비교")
+    parser.add_argument("--font", default=None, help="한글 폰트 경로 (--render-bench용, 기본: 맑은 고딕)")
+    parser.add_argument("--preprocess-bench", type=int, default=None, metavar="N", help="N프레임으로 전처리 할당/처리량 비교")
+    parser.add_argument("--source-size", default="1280x720", help="--preprocess-bench 입력 해상도 (가로x세로)")
+    parser.add_argument("--gesture-bench", type=int, default=None, metavar="N", help="N프레임으로 손 제스처 판정 비용 비교")
+    parser.add_argument("--output", default="bench_results/benchmark.json", help="결과 JSON 파일 경로")
+    args = parser.parse_args()
+    if not (args.videos or args.kernel or args.render_bench or args.preprocess_bench or args.gesture_bench):
+        parser.error("영상 파일, --kernel N, --render-bench N, --preprocess-bench N, --gesture-bench N 중 하나는 필요합니다.")
+
+    report = run_benchmark(args.videos, fps=args.fps, render=args.render, max_frames=args.max_frames,
+                           motion_gate=not args.no_motion_gate, pose_roi=not args.no_pose_roi,
+                           predict_fps=args.predict_fps)
+    if args.kernel:
+        report["kernel"] = bench_kernel(args.kernel)
+    if args.render_bench:
+        report["render_bench"] = bench_render(args.render_bench, args.font)
+    if args.preprocess_bench:
+        width, height = (int(v) for v in args.source_size.lower().split("x"))
+        report["preprocess_bench"] = bench_preprocess(args.preprocess_bench, (width, height))
+    if args.gesture_bench:
+        report["gesture_bench"] = bench_gesture(args.gesture_bench)
+    print_report(report)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"✅ 결과 저장: {output}")
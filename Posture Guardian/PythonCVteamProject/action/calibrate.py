@@ -0,0 +1,380 @@
+# calibrate.py
+# 목적: 기록된 자세 수치(trace_recorder 기록 또는 CSV)로 Stage 3 규칙의 기준값/유지 시간/히스테리시스를 사용자별로 자동 보정
+#       (손으로 정한 NECK_ANGLE_THRESHOLD, LEAN_ANGLE_THRESHOLD_LOW/HIGH, SLOUCH_RATIO_THRESHOLD, BAD_POSTURE_DURATION 대체)
+# Workflow: 사용자별 기록 읽기 → 규칙마다 기준값 후보(사용자 데이터 분위수) × 히스테리시스 후보(IQR 비율) × 유지 시간 후보 조합 생성
+#           → replay_rule()이 PostureRuleSet.evaluate와 같은 타이머 규칙을 프레임 반복 없이 배열 연산으로 재현
+#             (기준값 조합은 열 방향으로 한 번에, 유지 시간은 정렬된 경과 시간에서 searchsorted로 한 번에)
+#           → 작업을 여러 프로세스에 나눠 실행 → 조합별 시간당 경고 횟수 / 경고 시간 비율 / (라벨이 있으면) 라벨 일치도(F1)
+#           → 사용자별 최적 설정을 CALIBRATION_FILE(JSON)로 저장 → main.py --calibration 으로 적용
+#
+# 사용 예:
+#   python calibrate.py PythonCVteamProject/traces/desk1 alice=alice_metrics.csv --labels labels.csv
+#   python main.py --calibration PythonCVteamProject/calibration/desk1.json
+#
+# 라벨 CSV (선택): start,end,event[,user]
+#   - start/end: time.time() 초 또는 "YYYY-MM-DD HH:MM:SS" (posture_log.csv와 같은 형식, 현지 시각)
+#   - event: 규칙 이름 (Turtle_Neck 등), 비우거나 "*"면 모든 규칙 / user: 비우면 모든 사용자
+#   - 라벨 구간 = 실제로 나쁜 자세였던 시간, 나머지 기록 시간은 바른 자세로 간주
+# 라벨이 없으면 시간당 경고 횟수가 CALIBRATION_TARGET_ALERTS_PER_HOUR에 가장 가까운 조합 선택
+
+import argparse
+import copy
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from config import (POSTURE_RULES, CALIBRATION_FILE, CALIBRATION_THRESHOLD_STEPS, CALIBRATION_HOLD_RANGE,
+                    CALIBRATION_HYSTERESIS_FRACTIONS, CALIBRATION_TARGET_ALERTS_PER_HOUR, CALIBRATION_MAX_GAP_SEC,
+                    CALIBRATION_MAX_CELLS)
+from posture_rules import PostureRuleSet
+
+
+# === 기록 읽기 ===
+def load_metrics(path, metric_names):
+    """
+    기록 1개 → (timestamp (n,), {metric 이름: (n,) float64}).
+    - 디렉터리: TraceRecorder 기록 (저장되지 않은 수치는 랜드마크에서 다시 계산)
+    - .csv: timestamp 열 + 수치 이름 열
+    """
+    path = Path(path)
+    if path.is_dir():
+        from trace_recorder import TraceReader
+        trace = TraceReader(path).read()
+        missing = [name for name in metric_names if name not in trace]
+        if missing:
+            from posture_analysis import compute_posture_metrics
+            computed = compute_posture_metrics(trace["landmarks"]) if len(trace["timestamp"]) else {}
+            for name in missing:
+                trace[name] = computed.get(name, np.empty(0))
+    else:
+        table = np.genfromtxt(path, delimiter=",", names=True, dtype=np.float64)
+        trace = {name: np.atleast_1d(table[name]) for name in table.dtype.names}
+    timestamps = np.asarray(trace["timestamp"], dtype=np.float64)
+    order = np.argsort(timestamps, kind="stable")
+    return timestamps[order], {name: np.asarray(trace[name], dtype=np.float64)[order] for name in metric_names}
+
+
+def _parse_time(text):
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.strptime(text.strip(), "%Y-%m-%d %H:%M:%S").timestamp()
+
+
+def load_labels(path):
+    """라벨 CSV → [(start, end, event 또는 None, user 또는 None)]"""
+    labels = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            event = (row.get("event") or "").strip()
+            user = (row.get("user") or "").strip()
+            labels.append((_parse_time(row["start"]), _parse_time(row["end"]),
+                           None if event in ("", "*") else event, user or None))
+    return labels
+
+
+def label_mask(timestamps, labels, event, user):
+    """이 사용자/규칙에 해당하는 라벨 구간 안의 프레임 = True"""
+    truth = np.zeros(len(timestamps), dtype=bool)
+    for start, end, label_event, label_user in labels:
+        if label_event not in (None, event) or label_user not in (None, user):
+            continue
+        lo, hi = np.searchsorted(timestamps, [start, end], side="left")
+        truth[lo:hi] = True
+    return truth
+
+
+def frame_weights(timestamps):
+    """
+    (프레임별 관측 시간(초), 세션 시작 프레임 마스크).
+    다음 프레임까지 간격이 CALIBRATION_MAX_GAP_SEC보다 길면 기록이 끊긴 것으로 보고 관측 시간에서 빼고 타이머를 초기화.
+    """
+    gaps = np.diff(timestamps)
+    weights = np.append(np.where(gaps > CALIBRATION_MAX_GAP_SEC, 0.0, gaps), 0.0)
+    session_start = np.ones(len(timestamps), dtype=bool)
+    session_start[1:] = gaps > CALIBRATION_MAX_GAP_SEC
+    return weights, session_start
+
+
+# === Stage 3 타이머 재현 ===
+def replay_rule(timestamps, values, lows, highs, hysteresis, on_nan, inclusive, holds, weights, session_start,
+                truth=None):
+    """
+    규칙 1개를 기준값 조합 K개 × 유지 시간 H개에 대해 한 번에 재현 (PostureRuleSet.evaluate와 같은 판정).
+    - lows / highs: (K,) 기준값 (없는 방향은 -inf / inf)
+    - on_nan / inclusive: PostureRule과 같은 의미
+    - 반환: {"alerts": (K, H) 경고 횟수, "alert_time": (K, H) 경고 중인 시간(초), "hit_time": 라벨과 겹친 경고 시간}
+    """
+    # 배열 모양은 (기준값 조합 K, 프레임 n): 시간 방향 누적 연산이 연속된 메모리를 따라가도록
+    n, k = len(values), len(lows)
+    frames = np.arange(n)
+    rows = np.arange(k)[:, None]
+    lows, highs = lows[:, None], highs[:, None]
+    nan = np.isnan(values)
+    less, greater = (np.less_equal, np.greater_equal) if inclusive else (np.less, np.greater)
+    with np.errstate(invalid="ignore"):
+        enter = less(values, lows) | greater(values, highs)                                  # 이전 상태와 무관하게 나쁜 자세
+        leave = ~(less(values, lows + hysteresis) | greater(values, highs - hysteresis))     # 이전 상태와 무관하게 바른 자세
+    if on_nan == "bad":
+        enter[:, nan] = True
+        leave[:, nan] = False
+    # 그 사이 값(히스테리시스 구간, on_nan="hold"의 NaN)은 직전 상태 유지 → 마지막 "결정" 프레임의 상태를 앞으로 채움
+    decisive = enter | leave
+    if on_nan == "hold":
+        decisive[:, nan] = False
+    decisive[:, session_start] = True
+    last = np.maximum.accumulate(np.where(decisive, frames, 0), axis=1)
+    in_run = enter[rows, last]
+
+    # 나쁜 자세 구간 시작 프레임 → 프레임별 경과 시간 (시작 시각부터)
+    previous = np.zeros_like(in_run)
+    previous[:, 1:] = in_run[:, :-1]
+    previous[:, session_start] = False
+    run_start = np.maximum.accumulate(np.where(in_run & ~previous, frames, 0), axis=1)
+    bad = in_run if on_nan == "bad" else in_run & ~nan
+    elapsed = timestamps - timestamps[run_start]
+
+    # 구간별 마지막 나쁜 프레임 (다음 나쁜 프레임이 없거나 다른 구간) → 그 경과 시간 > hold 이면 그 구간에서 경고 1번
+    next_bad = np.full((k, n), n)
+    next_bad[:, :-1] = np.minimum.accumulate(np.where(bad, frames, n)[:, ::-1], axis=1)[:, ::-1][:, 1:]
+    run_last = bad & ((next_bad == n) | (run_start[rows, np.minimum(next_bad, n - 1)] != run_start))
+
+    # 유지 시간 후보별 집계: 프레임마다 "elapsed > hold"를 만족하는 후보 수(정렬된 holds 안의 위치)를 구해
+    # (기준값 조합, 위치)별로 한 번에 합산한 뒤 뒤에서부터 누적 → 후보별 "elapsed > hold" 합계
+    bins = len(holds) + 1
+    keys = rows * bins + np.searchsorted(holds, elapsed, side="left")
+    frame_weight = np.broadcast_to(weights, (k, n))
+
+    def exceeding(mask, weight=None):
+        counts = np.bincount(keys[mask], None if weight is None else weight[mask], minlength=k * bins)
+        return np.cumsum(counts.reshape(k, bins)[:, ::-1], axis=1)[:, ::-1][:, 1:]
+
+    alerts = exceeding(run_last).astype(np.int64)
+    alert_time = exceeding(bad, frame_weight)
+    hit_time = exceeding(bad & truth, frame_weight) if truth is not None else np.zeros_like(alert_time)
+    return {"alerts": alerts, "alert_time": alert_time, "hit_time": hit_time}
+
+
+def _replay_task(task):
+    """워커 프로세스 진입점 (작업 1개 = 사용자 1명 × 규칙 1개 × 히스테리시스 1개 × 기준값 조합 일부)"""
+    key, timestamps, values, lows, highs, hysteresis, on_nan, inclusive, holds, weights, session_start, truth = task
+    return key, replay_rule(timestamps, values, lows, highs, hysteresis, on_nan, inclusive, holds, weights,
+                            session_start, truth)
+
+
+# === 후보 조합 ===
+def threshold_candidates(rule, values, steps=CALIBRATION_THRESHOLD_STEPS):
+    """
+    기준값 조합 (lows, highs) 각각 (K,).
+    below 기준은 사용자 값의 하위 분위수, above 기준은 상위 분위수에서 고르고 현재 설정값도 포함.
+    below/above가 둘 다 있는 규칙은 한쪽당 steps // 2개씩 모든 쌍 (low < high인 것만).
+    """
+    finite = values[np.isfinite(values)]
+    if not len(finite):
+        finite = np.array([rule.below if rule.below is not None else rule.above], dtype=np.float64)
+    both = rule.below is not None and rule.above is not None
+    per_side = max(steps // 2, 2) if both else steps
+
+    def side(current, q_lo, q_hi):
+        if current is None:
+            return None
+        return np.unique(np.append(np.percentile(finite, np.linspace(q_lo, q_hi, per_side)), current))
+
+    lows = side(rule.below, 1, 50)
+    highs = side(rule.above, 50, 99)
+    if lows is None:
+        return np.full(len(highs), -np.inf), highs
+    if highs is None:
+        return lows, np.full(len(lows), np.inf)
+    lows, highs = [grid.ravel() for grid in np.meshgrid(lows, highs, indexing="ij")]
+    keep = lows < highs
+    return lows[keep], highs[keep]
+
+
+def hysteresis_candidates(rule, values, fractions=CALIBRATION_HYSTERESIS_FRACTIONS):
+    """
+    히스테리시스 후보 (H,): 사용자 값의 사분위 범위(IQR) × fractions + 현재 설정값.
+    기본 규칙은 hysteresis 0이라 배수로는 후보가 생기지 않으므로 지표 단위의 절댓값으로 만듦.
+    """
+    finite = values[np.isfinite(values)]
+    spread = float(np.subtract(*np.percentile(finite, [75, 25]))) if len(finite) else 0.0
+    return np.unique(np.append(np.asarray(fractions, dtype=np.float64) * spread, rule.hysteresis))
+
+
+def hold_candidates(rule):
+    start, stop, step = CALIBRATION_HOLD_RANGE
+    return np.unique(np.append(np.arange(start, stop + step / 2, step), rule.hold))
+
+
+# === 보정 ===
+class UserTrace:
+    """사용자 1명의 기록과 프레임 가중치"""
+
+    def __init__(self, name, path, rules):
+        self.name = name
+        self.path = str(path)
+        self.timestamps, self.metrics = load_metrics(path, sorted({rule.metric for rule in rules}))
+        self.weights, self.session_start = frame_weights(self.timestamps)
+        self.hours = self.weights.sum() / 3600.0
+
+
+def _score(stats, truth_time, hours, target_rate):
+    """조합별 점수 (클수록 좋음)와 지표: 라벨이 있으면 F1, 없으면 목표 경고 횟수와의 차이"""
+    alerts_per_hour = stats["alerts"] / max(hours, 1e-9)
+    alert_fraction = stats["alert_time"] / max(hours * 3600.0, 1e-9)
+    result = {"alerts_per_hour": alerts_per_hour, "alert_time": alert_fraction}
+    if truth_time is not None:
+        result["precision"] = np.divide(stats["hit_time"], stats["alert_time"],
+                                        out=np.zeros_like(stats["hit_time"]), where=stats["alert_time"] > 0)
+        result["recall"] = stats["hit_time"] / truth_time if truth_time > 0 else np.zeros_like(stats["hit_time"])
+        f1 = 2 * stats["hit_time"] / np.maximum(stats["alert_time"] + truth_time, 1e-9)
+        result["f1"] = f1
+        # F1이 같으면 경고가 적은 쪽
+        return f1 - 1e-6 * alerts_per_hour, result
+    return -np.abs(alerts_per_hour - target_rate), result
+
+
+def calibrate(users, labels=None, rules=POSTURE_RULES, jobs=None, target_rate=CALIBRATION_TARGET_ALERTS_PER_HOUR):
+    """
+    사용자별 / 규칙별 최적 설정 탐색.
+    - users: [(이름, 기록 경로)]
+    - 반환: {사용자 이름: 보정 결과 dict (save_calibration 형식)}
+    """
+    rule_set = PostureRuleSet(rules)
+    traces = [UserTrace(name, path, rule_set.rules) for name, path in users]
+
+    # 작업 목록: 메모리 제한(CALIBRATION_MAX_CELLS = 프레임 수 × 기준값 조합 수)에 맞춰 기준값 조합을 나눔
+    tasks, plans = [], {}
+    for u, trace in enumerate(traces):
+        chunk = max(CALIBRATION_MAX_CELLS // max(len(trace.timestamps), 1), 1)
+        for r, rule in enumerate(rule_set.rules):
+            values = trace.metrics[rule.metric]
+            lows, highs = threshold_candidates(rule, values)
+            holds = hold_candidates(rule)
+            hystereses = hysteresis_candidates(rule, values)
+            truth = None if labels is None else label_mask(trace.timestamps, labels, rule.event, trace.name)
+            keys = [(u, r, s, c) for s in range(len(hystereses)) for c in range(0, len(lows), chunk)]
+            plans[u, r] = (lows, highs, holds, hystereses, truth, keys)
+            for key in keys:
+                c = key[3]
+                tasks.append((key, trace.timestamps, values, lows[c:c + chunk], highs[c:c + chunk],
+                              hystereses[key[2]], rule.on_nan, rule.inclusive, holds,
+                              trace.weights, trace.session_start, truth))
+
+    results = {}
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+            results.update(pool.map(_replay_task, tasks))
+    else:
+        results.update(map(_replay_task, tasks))
+
+    calibrations = {}
+    for u, trace in enumerate(traces):
+        report = {"user": trace.name, "source": trace.path, "frames": len(trace.timestamps),
+                  "hours": round(trace.hours, 3), "labelled": labels is not None, "rules": {}}
+        for r, rule in enumerate(rule_set.rules):
+            lows, highs, holds, hystereses, truth, keys = plans[u, r]
+            # 작업별 결과를 이어 붙여 (히스테리시스 × 기준값 조합, 유지 시간) 표 하나로
+            stats = {name: np.concatenate([results[key][name] for key in keys])
+                     for name in ("alerts", "alert_time", "hit_time")}
+            truth_time = None if truth is None else float((trace.weights * truth).sum())
+            score, metrics = _score(stats, truth_time, trace.hours, target_rate)
+            best = np.unravel_index(np.argmax(score), score.shape)
+            s, t = divmod(int(best[0]), len(lows))
+            current = _current_index(rule, lows, highs, holds, hystereses)
+
+            entry = {"hold": float(holds[best[1]]), "hysteresis": round(float(hystereses[s]), 4)}
+            if rule.below is not None:
+                entry["below"] = round(float(lows[t]), 4)
+            if rule.above is not None:
+                entry["above"] = round(float(highs[t]), 4)
+            entry["combinations"] = int(score.size)
+            entry["score"] = {name: round(float(value[best]), 4) for name, value in metrics.items()}
+            entry["current"] = {name: round(float(value[current]), 4) for name, value in metrics.items()}
+            report["rules"][rule.event] = entry
+        calibrations[trace.name] = report
+    return calibrations
+
+
+def _current_index(rule, lows, highs, holds, hystereses):
+    """현재 config 설정이 조합 표에서 어느 칸인지 (후보에 항상 포함되어 있음)"""
+    low = -np.inf if rule.below is None else rule.below
+    high = np.inf if rule.above is None else rule.above
+    t = int(np.flatnonzero((lows == low) & (highs == high))[0])
+    s = int(np.flatnonzero(hystereses == rule.hysteresis)[0])
+    return s * len(lows) + t, int(np.flatnonzero(holds == rule.hold)[0])
+
+
+# === 저장 / 적용 ===
+def save_calibration(report, path=None):
+    """보정 결과 1명분을 JSON으로 저장 (기본 경로: CALIBRATION_FILE)"""
+    path = Path(path or CALIBRATION_FILE.format(seat=report["user"]))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def load_calibration(path, rules=POSTURE_RULES):
+    """보정 JSON을 읽어 규칙 목록(config.POSTURE_RULES 형식)의 below/above/hold/hysteresis를 덮어쓴 사본 반환"""
+    report = json.loads(Path(path).read_text(encoding="utf-8"))
+    calibrated = []
+    for rule in rules:
+        rule = copy.deepcopy(rule)
+        event = rule.event if hasattr(rule, "event") else rule["event"]
+        for key, value in report["rules"].get(event, {}).items():
+            if key in ("below", "above", "hold", "hysteresis"):
+                if isinstance(rule, dict):
+                    rule[key] = value
+                else:
+                    setattr(rule, key, value)
+        calibrated.append(rule)
+    return calibrated
+
+
+def _print_report(report):
+    print(f"👤 {report['user']}: {report['frames']} frames, {report['hours']:.2f} h ({report['source']})")
+    for event, entry in report["rules"].items():
+        bounds = " ".join(f"{key}={entry[key]:g}" for key in ("below", "above") if key in entry)
+        best, current = entry["score"], entry["current"]
+        line = (f"   {event:<12} {bounds} hold={entry['hold']:g}s hysteresis={entry['hysteresis']:g} | "
+                f"alerts/h {current['alerts_per_hour']:.1f} → {best['alerts_per_hour']:.1f}, "
+                f"alert time {current['alert_time'] * 100:.1f}% → {best['alert_time'] * 100:.1f}%")
+        if "f1" in best:
+            line += f", F1 {current['f1']:.2f} → {best['f1']:.2f}"
+        print(line + f"  ({entry['combinations']} combinations)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="기록된 자세 수치로 Stage 3 기준값/유지 시간 자동 보정")
+    parser.add_argument("traces", nargs="+", help="사용자별 기록 ('name=path' 또는 'path', path는 trace 디렉터리 또는 CSV)")
+    parser.add_argument("--labels", default=None, help="실제 나쁜 자세 구간 CSV (start,end,event[,user])")
+    parser.add_argument("--jobs", type=int, default=None, help="워커 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--target-rate", type=float, default=CALIBRATION_TARGET_ALERTS_PER_HOUR,
+                        help="라벨이 없을 때 목표로 하는 규칙별 시간당 경고 횟수")
+    parser.add_argument("--out-dir", default=None, help="보정 JSON 저장 디렉터리 (기본: CALIBRATION_FILE 위치)")
+    args = parser.parse_args()
+
+    users = []
+    for item in args.traces:
+        name, sep, path = item.partition("=")
+        if not sep:
+            name, path = Path(item).stem, item
+        users.append((name, path))
+
+    start = time.perf_counter()
+    reports = calibrate(users, load_labels(args.labels) if args.labels else None,
+                        jobs=args.jobs, target_rate=args.target_rate)
+    elapsed = time.perf_counter() - start
+    for report in reports.values():
+        _print_report(report)
+        out = Path(args.out_dir) / f"{report['user']}.json" if args.out_dir else None
+        print(f"   💾 {save_calibration(report, out)}")
+    total = sum(entry["combinations"] for report in reports.values() for entry in report["rules"].values())
+    print(f"⏱ {total} combinations in {elapsed:.1f}s")
@@ -6,6 +6,15 @@
 CAMERA_INDEX = 0
 FRAME_WIDTH = 960
 FRAME_HEIGHT = 540
+PREPROCESS_BUFFERS = 2  # 전처리 출력 버퍼 세트 개수 (FramePreprocessor)
+FRAME_WAIT_TIMEOUT_SEC = 1.0  # 새 프레임 대기 최대 시간 (초과 시 "Waiting for frame..." 출력)
+STREAM_READ_FAILURE_TIMEOUT_SEC = 10.0  # 카메라/RTSP 읽기가 이 시간 동안 계속 실패하면 스트림 종료 (동영상 파일은 끝에서 바로 종료)
+
+# 공유 메모리 프레임 버스 (frame_bus.py, 카메라 1대를 여러 프로그램이 함께 사용)
+FRAME_BUS_SLOTS = 8                  # 고리 버퍼 슬롯 수 (독자가 이 프레임 수만큼 밀리면 건너뜀)
+FRAME_BUS_POLL_SEC = 0.002           # 독자가 새 프레임을 확인하는 간격
+FRAME_BUS_ATTACH_TIMEOUT_SEC = 10    # 캡처 서비스가 버스를 만들 때까지 기다리는 시간
+PIPELINE_QUEUE_SIZE = 2  # 파이프라인 모드 단계 사이 큐 크기 (가득 차면 가장 오래된 프레임을 버림)
 
 # Mediapipe 설정
 POSE_MIN_DETECTION_CONFIDENCE = 0.5
@@ -15,16 +24,31 @@ HANDS_MAX_NUM_HANDS = 2
 HANDS_MIN_DETECTION_CONFIDENCE = 0.7
 HANDS_MIN_TRACKING_CONFIDENCE = 0.7
 
+# 사람 영역(ROI) 포즈 추론 (PoseRoiTracker)
+POSE_ROI_ENABLED = False          # 기본 꺼짐: benchmark.py로 ROI 켬/끔(--no-pose-roi)을 비교해 이득이 확인되면 켜기
+POSE_ROI_INPUT_SIZE = (320, 320)  # ROI를 리사이즈할 포즈 입력 크기 (가로, 세로)
+POSE_ROI_PADDING = 0.35           # ROI 여유 공간 (랜드마크 상자 크기 대비 한쪽 비율)
+POSE_ROI_MIN_VISIBILITY = 0.5     # ROI 계산에 사용할 랜드마크 visibility 기준
+POSE_ROI_KEEP_MARGIN = 0.1        # 랜드마크 상자가 ROI 경계에서 이만큼(상자 크기 대비) 떨어져 있으면 ROI를 옮기지 않음
+POSE_ROI_SHRINK_RATIO = 0.6       # 새로 계산한 ROI 폭이 현재 ROI 폭의 이 비율보다 작아지면 (멀어짐) ROI를 다시 계산
+
+# 손 추론 조건 (HandGestureDetector)
+HAND_CUE_MARGIN = 0.05   # 손목이 (어깨선 + 이 값)보다 위에 있을 때만 손 추론 (정규화 y 좌표)
+HAND_ROI_SCALE = 1.2     # 손 ROI 한 변 길이 = 어깨 너비 × 배수
+HAND_ROI_MIN_SIZE = 160  # 손 ROI 최소 한 변 길이 (px)
+
 
 # 자세 판별 기준값
 CENTER_TOLERANCE = 0.15
 HEAD_ROOM_Y = 0.1
 HIP_ROOM_Y = 0.85
+VISIBILITY_THRESHOLD = 0.7  # 랜드마크가 "보인다"고 판단하는 visibility 기준
 
 # 타이머 설정
 HOLD_DURATION = 5  #원래 10
 RESET_DURATION = 10  #원래 30
 GESTURE_HOLD_DURATION = 3
+GESTURE_MIN_MARGIN = 0.0  # 제스처 조건 여유값(손 크기 대비)이 이보다 커야 인식 (흔들리면 0.05 정도로 높임)
 BAD_POSTURE_DURATION = 5
 
 STRETCH_INTERVAL_SEC = 30
@@ -35,13 +59,111 @@ NECK_ANGLE_THRESHOLD = 150
 LEAN_ANGLE_THRESHOLD_LOW = 85
 LEAN_ANGLE_THRESHOLD_HIGH = 95
 SLOUCH_RATIO_THRESHOLD = 0.09
+SLOUCH_MIN_TORSO_HEIGHT = 0.01  # 몸통 수직 길이가 이보다 작으면 구부정 비율 계산 안 함
+
+# 지속 시간 / 처리 속도 측정 (프레임 timestamp 기준, 고정 FPS 가정 없음)
+DURATION_MAX_FRAME_GAP_SEC = 1.0  # 프레임 간격이 이보다 길면(끊김/일시 정지) 이 값까지만 지속 시간에 더함
+FPS_WINDOW_SEC = 2.0              # 실측 FPS 계산 구간
+
+# 움직임 기반 추론 생략 (InferenceScheduler)
+MOTION_GATE_ENABLED = True
+MOTION_DOWNSCALE_SIZE = (64, 36)  # 움직임 비교용 축소 흑백 프레임 크기 (가로, 세로)
+MOTION_THRESHOLD = 3.0            # 평균 밝기 차이(0~255)가 이보다 크면 움직임으로 판단
+MOTION_MAX_REUSE_SEC = 1.0        # 움직임이 없어도 최소 이 주기마다 한 번은 추론
+ABSENT_AFTER_SEC = 10             # 이 시간 동안 사람이 감지되지 않으면 부재 모드
+ABSENT_PROBE_INTERVAL_SEC = 2.0   # 부재 모드에서 탐색 추론 주기
+ABSENT_CAPTURE_FPS = 4            # 부재 모드에서 프레임을 가져오는 속도
+
+# 랜드마크 예측 (landmark_filter.LandmarkPredictor): 포즈 추론은 이 주기로만, 나머지 프레임은 예측값 사용
+LANDMARK_PREDICTION_FPS = 0         # 포즈 추론 주기 (0이면 예측을 쓰지 않고 매 프레임 추론)
+LANDMARK_FILTER_MIN_CUTOFF = 1.0    # One Euro 필터 최소 차단 주파수 (Hz, 낮을수록 떨림 감소/지연 증가)
+LANDMARK_FILTER_BETA = 5.0          # 속도에 따른 차단 주파수 증가량 (클수록 빠른 움직임을 덜 늦게 따라감)
+LANDMARK_FILTER_D_CUTOFF = 1.0      # 속도 추정용 차단 주파수 (Hz)
+LANDMARK_PREDICTION_MAX_SEC = 0.3   # 마지막 추론 후 이 시간까지만 속도로 외삽 (이후는 위치 유지)
+
+# 화면 텍스트 스프라이트 캐시 크기 (OverlayCompositor)
+OVERLAY_CACHE_SIZE = 128
 
 # 로그 파일 이름
 LOG_FILENAME = "PythonCVteamProject/posture_log.csv"
 
+# 로그 기록 스레드 설정 (logger.EventLogWriter)
+LOG_QUEUE_SIZE = 1024            # 기록 대기 이벤트 최대 개수 (가득 차면 새 이벤트는 버림)
+LOG_BATCH_SIZE = 64              # 한 번에 모아 쓰는 최대 이벤트 수
+LOG_FLUSH_INTERVAL_SEC = 1.0     # flush + fsync 주기 (강제 종료 시 잃을 수 있는 최대 구간)
+LOG_MAX_BYTES = 5 * 1024 * 1024  # 파일 크기가 넘으면 새 파일로 교체 (날짜가 바뀌어도 교체)
+ROLLUP_FLUSH_INTERVAL_SEC = 30   # 분/시간/일 요약 파일 저장 주기 (rollups.RollupStore)
+
+# 프레임별 랜드마크/수치 기록 (trace_recorder.TraceRecorder, --trace로 켬)
+TRACE_DIR = "PythonCVteamProject/traces/{seat}"  # 좌석별 기록 디렉터리
+TRACE_CHUNK_FRAMES = 18000   # 청크 파일 하나의 프레임 수 (30 FPS 기준 10분, 약 5MB)
+TRACE_FLUSH_FRAMES = 300     # 이 프레임 수마다 메모리 매핑 내용을 파일에 반영
+TRACE_MAX_AGE_DAYS = 7       # 이보다 오래된 청크는 새 청크를 만들 때 삭제 (None이면 무제한, 1주일 보관)
+TRACE_MAX_BYTES = 6 * 1024 ** 3   # 좌석 디렉터리 전체가 이 크기를 넘으면 오래된 청크부터 삭제 (None이면 무제한, 주 약 5GB + 여유)
+
+# 기준값/유지 시간 자동 보정 (calibrate.py, 결과는 main.py --calibration으로 적용)
+CALIBRATION_FILE = "PythonCVteamProject/calibration/{seat}.json"  # 사용자(좌석)별 보정 결과
+CALIBRATION_THRESHOLD_STEPS = 40             # 규칙별 기준값 후보 수 (사용자 데이터 분위수, 양쪽 기준 규칙은 한쪽당 절반)
+CALIBRATION_HOLD_RANGE = (1.0, 15.0, 0.5)    # 유지 시간 후보 (시작, 끝, 간격) 초
+CALIBRATION_HYSTERESIS_FRACTIONS = (0.0, 0.05, 0.15)  # hysteresis 후보 = 사용자 값의 사분위 범위(IQR) × 비율 (+ 현재 설정값)
+CALIBRATION_TARGET_ALERTS_PER_HOUR = 4       # 라벨이 없을 때 목표로 하는 규칙별 시간당 경고 횟수
+CALIBRATION_MAX_GAP_SEC = 30                 # 프레임 간격이 이보다 길면 기록이 끊긴 것으로 보고 타이머 초기화
+CALIBRATION_MAX_CELLS = 2_000_000            # 작업 1개가 한 번에 다루는 (프레임 수 × 기준값 조합 수) 상한 (메모리 제한)
+
+# 성능 지표 (telemetry.Telemetry, --metrics-port / --metrics-json로 켬)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.035, 0.05, 0.075, 0.1, 0.2, 0.5, 1.0)  # 히스토그램 구간(초)
+METRICS_DUMP_INTERVAL_SEC = 10   # JSON 파일 저장 주기
+
+# 실시간 상태 API 설정 (live_api.py, --live-port)
+LIVE_API_MAX_HZ = 30          # 구독자에게 보내는 최대 주기 (초당 횟수, 카메라 FPS 이상이면 사실상 프레임마다)
+LIVE_API_MAX_CLIENTS = 1000   # 좌석 하나에 동시에 연결할 수 있는 WebSocket 구독자 수
+LIVE_API_MAX_FRAME_BYTES = 64 * 1024   # 클라이언트가 보내는 프레임 최대 크기 (넘으면 close 1009로 연결 종료)
+
+# 멀티 좌석 모니터링 설정
+SEAT_LOG_FILENAME = "PythonCVteamProject/posture_log_{seat}.csv"  # 좌석별 로그 파일 이름 형식
+STATS_INTERVAL_SEC = 5  # 처리량(FPS) 보고 주기
+
 # === 음성 파일 경로 ===
 SOUND_NECK = "PythonCVteamProject\data\warning_neck.mp3"
 SOUND_LEAN_FORWARD = "PythonCVteamProject\data\warning_lean_forward.mp3"
 SOUND_LEAN_BACK = "PythonCVteamProject\data\warning_lean_back.mp3"
 SOUND_SLOUCH = "PythonCVteamProject\data\warning_slouch.mp3"
 
+# === 경고음 재생 (audio_utils.AlertEngine) ===
+ALERT_BACKEND = "auto"      # "auto" / "pcm"(미리 디코딩, pydub+simpleaudio) / "playsound" / "null" / "wav"
+ALERT_SAMPLE_RATE = 22050   # 미리 디코딩할 때 PCM 샘플링 주파수 (모노 16bit)
+ALERT_MAX_AGE_SEC = 3.0     # 재생 차례가 왔을 때 이보다 오래 기다린 경고는 버림
+ALERT_QUEUE_SIZE = 8        # 재생 대기 목록 최대 길이 (같은 경고음은 하나로 합침)
+ALERT_PRIORITIES = {        # 숫자가 클수록 먼저 재생 (없으면 0)
+    SOUND_NECK: 3,
+    SOUND_SLOUCH: 2,
+    SOUND_LEAN_FORWARD: 1,
+    SOUND_LEAN_BACK: 1,
+}
+
+# === 나쁜 자세 규칙 (Stage 3, posture_rules.PostureRuleSet) ===
+# metric: posture_analysis.compute_posture_metrics 결과 이름 / below·above: 나쁜 자세 기준
+# hold: 경고까지 유지 시간(초) / hysteresis: 해제할 때 기준보다 더 돌아와야 하는 양
+# on_nan: 값을 계산할 수 없을 때 "clear"(해제), "hold"(판단 보류), "bad"(below 방향 나쁜 자세)
+# inclusive: 기준값과 같아도 나쁜 자세 (이하/이상)
+# 기본 규칙은 이전 Stage 3 판정과 똑같이 동작하도록 hysteresis 0 (경계에서 깜빡이면 값을 주거나 calibrate.py로 보정)
+#   - 허리 기울임: 85 < 각도 < 95 일 때만 바른 자세 (85, 95도 나쁜 자세), 계산 불가(NaN)도 나쁜 자세(Leaning Back)
+#   - 구부정: 계산 불가(NaN)면 판단 보류
+POSTURE_RULES = [
+    {"event": "Turtle_Neck", "metric": "neck_angle", "below": NECK_ANGLE_THRESHOLD,
+     "hold": BAD_POSTURE_DURATION,
+     "message": "Turtle Neck!", "sound": SOUND_NECK, "label": "Neck angle", "value_format": "{:.0f}deg"},
+    {"event": "Leaning", "metric": "lean_angle", "below": LEAN_ANGLE_THRESHOLD_LOW, "above": LEAN_ANGLE_THRESHOLD_HIGH,
+     "hold": BAD_POSTURE_DURATION, "inclusive": True, "on_nan": "bad",
+     "message": {"below": "Leaning Back!", "above": "Leaning Forward!"},
+     "sound": {"below": SOUND_LEAN_BACK, "above": SOUND_LEAN_FORWARD},
+     "label": "Lean angle", "value_format": "{:.0f} deg"},
+    {"event": "Slouching", "metric": "slouch_ratio", "above": SLOUCH_RATIO_THRESHOLD,
+     "hold": BAD_POSTURE_DURATION, "on_nan": "hold",
+     "message": "Slouching!", "sound": SOUND_SLOUCH, "label": "Slouch ratio", "value_format": "ratio={:.2f}"},
+    # 예시 (필요하면 주석 해제, 경고음은 기존 파일 재사용):
+    # {"event": "Shoulder_Tilt", "metric": "shoulder_tilt", "above": 8, "message": "Shoulders uneven!",
+    #  "sound": SOUND_SLOUCH, "label": "Shoulder tilt", "value_format": "{:.0f}deg"},
+    # {"event": "Head_Tilt", "metric": "head_tilt", "above": 12, "message": "Head tilted!",
+    #  "sound": SOUND_NECK, "label": "Head tilt", "value_format": "{:.0f}deg"},
+]
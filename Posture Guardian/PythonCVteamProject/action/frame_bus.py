@@ -0,0 +1,347 @@
+# frame_bus.py
+# 목적: 카메라 1대를 한 번만 디코딩해서 공유 메모리(multiprocessing.shared_memory) 고리 버퍼에 올리고
+#       모니터(main.py), 각도 디버거(utility/debug.py), 녹화기가 같은 프레임을 함께 읽도록 함
+#       (같은 Tapo 카메라에 RTSP 연결을 여러 개 열고 프레임마다 여러 번 디코딩하지 않음)
+# Workflow: [캡처 서비스] VideoStream → FrameBusWriter.publish() (슬롯 = 순번 % 슬롯 수, 독자를 기다리지 않음)
+#           → [독자 프로세스] FrameBusReader.read_new() → 최신(또는 다음) 순번의 슬롯을 복사해서 반환
+#             (copy=False면 복사 없이 슬롯의 numpy 뷰, 사용이 끝난 뒤 valid(seq)로 덮어써지지 않았는지 확인해야 함)
+#           → 느린 독자는 밀린 프레임을 건너뛰고(dropped) 작성자는 절대 막히지 않음
+#
+# 사용 예:
+#   python frame_bus.py serve desk1 --source rtsp://user:pw@192.168.0.10:554/stream2
+#   python main.py --source bus:desk1
+#   python ../utility/debug.py bus:desk1
+#   python frame_bus.py record desk1 desk1.mp4
+#
+# 메모리 구성: [헤더 int64 × 8][슬롯별 순번 int64 × N][슬롯별 캡처 시각 float64 × N][프레임 uint8 × N × H × W × C]
+#   슬롯 순번: 쓰는 중에는 -순번, 다 쓰면 순번 (독자는 읽기 전후로 확인해서 덮어써진 프레임을 걸러냄)
+
+import argparse
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from config import FRAME_BUS_SLOTS, FRAME_BUS_POLL_SEC, FRAME_BUS_ATTACH_TIMEOUT_SEC, FRAME_WAIT_TIMEOUT_SEC
+
+BUS_PREFIX = "bus:"            # open_stream()에서 공유 메모리 소스를 나타내는 접두사 (예: "bus:desk1")
+_MAGIC = 0x50474642            # "PGFB"
+_HEADER_FIELDS = 8
+(_H_MAGIC, _H_HEIGHT, _H_WIDTH, _H_CHANNELS, _H_SLOTS, _H_LATEST, _H_CLOSED, _H_WRITER_PID) = range(_HEADER_FIELDS)
+
+
+def shm_name(bus_name):
+    """버스 이름 → 공유 메모리 이름"""
+    return f"posture_bus_{bus_name}"
+
+
+def _layout(shape, slots):
+    """(헤더, 슬롯 순번, 슬롯 시각, 프레임) 시작 위치와 전체 크기 (프레임 영역은 64바이트 정렬)"""
+    seq_offset = _HEADER_FIELDS * 8
+    time_offset = seq_offset + slots * 8
+    frame_offset = -(-(time_offset + slots * 8) // 64) * 64
+    return seq_offset, time_offset, frame_offset, frame_offset + slots * int(np.prod(shape))
+
+
+def _views(buf, shape, slots):
+    seq_offset, time_offset, frame_offset, _ = _layout(shape, slots)
+    header = np.ndarray((_HEADER_FIELDS,), np.int64, buf)
+    slot_seq = np.ndarray((slots,), np.int64, buf, seq_offset)
+    slot_time = np.ndarray((slots,), np.float64, buf, time_offset)
+    frames = np.ndarray((slots,) + tuple(shape), np.uint8, buf, frame_offset)
+    return header, slot_seq, slot_time, frames
+
+
+class FrameBusWriter:
+    """공유 메모리 고리 버퍼 작성자 (카메라 1대당 1개, 캡처 서비스 프로세스에서만 사용)"""
+
+    def __init__(self, bus_name, shape, slots=FRAME_BUS_SLOTS):
+        self.bus_name = bus_name
+        self.shape = tuple(shape)
+        self.slots = slots
+        size = _layout(self.shape, slots)[3]
+        try:
+            self.shm = shared_memory.SharedMemory(shm_name(bus_name), create=True, size=size)
+        except FileExistsError:
+            # 이전 서비스가 비정상 종료되어 남은 메모리는 지우고 새로 만듦
+            stale = shared_memory.SharedMemory(shm_name(bus_name))
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(shm_name(bus_name), create=True, size=size)
+        self.header, self.slot_seq, self.slot_time, self.frames = _views(self.shm.buf, self.shape, slots)
+        self.slot_seq[:] = 0
+        self.header[:] = (_MAGIC, self.shape[0], self.shape[1], self.shape[2], slots, 0, 0, os.getpid())
+        self.seq = 0
+
+    def publish(self, frame, timestamp):
+        """프레임 1장을 다음 슬롯에 복사하고 순번 반환 (독자를 기다리지 않음)"""
+        if frame.shape != self.shape:
+            raise ValueError(f"frame shape {frame.shape} != bus shape {self.shape}")
+        seq = self.seq + 1
+        i = seq % self.slots
+        self.slot_seq[i] = -seq               # 쓰는 중 표시
+        np.copyto(self.frames[i], frame)
+        self.slot_time[i] = timestamp
+        self.slot_seq[i] = seq
+        self.header[_H_LATEST] = seq
+        self.seq = seq
+        return seq
+
+    def close(self):
+        """독자에게 종료를 알리고 공유 메모리 삭제"""
+        self.header[_H_CLOSED] = 1
+        del self.header, self.slot_seq, self.slot_time, self.frames
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _attach(name):
+    """기존 공유 메모리에 연결 (POSIX에서는 독자가 종료될 때 메모리를 지우지 않도록 resource_tracker 등록 해제)"""
+    shm = shared_memory.SharedMemory(name)
+    if os.name == "posix":
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+class FrameBusReader:
+    """
+    공유 메모리 고리 버퍼 독자. VideoStream과 같은 read() / read_new() / stats() / stop()을 제공하므로
+    main.py, pipeline.py에서 VideoStream 대신 그대로 사용할 수 있습니다.
+    - sequential=False: 항상 최신 프레임 (모니터/디버거, 밀린 프레임은 건너뜀)
+    - sequential=True : 고리 버퍼에 남아 있는 한 모든 프레임을 순서대로 (녹화기)
+    - copy=True (기본): 슬롯에서 한 번 복사한 뒤 덮어써지지 않았는지 확인한 프레임 (추론처럼 오래 들고 있어도 안전)
+    - copy=False: 공유 메모리의 뷰(복사 없음). 작성자가 슬롯 수만큼 더 쓰면(30 FPS, 8슬롯 기준 약 266ms) 덮어써지므로
+      프레임 사용을 마친 뒤 valid(seq)가 False면 그 결과를 버려야 함
+    """
+
+    def __init__(self, bus_name, timeout=FRAME_BUS_ATTACH_TIMEOUT_SEC, sequential=False, copy=True):
+        self.bus_name = bus_name
+        self.sequential = sequential
+        self.copy = copy
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self.shm = _attach(shm_name(bus_name))
+                header = np.ndarray((_HEADER_FIELDS,), np.int64, self.shm.buf)
+                if header[_H_MAGIC] == _MAGIC:
+                    break
+                del header
+                self.shm.close()
+            except FileNotFoundError:
+                pass
+            if time.monotonic() > deadline:
+                raise FileNotFoundError(f"frame bus '{bus_name}' not found (python frame_bus.py serve {bus_name} ...)")
+            time.sleep(0.2)
+        shape = (int(header[_H_HEIGHT]), int(header[_H_WIDTH]), int(header[_H_CHANNELS]))
+        self.slots = int(header[_H_SLOTS])
+        del header
+        self.header, self.slot_seq, self.slot_time, self.frames = _views(self.shm.buf, shape, self.slots)
+        self.read_observer = None   # VideoStream 호환 (디코드는 캡처 서비스에서 하므로 호출하지 않음)
+        self.idle_interval = 0.0    # 부재 모드: 이 간격마다만 프레임 전달 (set_idle 참고)
+        self._last_delivery = 0.0
+        self._stopped = False
+        # 순차 모드는 연결 시점의 최신 프레임부터 (아직 하나도 안 올라왔으면 순번 1부터, 0번 빈 슬롯은 건너뜀)
+        self._consumed_seq = max(int(self.header[_H_LATEST]) - (1 if sequential else 0), 0)
+
+        # 통계
+        self.delivered = 0
+        self.dropped = 0            # 읽기 전에 덮어써져 건너뛴 프레임 수
+        self.duplicates = 0
+
+    @property
+    def stopped(self):
+        return self._stopped or bool(self.header[_H_CLOSED]) or not self._writer_alive()
+
+    def _writer_alive(self):
+        """캡처 서비스가 close() 없이 죽었는지 확인 (POSIX만, Windows에서는 종료 표시만 사용)"""
+        if os.name != "posix":
+            return True
+        try:
+            os.kill(int(self.header[_H_WRITER_PID]), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    @property
+    def seq(self):
+        return int(self.header[_H_LATEST])
+
+    @property
+    def captured(self):
+        return self.seq
+
+    def valid(self, seq):
+        """seq 프레임이 아직 덮어써지지 않았는지"""
+        return self.slot_seq[seq % self.slots] == seq
+
+    def _take(self, seq, copy):
+        """슬롯에서 seq 프레임 꺼내기 (덮어써졌으면 None)"""
+        i = seq % self.slots
+        if self.slot_seq[i] != seq:
+            return None
+        frame = self.frames[i].copy() if copy else self.frames[i]
+        timestamp = float(self.slot_time[i])
+        if self.slot_seq[i] != seq:   # 읽는 동안 작성자가 한 바퀴 돌아옴
+            return None
+        return frame, timestamp
+
+    def read_new(self, timeout=None, copy=None):
+        """
+        아직 가져가지 않은 프레임이 올 때까지 대기 후 (ret, frame, seq, timestamp) 반환 (VideoStream.read_new와 같음).
+        timeout 안에 새 프레임이 없거나 캡처 서비스가 종료되면 ret=False. copy=None이면 생성 시 설정을 따름.
+        """
+        copy = self.copy if copy is None else copy
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if self.idle_interval:
+            wake = self._last_delivery + self.idle_interval
+            if deadline is not None and wake > deadline:
+                time.sleep(max(0.0, deadline - time.monotonic()))
+                return False, None, self.seq, None
+            time.sleep(max(0.0, wake - time.monotonic()))
+        while True:
+            latest = self.seq
+            if latest > self._consumed_seq:
+                if self.sequential:
+                    # 다음 프레임이 이미 덮어써졌으면 남아 있는 가장 오래된 프레임부터
+                    seq = max(self._consumed_seq + 1, latest - self.slots + 2)
+                else:
+                    seq = latest
+                taken = self._take(seq, copy)
+                if taken is not None:
+                    if not self.idle_interval:
+                        self.dropped += seq - self._consumed_seq - 1
+                    self._consumed_seq = seq
+                    self.delivered += 1
+                    self._last_delivery = time.monotonic()
+                    return True, taken[0], seq, taken[1]
+                continue  # 읽는 도중 덮어써짐 → 다시 시도
+            if self.stopped or (deadline is not None and time.monotonic() >= deadline):
+                return False, None, latest, None
+            time.sleep(FRAME_BUS_POLL_SEC)
+
+    def read(self):
+        """현재(최신) 프레임 반환 (새 프레임이 아니어도 반환, VideoStream.read 호환)"""
+        seq = self.seq
+        if seq == self._consumed_seq:
+            self.duplicates += 1
+        taken = self._take(seq, self.copy) if seq else None
+        if taken is None:
+            return False, None
+        self._consumed_seq = max(self._consumed_seq, seq)
+        return True, taken[0]
+
+    def set_idle(self, interval):
+        """
+        부재 모드 설정 (VideoStream.set_idle 호환). 디코드는 캡처 서비스가 모든 좌석을 위해 계속 하므로
+        이 독자는 interval마다 최신 프레임 하나만 가져감 (중간 프레임은 dropped로 집계되지 않음).
+        """
+        self.idle_interval = interval
+
+    def stats(self):
+        return {"captured": self.captured, "consumed_seq": self._consumed_seq,
+                "dropped": self.dropped, "duplicates": self.duplicates}
+
+    def stop(self):
+        """독자 연결 해제 (공유 메모리는 캡처 서비스가 지움)"""
+        if self._stopped:
+            return
+        self._stopped = True
+        del self.header, self.slot_seq, self.slot_time, self.frames
+        self.shm.close()
+
+
+def open_stream(src):
+    """
+    src가 "bus:<이름>"이면 공유 메모리 독자, 아니면 카메라/RTSP/파일을 직접 여는 VideoStream (둘 다 시작된 상태로 반환).
+    """
+    if isinstance(src, str) and src.startswith(BUS_PREFIX):
+        return FrameBusReader(src[len(BUS_PREFIX):])
+    from video_stream import VideoStream
+    return VideoStream(src).start()
+
+
+# === 캡처 서비스 / 녹화기 ===
+def serve(bus_name, source, slots=FRAME_BUS_SLOTS):
+    """source를 한 번만 디코딩해서 bus_name 공유 메모리에 계속 올림 (Ctrl+C로 종료)"""
+    from video_stream import VideoStream, parse_source
+
+    source = parse_source(source)
+    cap = VideoStream(source).start()
+    if cap.stopped:
+        return
+    writer = None
+    started = time.monotonic()
+    try:
+        while True:
+            ret, frame, _, timestamp = cap.read_new(timeout=FRAME_WAIT_TIMEOUT_SEC)
+            if not ret or frame is None:
+                if cap.stopped:
+                    break  # 동영상 파일 끝 또는 스트림 끊김 (VideoStream이 판단해서 stopped로 바꿈)
+                continue
+            if writer is None:
+                writer = FrameBusWriter(bus_name, frame.shape, slots)
+                print(f"📡 frame bus '{bus_name}' ready: {frame.shape[1]}x{frame.shape[0]}, {slots} slots "
+                      f"(attach with bus:{bus_name})")
+            writer.publish(frame, timestamp)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cap.stop()
+        if writer is not None:
+            elapsed = time.monotonic() - started
+            print(f"📡 published {writer.seq} frames ({writer.seq / max(elapsed, 1e-6):.1f} FPS), "
+                  f"capture dropped={cap.dropped}")
+            writer.close()
+
+
+def record(bus_name, output, fps=None):
+    """버스의 프레임을 순서대로 동영상 파일에 기록 (밀리면 덮어써진 프레임은 건너뜀, Ctrl+C로 종료)"""
+    import cv2
+
+    reader = FrameBusReader(bus_name, sequential=True)
+    writer = None
+    frames = 0
+    first_time = None
+    try:
+        while True:
+            ret, frame, seq, timestamp = reader.read_new(timeout=FRAME_WAIT_TIMEOUT_SEC)
+            if not ret:
+                if reader.stopped:
+                    break
+                continue
+            if writer is None:
+                writer = cv2.VideoWriter(str(output), cv2.VideoWriter_fourcc(*"mp4v"), fps or 15.0,
+                                         (frame.shape[1], frame.shape[0]))
+                first_time = timestamp
+            writer.write(frame)
+            frames += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if writer is not None:
+            writer.release()
+        reader.stop()
+        print(f"🎥 recorded {frames} frames to {output} (skipped {reader.dropped})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="공유 메모리 프레임 버스 (카메라 1대를 여러 프로그램이 함께 사용)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_serve = sub.add_parser("serve", help="카메라를 디코딩해서 버스에 올리기")
+    p_serve.add_argument("name", help="버스 이름 (독자는 bus:<이름>으로 연결)")
+    p_serve.add_argument("--source", required=True, help="RTSP URL, 동영상 파일 또는 카메라 번호")
+    p_serve.add_argument("--slots", type=int, default=FRAME_BUS_SLOTS, help="고리 버퍼 슬롯 수")
+    p_record = sub.add_parser("record", help="버스의 프레임을 동영상 파일로 기록")
+    p_record.add_argument("name", help="버스 이름")
+    p_record.add_argument("output", help="출력 파일 (.mp4)")
+    p_record.add_argument("--fps", type=float, default=None, help="출력 FPS (기본 15)")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.name, args.source, args.slots)
+    else:
+        record(args.name, args.output, args.fps)
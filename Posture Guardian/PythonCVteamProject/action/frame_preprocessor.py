@@ -0,0 +1,66 @@
+# frame_preprocessor.py
+# 목적: 프레임 전처리(좌우반전 → 리사이즈 → RGB 변환)를 미리 할당한 버퍼에 수행해 매 프레임 메모리 할당 제거
+# Workflow: FramePreprocessor 생성 → process(frame)로 (BGR, RGB) 버퍼 반환 (OpenCV dst 인자로 버퍼 재사용)
+#           → 스트림이 이미 목표 크기면 리사이즈 생략 → stats()로 할당 횟수/리사이즈 생략 횟수 확인
+
+import cv2
+import numpy as np
+
+from config import FRAME_WIDTH, FRAME_HEIGHT, PREPROCESS_BUFFERS
+
+
+def legacy_preprocess(frame, width=FRAME_WIDTH, height=FRAME_HEIGHT):
+    """이전 방식: 호출마다 새 배열 3개 할당 (flip → resize → cvtColor), 벤치마크 비교용"""
+    frame = cv2.flip(frame, 1)
+    frame = cv2.resize(frame, (width, height))
+    image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    return frame, image_rgb
+
+
+class FramePreprocessor:
+    """
+    미리 할당한 출력 버퍼를 돌려 쓰는 전처리기.
+    - 리사이즈를 먼저 하고 좌우반전은 작은 프레임에서 수행 (원본 해상도 전체를 반전하지 않음)
+    - 입력이 이미 목표 크기면 리사이즈 없이 반전 + 색 변환 2번만 수행
+    - buffers: 버퍼 세트 개수. 반환된 프레임은 buffers번 뒤의 process() 호출 때 덮어써지므로,
+      여러 프레임을 동시에 들고 있는 소비자(파이프라인 모드 등)는 그 이상으로 설정해야 함
+    """
+
+    def __init__(self, width=FRAME_WIDTH, height=FRAME_HEIGHT, buffers=PREPROCESS_BUFFERS):
+        self.width = width
+        self.height = height
+        self.allocations = 0
+        self._ring = [self._allocate() for _ in range(buffers)]
+        self._index = 0
+
+        # 통계
+        self.frames = 0
+        self.resize_skipped = 0
+
+    def _allocate(self):
+        """버퍼 세트 (리사이즈 결과, 반전된 BGR, RGB) 할당"""
+        self.allocations += 3
+        shape = (self.height, self.width, 3)
+        return [np.empty(shape, np.uint8), np.empty(shape, np.uint8), np.empty(shape, np.uint8)]
+
+    def process(self, frame):
+        """좌우반전 + 리사이즈 + RGB 변환 결과 (BGR 프레임, RGB 이미지) 반환 (버퍼 재사용)"""
+        resized, bgr, rgb = self._ring[self._index]
+        self._index = (self._index + 1) % len(self._ring)
+        self.frames += 1
+
+        if frame.shape[0] == self.height and frame.shape[1] == self.width:
+            self.resize_skipped += 1
+            source = frame
+        else:
+            cv2.resize(frame, (self.width, self.height), dst=resized)
+            source = resized
+
+        cv2.flip(source, 1, dst=bgr)
+        cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=rgb)
+        return bgr, rgb
+
+    def stats(self):
+        """버퍼 할당 횟수 / 리사이즈 생략 횟수"""
+        return {"frames": self.frames, "allocations": self.allocations,
+                "buffers": len(self._ring), "resize_skipped": self.resize_skipped}
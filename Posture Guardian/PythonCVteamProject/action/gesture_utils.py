@@ -1,57 +1,116 @@
 # gesture_utils.py
-# 목적: MediaPipe Hands를 이용해 손 제스처(주먹, 손바닥) 인식
-# Workflow: get_distance()로 거리 계산 → is_fist(), is_palm()으로 제스처 판별
+# 목적: MediaPipe Hands 결과로 손 제스처(손바닥, 브이, 주먹) 인식
+# Workflow: hands_to_array()로 감지된 모든 손을 (n_hands, 21, 3) 배열로 한 번 변환
+#           → classify_hands()로 모든 손 × 모든 제스처를 한 번의 벡터 연산으로 판정 (제스처별 여유값 margin 포함)
+#           → detect_gesture()로 여유값이 가장 큰 손의 제스처 선택
+#           (손 1개만 판정하는 기존 is_palm / is_victory도 gesture_margins 위의 래퍼로 유지)
+#
+# margin: 제스처 조건 중 가장 아슬아슬한 조건이 얼마나 여유 있게 충족됐는지 (손 크기로 나눈 값, 0보다 크면 충족)
 
-import math
-import mediapipe as mp
+import numpy as np
 
-mp_hands = mp.solutions.hands
+from config import GESTURE_MIN_MARGIN
 
-def get_distance(p1, p2):
-    """두 랜드마크 사이의 거리 계산"""
-    return math.sqrt((p1.x - p2.x)**2 + (p1.y - p2.y)**2)
+# MediaPipe Hands 랜드마크 인덱스 (mp.solutions.hands.HandLandmark와 동일)
+NUM_HAND_LANDMARKS = 21
+WRIST = 0
+MIDDLE_FINGER_MCP = 9
+FINGER_TIPS = [8, 12, 16, 20]   # 검지, 중지, 약지, 새끼 끝
+FINGER_PIPS = [6, 10, 14, 18]   # 검지, 중지, 약지, 새끼 둘째 마디
 
-def is_victory(hand_landmarks):
-    """검지와 중지가 펴져 있고, 나머지 손가락은 접혀 있으면 Victory(V)"""
-    try:
-        wrist = hand_landmarks.landmark[mp_hands.HandLandmark.WRIST]
-        index_tip = hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP]
-        index_pip = hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_PIP]
-        middle_tip = hand_landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_TIP]
-        middle_pip = hand_landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_PIP]
-        ring_tip = hand_landmarks.landmark[mp_hands.HandLandmark.RING_FINGER_TIP]
-        ring_pip = hand_landmarks.landmark[mp_hands.HandLandmark.RING_FINGER_PIP]
-
-        pinky_tip = hand_landmarks.landmark[mp_hands.HandLandmark.PINKY_TIP]
-        pinky_pip = hand_landmarks.landmark[mp_hands.HandLandmark.PINKY_PIP]
-
-        # ✅ 판별 규칙
-        index_extended = index_tip.y < index_pip.y
-        middle_extended = middle_tip.y < middle_pip.y
-        ring_folded = ring_tip.y > ring_pip.y
-        pinky_folded = pinky_tip.y > pinky_pip.y
-        return index_extended and middle_extended and ring_folded and pinky_folded
-    except:
-        return False
-
-def is_palm(hand_landmarks):
-    """손가락이 모두 펴져 있으면 손바닥"""
+# 판정 순서 (여러 제스처 조건을 동시에 만족하면 앞쪽 우선)
+GESTURES = ["PALM", "VICTORY", "FIST"]
+
+# gesture_margins에서 한 번에 꺼내는 랜드마크: 손목, 손가락 끝 4, 둘째 마디 4, 중지 뿌리
+_MARGIN_POINTS = np.array([WRIST] + FINGER_TIPS + FINGER_PIPS + [MIDDLE_FINGER_MCP])
+_VICTORY_SIGN = np.array([1.0, 1.0, -1.0, -1.0])   # 검지/중지는 위, 약지/새끼는 아래
+
+
+def hands_to_array(hand_landmarks_list):
+    """MediaPipe 손 랜드마크 목록 → (n_hands, 21, 3) float32 배열 [x, y, z] (튜플 목록을 모아 배열 1번 생성)"""
+    values = [(lm.x, lm.y, lm.z) for hand_landmarks in hand_landmarks_list for lm in hand_landmarks.landmark]
+    return np.array(values, dtype=np.float32).reshape(len(hand_landmarks_list), NUM_HAND_LANDMARKS, 3)
+
+
+def gesture_margins(hands):
+    """
+    (n_hands, 21, 3) 배열 → (n_hands, len(GESTURES)) 제스처별 여유값.
+    - PALM   : 네 손가락 모두 끝이 둘째 마디보다 손목에서 멀리 있음 (펴짐)
+    - VICTORY: 검지/중지 끝이 둘째 마디보다 위, 약지/새끼 끝은 아래
+    - FIST   : 네 손가락 모두 끝이 둘째 마디보다 손목에 가까움 (접힘)
+    """
+    xy = np.asarray(hands)[:, _MARGIN_POINTS, :2]
+    vectors = xy[:, 1:] - xy[:, :1]                           # 손목 → 손가락 끝 4 / 둘째 마디 4 / 중지 뿌리
+    dist = np.sqrt(np.einsum("nkj,nkj->nk", vectors, vectors))
+    extended = dist[:, 0:4] - dist[:, 4:8]                    # > 0 이면 펴짐
+    raised = vectors[:, 4:8, 1] - vectors[:, 0:4, 1]          # > 0 이면 끝이 마디보다 위 (화면 y축은 아래 방향)
+
+    # 조건별 부호를 맞춰 한 배열로 모은 뒤 제스처별 최솟값 = 가장 아슬아슬한 조건의 여유값
+    conditions = np.concatenate([extended, raised * _VICTORY_SIGN, -extended], axis=1).reshape(-1, len(GESTURES), 4)
+    # 손 크기(손목 → 중지 뿌리)로 나눠서 카메라 거리와 무관한 값으로 만듦
+    return conditions.min(axis=2) / np.maximum(dist[:, 8:9], 1e-6)
+
+
+def classify_hands(hands, min_margin=GESTURE_MIN_MARGIN):
+    """
+    모든 손의 제스처 판정.
+    반환: (손별 제스처 이름 목록 (인식 못 하면 None), 손별 선택된 제스처의 여유값 (n_hands,))
+    """
+    margins = gesture_margins(hands)
+    labels, chosen = [], []
+    for hand_margins in margins.tolist():
+        # 조건을 만족한 첫 번째 제스처 (GESTURES 순서), 없으면 가장 가까웠던 제스처의 여유값
+        index = next((i for i, m in enumerate(hand_margins) if m > min_margin), None)
+        labels.append(None if index is None else GESTURES[index])
+        chosen.append(max(hand_margins) if index is None else hand_margins[index])
+    return labels, np.array(chosen)
+
+
+def detect_gesture(hand_landmarks_list, min_margin=GESTURE_MIN_MARGIN):
+    """감지된 모든 손 중 여유값이 가장 큰 제스처 (이름, 여유값). 없으면 (None, 0.0)"""
+    if not hand_landmarks_list:
+        return None, 0.0
+    labels, margins = classify_hands(hands_to_array(hand_landmarks_list), min_margin)
+    best = (None, 0.0)
+    for label, margin in zip(labels, margins.tolist()):
+        if label is not None and (best[0] is None or margin > best[1]):
+            best = (label, margin)
+    return best
+
+
+# === 기존 API (손 1개 판정, gesture_margins 위의 얇은 래퍼) ===
+def _has_gesture(hand_landmarks, gesture, min_margin):
     try:
-        wrist = hand_landmarks.landmark[mp_hands.HandLandmark.WRIST]
-        index_tip = hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP]
-        index_pip = hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_PIP]
-        middle_tip = hand_landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_TIP]
-        middle_pip = hand_landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_PIP]
-        ring_tip = hand_landmarks.landmark[mp_hands.HandLandmark.RING_FINGER_TIP]
-        ring_pip = hand_landmarks.landmark[mp_hands.HandLandmark.RING_FINGER_PIP]
-        pinky_tip = hand_landmarks.landmark[mp_hands.HandLandmark.PINKY_TIP]
-        pinky_pip = hand_landmarks.landmark[mp_hands.HandLandmark.PINKY_PIP]
-
-        return (
-            get_distance(index_tip, wrist) > get_distance(index_pip, wrist) and
-            get_distance(middle_tip, wrist) > get_distance(middle_pip, wrist) and
-            get_distance(ring_tip, wrist) > get_distance(ring_pip, wrist) and
-            get_distance(pinky_tip, wrist) > get_distance(pinky_pip, wrist)
-        )
-    except:
-        return False
\ No newline at end of file
+        margins = gesture_margins(hands_to_array([hand_landmarks]))
+    except (AttributeError, IndexError, TypeError, ValueError):
+        return False  # 랜드마크가 없거나 형식이 다르면 이전처럼 False
+    return bool(margins[0, GESTURES.index(gesture)] > min_margin)
+
+
+def is_palm(hand_landmarks, min_margin=0.0):
+    """손가락이 모두 펴져 있으면 손바닥 (min_margin=0이면 이전 is_palm과 같은 조건)"""
+    return _has_gesture(hand_landmarks, "PALM", min_margin)
+
+
+def is_victory(hand_landmarks, min_margin=0.0):
+    """검지/중지 끝은 둘째 마디보다 위, 약지/새끼 끝은 아래면 브이 (min_margin=0이면 이전 is_victory와 같은 조건)"""
+    return _has_gesture(hand_landmarks, "VICTORY", min_margin)
+
+
+# === 이전 방식 (손 1개씩 랜드마크 객체로 판정, 벤치마크 비교용) ===
+def legacy_gesture(hand_landmarks):
+    """이전 is_palm → is_victory 순서 판정과 같은 결과 (랜드마크 객체 접근 + math.sqrt 반복)"""
+    import math
+
+    def distance(p1, p2):
+        return math.sqrt((p1.x - p2.x)**2 + (p1.y - p2.y)**2)
+
+    lm = hand_landmarks.landmark
+    wrist = lm[WRIST]
+    tips = [lm[i] for i in FINGER_TIPS]
+    pips = [lm[i] for i in FINGER_PIPS]
+    if all(distance(t, wrist) > distance(p, wrist) for t, p in zip(tips, pips)):
+        return "PALM"
+    if tips[0].y < pips[0].y and tips[1].y < pips[1].y and tips[2].y > pips[2].y and tips[3].y > pips[3].y:
+        return "VICTORY"
+    return None
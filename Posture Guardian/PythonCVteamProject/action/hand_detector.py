@@ -0,0 +1,128 @@
+# hand_detector.py
+# 목적: Stage 2/3의 손 제스처 인식 비용 절감 (필요할 때만, 손 주변 영역에서만 hands.process 실행)
+# Workflow: 포즈 랜드마크로 손목이 어깨 근처 이상 올라왔는지 확인(cue) → 손 주변 ROI만 잘라 Hands 추론
+#           → 손 랜드마크를 전체 프레임 정규화 좌표로 되돌림 → Stage 1로 돌아가면 Hands 모델 해제
+
+import numpy as np
+import mediapipe as mp
+
+from config import (
+    HANDS_MAX_NUM_HANDS,
+    HANDS_MIN_DETECTION_CONFIDENCE,
+    HANDS_MIN_TRACKING_CONFIDENCE,
+    HAND_CUE_MARGIN,
+    HAND_ROI_SCALE,
+    HAND_ROI_MIN_SIZE,
+    VISIBILITY_THRESHOLD,
+)
+from posture_analysis import (
+    LEFT_SHOULDER, RIGHT_SHOULDER,
+    LEFT_ELBOW, RIGHT_ELBOW,
+    LEFT_WRIST, RIGHT_WRIST,
+)
+from roi_tracker import remap_landmarks
+
+mp_hands = mp.solutions.hands
+
+# (손목, 팔꿈치) 쌍: 팔꿈치→손목 방향으로 손바닥이 있다고 보고 ROI 중심을 잡음
+ARMS = [(LEFT_WRIST, LEFT_ELBOW), (RIGHT_WRIST, RIGHT_ELBOW)]
+
+
+class HandGestureDetector:
+    """
+    포즈 랜드마크를 단서로 손 추론 여부를 결정하고, Hands 모델을 필요할 때만 생성하는 클래스.
+    - 손목이 어깨선(+여유값)보다 위에 있을 때만 추론 (제스처는 손을 들어야 보이므로)
+    - 전체 960×540 대신 손 주변 정사각형 ROI만 Hands 모델에 입력
+    """
+
+    def __init__(self):
+        self.hands = None   # 처음 필요할 때 생성 (Stage 1에서는 만들지 않음)
+
+        # 통계
+        self.frames = 0
+        self.inferred = 0
+        self.gated_out = 0  # 손을 들지 않아 추론을 건너뛴 프레임
+
+    @property
+    def active(self):
+        """Hands 모델이 현재 메모리에 올라와 있는지 여부"""
+        return self.hands is not None
+
+    def _ensure_model(self):
+        if self.hands is None:
+            # 손 ROI는 프레임마다 위치/크기가 바뀌므로 이전 프레임 좌표를 이어 쓰는 추적 모드 대신 매번 검출
+            self.hands = mp_hands.Hands(
+                static_image_mode=True,
+                max_num_hands=HANDS_MAX_NUM_HANDS,
+                min_detection_confidence=HANDS_MIN_DETECTION_CONFIDENCE,
+                min_tracking_confidence=HANDS_MIN_TRACKING_CONFIDENCE
+            )
+        return self.hands
+
+    def release(self):
+        """Hands 모델 해제 (Stage 1로 돌아갈 때 / 종료 시)"""
+        if self.hands is not None:
+            self.hands.close()
+            self.hands = None
+
+    def hand_roi(self, landmarks, frame_w, frame_h):
+        """
+        들어 올린 손 주변 ROI (x0, y0, x1, y1) 픽셀 좌표 반환. 손을 들지 않았으면 None.
+        - landmarks: (33, 4) 포즈 랜드마크 배열
+        """
+        if landmarks is None:
+            return None
+        shoulder_y = min(landmarks[LEFT_SHOULDER, 1], landmarks[RIGHT_SHOULDER, 1])
+        shoulder_w = abs(landmarks[LEFT_SHOULDER, 0] - landmarks[RIGHT_SHOULDER, 0]) * frame_w
+        half = max(HAND_ROI_MIN_SIZE, HAND_ROI_SCALE * shoulder_w) / 2
+
+        boxes = []
+        for wrist, elbow in ARMS:
+            if landmarks[wrist, 3] < VISIBILITY_THRESHOLD:
+                continue
+            if landmarks[wrist, 1] > shoulder_y + HAND_CUE_MARGIN:
+                continue
+            # 팔꿈치→손목 방향으로 절반만큼 더 나간 지점을 손 중심으로 사용
+            cx = (1.5 * landmarks[wrist, 0] - 0.5 * landmarks[elbow, 0]) * frame_w
+            cy = (1.5 * landmarks[wrist, 1] - 0.5 * landmarks[elbow, 1]) * frame_h
+            boxes.append((cx - half, cy - half, cx + half, cy + half))
+
+        if not boxes:
+            return None
+        # 두 손을 모두 들었으면 두 ROI를 합쳐서 한 번만 추론
+        x0 = int(max(0, min(b[0] for b in boxes)))
+        y0 = int(max(0, min(b[1] for b in boxes)))
+        x1 = int(min(frame_w, max(b[2] for b in boxes)))
+        y1 = int(min(frame_h, max(b[3] for b in boxes)))
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+        return x0, y0, x1, y1
+
+    def detect(self, image_rgb, landmarks):
+        """
+        손 랜드마크 목록 반환 (전체 프레임 기준 정규화 좌표). 손을 들지 않았으면 빈 목록.
+        - image_rgb: 전체 RGB 프레임
+        - landmarks: (33, 4) 포즈 랜드마크 배열 (없으면 None)
+        """
+        self.frames += 1
+        frame_h, frame_w = image_rgb.shape[:2]
+        roi = self.hand_roi(landmarks, frame_w, frame_h)
+        if roi is None:
+            self.gated_out += 1
+            return []
+
+        x0, y0, x1, y1 = roi
+        crop = np.ascontiguousarray(image_rgb[y0:y1, x0:x1])
+        hand_results = self._ensure_model().process(crop)
+        self.inferred += 1
+        if not hand_results.multi_hand_landmarks:
+            return []
+
+        # ROI 정규화 좌표 → 전체 프레임 정규화 좌표
+        for hand_landmarks in hand_results.multi_hand_landmarks:
+            remap_landmarks(hand_landmarks, roi, frame_w, frame_h)
+        return list(hand_results.multi_hand_landmarks)
+
+    def stats(self):
+        """손 추론 실행/생략 횟수"""
+        return {"frames": self.frames, "inferred": self.inferred, "gated_out": self.gated_out}
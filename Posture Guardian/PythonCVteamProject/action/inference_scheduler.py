@@ -0,0 +1,121 @@
+# inference_scheduler.py
+# 목적: 움직임이 없거나 사람이 없을 때 pose.process() 호출을 건너뛰어 CPU 사용량 절감
+# Workflow: 프레임마다 should_infer()로 판단 (축소 흑백 프레임 차이 비교) → 추론했으면 record_inference()로 결과 보고
+#           → 건너뛴 프레임은 PostureEngine이 마지막 랜드마크를 재사용 → stats()로 건너뛴 횟수/절감 시간 확인
+
+import cv2
+
+from config import (
+    MOTION_DOWNSCALE_SIZE,
+    MOTION_THRESHOLD,
+    MOTION_MAX_REUSE_SEC,
+    ABSENT_AFTER_SEC,
+    ABSENT_PROBE_INTERVAL_SEC,
+    ABSENT_CAPTURE_FPS,
+)
+
+
+class InferenceScheduler:
+    """
+    프레임 차이 기반 추론 스케줄러.
+    - 마지막 추론 프레임과 현재 프레임(축소 흑백)의 평균 밝기 차이가 기준 이하이면 추론 생략
+    - 움직임이 없어도 MOTION_MAX_REUSE_SEC마다 한 번은 추론 (랜드마크가 너무 오래되지 않도록)
+    - ABSENT_AFTER_SEC 동안 사람이 감지되지 않으면 '부재' 모드: ABSENT_PROBE_INTERVAL_SEC마다만 탐색 추론
+    """
+
+    def __init__(self, motion_threshold=MOTION_THRESHOLD, max_reuse_sec=MOTION_MAX_REUSE_SEC,
+                 absent_after_sec=ABSENT_AFTER_SEC, probe_interval_sec=ABSENT_PROBE_INTERVAL_SEC,
+                 downscale_size=MOTION_DOWNSCALE_SIZE):
+        self.motion_threshold = motion_threshold
+        self.max_reuse_sec = max_reuse_sec
+        self.absent_after_sec = absent_after_sec
+        self.probe_interval_sec = probe_interval_sec
+        self.downscale_size = downscale_size
+
+        self._small = None                 # 현재 프레임의 축소 흑백 이미지 (재사용 버퍼)
+        self._reference = None             # 마지막 추론 프레임의 축소 흑백 이미지
+        self._diff = None
+        self._first_time = None            # 첫 프레임 시각
+        self.last_inference_time = None
+        self.last_seen_time = None         # 마지막으로 사람이 감지된 시각
+        self.last_motion = 0.0
+
+        # 통계
+        self.frames = 0
+        self.inferred = 0
+        self.skipped_still = 0             # 움직임이 없어 건너뜀
+        self.skipped_absent = 0            # 부재 모드라서 건너뜀
+        self.inference_sec_total = 0.0     # 실제 추론에 쓴 시간 합계
+
+    @property
+    def absent(self):
+        """사람이 ABSENT_AFTER_SEC 이상 감지되지 않은 상태인지 여부"""
+        if self.last_inference_time is None:
+            return False
+        reference = self.last_seen_time if self.last_seen_time is not None else self._first_time
+        return self.last_inference_time - reference >= self.absent_after_sec
+
+    def _motion_level(self, frame):
+        """축소 흑백 프레임으로 마지막 추론 프레임 대비 평균 밝기 차이(0~255) 계산"""
+        resized = cv2.resize(frame, self.downscale_size, interpolation=cv2.INTER_AREA)
+        self._small = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY, dst=self._small)
+        if self._reference is None:
+            return float("inf")
+        self._diff = cv2.absdiff(self._small, self._reference, dst=self._diff)
+        return float(cv2.mean(self._diff)[0])
+
+    def should_infer(self, frame, timestamp):
+        """이번 프레임에서 pose.process()를 실행해야 하는지 판단"""
+        self.frames += 1
+        if self.last_inference_time is None:
+            self._first_time = timestamp
+            self._motion_level(frame)
+            return True
+
+        self.last_motion = self._motion_level(frame)
+        since_last = timestamp - self.last_inference_time
+
+        if self.absent:
+            # 부재 모드: 큰 움직임(사람 등장)이 있거나 탐색 주기가 되었을 때만 추론
+            if self.last_motion > self.motion_threshold or since_last >= self.probe_interval_sec:
+                return True
+            self.skipped_absent += 1
+            return False
+
+        if self.last_motion > self.motion_threshold or since_last >= self.max_reuse_sec:
+            return True
+        self.skipped_still += 1
+        return False
+
+    def record_inference(self, timestamp, person_present, inference_sec):
+        """추론 실행 후 호출: 기준 프레임 갱신, 사람 감지 여부/추론 시간 기록"""
+        self.inferred += 1
+        self.inference_sec_total += inference_sec
+        self.last_inference_time = timestamp
+        if person_present:
+            self.last_seen_time = timestamp
+        if self._small is not None:
+            if self._reference is None:
+                self._reference = self._small.copy()
+            else:
+                self._reference[...] = self._small
+
+    def idle_delay(self):
+        """부재 모드일 때 다음 프레임을 가져오기 전 대기할 시간(초) (캡처/루프 속도 제한용)"""
+        if self.absent:
+            return 1.0 / ABSENT_CAPTURE_FPS
+        return 0.0
+
+    def stats(self):
+        """건너뛴 횟수와 추정 절감 시간 (건너뛴 프레임 수 × 평균 추론 시간)"""
+        avg_inference = self.inference_sec_total / self.inferred if self.inferred else 0.0
+        skipped = self.skipped_still + self.skipped_absent
+        return {
+            "frames": self.frames,
+            "inferred": self.inferred,
+            "skipped_still": self.skipped_still,
+            "skipped_absent": self.skipped_absent,
+            "skip_ratio": round(skipped / self.frames, 3) if self.frames else 0.0,
+            "avg_inference_ms": round(avg_inference * 1000, 2),
+            "saved_sec": round(skipped * avg_inference, 2),
+        }
@@ -0,0 +1,187 @@
+# landmark_filter.py
+# 목적: 포즈 추론(pose.process)은 낮은 주기로만 실행하고, 그 사이 프레임은 랜드마크를 예측해서
+#       자세 분석/화면 표시를 카메라 속도로 유지 (Stage 3 타이머는 매끄러운 랜드마크 궤적만 있으면 충분)
+# Workflow: 추론한 프레임마다 LandmarkPredictor.update()로 One Euro 필터 갱신 (33개 랜드마크를 한 번에 벡터 연산)
+#           → 추론하지 않은 프레임은 predict(t)로 필터 속도를 이용해 현재 위치 외삽
+#           → evaluate_prediction() / CLI로 녹화된 trace에서 매 프레임 추론 대비 각도 오차 측정
+#
+# 사용 예 (trace는 매 프레임 추론으로 기록해야 비교 기준이 됨: main.py --trace --no-motion-gate):
+#   python landmark_filter.py ../traces/default --fps 5 10 15
+
+import argparse
+import math
+
+import numpy as np
+
+from config import (
+    LANDMARK_FILTER_MIN_CUTOFF,
+    LANDMARK_FILTER_BETA,
+    LANDMARK_FILTER_D_CUTOFF,
+    LANDMARK_PREDICTION_MAX_SEC,
+)
+from posture_analysis import compute_posture_metrics
+
+
+def _smoothing_factor(dt, cutoff):
+    """One Euro 필터의 지수 평활 계수 (cutoff는 스칼라 또는 랜드마크별 배열)"""
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+def write_landmarks(landmark_list, landmarks):
+    """(33, 4) 배열의 x, y, z 값을 MediaPipe 랜드마크 목록에 써넣기 (제자리 수정, 그리기용)"""
+    for lm, (x, y, z, _) in zip(landmark_list.landmark, landmarks.tolist()):
+        lm.x, lm.y, lm.z = x, y, z
+    return landmark_list
+
+
+class LandmarkPredictor:
+    """
+    33개 포즈 랜드마크의 (x, y, z)를 한 번에 처리하는 One Euro 필터 + 등속 외삽 예측기.
+    - update(): 새 추론 결과로 필터 갱신 → 평활화된 (33, 4) 반환 (visibility는 그대로)
+    - predict(t): 마지막 필터 위치 + 필터 속도 × 경과 시간 (LANDMARK_PREDICTION_MAX_SEC 이후로는 더 외삽하지 않음)
+    """
+
+    def __init__(self, min_cutoff=LANDMARK_FILTER_MIN_CUTOFF, beta=LANDMARK_FILTER_BETA,
+                 d_cutoff=LANDMARK_FILTER_D_CUTOFF, max_horizon=LANDMARK_PREDICTION_MAX_SEC):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.max_horizon = max_horizon
+        self.reset()
+
+        # 통계
+        self.updates = 0
+        self.predictions = 0
+
+    def reset(self):
+        """사람을 놓쳤을 때 필터 상태 초기화"""
+        self._position = None     # (33, 3) 평활화된 위치
+        self._velocity = None     # (33, 3) 평활화된 속도 (정규화 좌표/초)
+        self._visibility = None   # (33,)
+        self.last_time = None
+
+    @property
+    def ready(self):
+        return self._position is not None
+
+    def update(self, landmarks, timestamp):
+        """추론 결과 (33, 4)로 필터 갱신 후 평활화된 (33, 4) 반환"""
+        position = landmarks[:, :3].astype(np.float64)
+        if self._position is None:
+            self._position = position
+            self._velocity = np.zeros_like(position)
+        else:
+            dt = timestamp - self.last_time
+            if dt > 0:
+                raw_velocity = (position - self._position) / dt
+                a_d = _smoothing_factor(dt, self.d_cutoff)
+                self._velocity = a_d * raw_velocity + (1 - a_d) * self._velocity
+                # 빠르게 움직이는 랜드마크일수록 cutoff를 높여 지연을 줄임
+                cutoff = self.min_cutoff + self.beta * np.abs(self._velocity)
+                a = _smoothing_factor(dt, cutoff)
+                self._position = a * position + (1 - a) * self._position
+        self._visibility = landmarks[:, 3].astype(np.float64)
+        self.last_time = timestamp
+        self.updates += 1
+        return self._assemble(self._position)
+
+    def predict(self, timestamp):
+        """timestamp 시점의 랜드마크 (33, 4) 예측 (update 전이면 None)"""
+        if self._position is None:
+            return None
+        horizon = min(max(timestamp - self.last_time, 0.0), self.max_horizon)
+        self.predictions += 1
+        return self._assemble(self._position + self._velocity * horizon)
+
+    def _assemble(self, position):
+        out = np.empty((position.shape[0], 4), np.float32)
+        out[:, :3] = position
+        out[:, 3] = self._visibility
+        return out
+
+    def stats(self):
+        return {"updates": self.updates, "predictions": self.predictions}
+
+
+# === 오차 측정 (녹화된 trace 사용) ===
+def simulate_low_rate(timestamps, landmarks, inference_fps, predictor=None, max_gap_sec=1.0):
+    """
+    매 프레임 추론 기록을 inference_fps로만 추론한 것처럼 재생.
+    반환: (예측 사용 랜드마크, 직전 추론 결과를 그대로 쓴 랜드마크) 각각 (frames, 33, 4)
+    """
+    predictor = predictor or LandmarkPredictor()
+    interval = 1.0 / inference_fps
+    predicted = np.empty_like(landmarks)
+    held = np.empty_like(landmarks)
+    next_due = -np.inf
+    previous_time = None
+    last_inferred = None
+    for i, t in enumerate(timestamps):
+        if previous_time is not None and t - previous_time > max_gap_sec:
+            predictor.reset()  # 기록이 끊긴 구간 (사람 없음/움직임 게이트) 이후는 새로 시작
+            next_due = -np.inf
+        previous_time = t
+        if t >= next_due:
+            predicted[i] = predictor.update(landmarks[i], t)
+            last_inferred = landmarks[i]
+            next_due = t + interval * 0.9  # 카메라 프레임 간격 오차 허용
+        else:
+            predicted[i] = predictor.predict(t)
+        held[i] = last_inferred
+    return predicted, held
+
+
+def _angle_errors(estimate, reference):
+    """자세 수치별 절대 오차 요약 (평균 / 95% / 최대)"""
+    est = compute_posture_metrics(estimate)
+    ref = compute_posture_metrics(reference)
+    report = {}
+    for name in ("neck_angle", "lean_angle", "slouch_ratio"):
+        err = np.abs(est[name] - ref[name])
+        err = err[np.isfinite(err)]
+        if not len(err):
+            continue
+        report[name] = {"mean": round(float(err.mean()), 3),
+                        "p95": round(float(np.percentile(err, 95)), 3),
+                        "max": round(float(err.max()), 3)}
+    return report
+
+
+def evaluate_prediction(trace, inference_fps_list, predictor_factory=LandmarkPredictor):
+    """
+    trace(TraceReader.read() 결과)에서 추론 주기별 각도 오차 비교.
+    반환: {fps: {"predicted": 오차 요약, "hold": 예측 없이 직전 결과 재사용 시 오차 요약}}
+    """
+    timestamps, landmarks = trace["timestamp"], trace["landmarks"]
+    results = {}
+    for fps in inference_fps_list:
+        predicted, held = simulate_low_rate(timestamps, landmarks, fps, predictor_factory())
+        results[fps] = {"predicted": _angle_errors(predicted, landmarks),
+                        "hold": _angle_errors(held, landmarks)}
+    return results
+
+
+if __name__ == "__main__":
+    from trace_recorder import TraceReader
+
+    parser = argparse.ArgumentParser(description="낮은 추론 주기 + 랜드마크 예측의 각도 오차 측정 (매 프레임 추론 trace 기준)")
+    parser.add_argument("trace_dir", help="trace_recorder 기록 디렉터리 (예: traces/default)")
+    parser.add_argument("--fps", type=float, nargs="+", default=[5, 10, 15], help="비교할 추론 주기")
+    parser.add_argument("--start", type=float, default=None, help="구간 시작 (time.time() 기준 초)")
+    parser.add_argument("--end", type=float, default=None, help="구간 끝 (time.time() 기준 초)")
+    args = parser.parse_args()
+
+    trace = TraceReader(args.trace_dir).read(args.start, args.end)
+    if not len(trace["timestamp"]):
+        print("⚠️ 기록된 프레임이 없습니다.")
+    else:
+        duration = trace["timestamp"][-1] - trace["timestamp"][0]
+        print(f"📊 {len(trace['timestamp'])} frames, {duration:.1f}s "
+              f"({len(trace['timestamp']) / max(duration, 1e-6):.1f} FPS recorded)")
+        for fps, report in evaluate_prediction(trace, args.fps).items():
+            print(f"\n▶ inference at {fps:g} FPS")
+            for mode in ("predicted", "hold"):
+                line = ", ".join(f"{name} mean={e['mean']} p95={e['p95']} max={e['max']}"
+                                 for name, e in report[mode].items())
+                print(f"   {mode:<9} {line}")
@@ -0,0 +1,365 @@
+# live_api.py
+# 목적: 실행 중인 좌석의 현재 상태(Stage, 자세 각도, 경고, 안내 메시지)를 대시보드에 제공하는 내장 asyncio 서버
+#       GET /state → 최신 상태 JSON 1개 / GET /ws → WebSocket으로 프레임마다(또는 ?hz=N 주기로) 상태 전송
+# Workflow: 메인 루프가 publish(result)로 최신 PostureResult 참조만 바꿔 둠 (잠금/대기 없음, 프레임 처리에 영향 없음)
+#           → 서버 스레드의 asyncio 루프가 LIVE_API_MAX_HZ 주기로 새 결과가 있는지 확인 → JSON을 한 번만 만들어
+#           → 구독자마다 "최신 1개" 칸에 넣음 (느린 구독자는 중간 상태를 건너뛰고 다른 구독자/메인 루프를 막지 않음)
+#
+# 사용 예:
+#   python main.py --live-port 8765
+#   curl http://127.0.0.1:8765/state
+#   브라우저: new WebSocket("ws://127.0.0.1:8765/ws?hz=5")
+#   python live_api.py --url ws://127.0.0.1:8765/ws --clients 300 --seconds 10   (구독자 부하 테스트)
+
+import argparse
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import math
+import os
+import struct
+import threading
+import time
+from urllib.parse import urlsplit, parse_qs
+
+from config import LIVE_API_MAX_HZ, LIVE_API_MAX_CLIENTS, LIVE_API_MAX_FRAME_BYTES
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_STATE_FIELDS = ["neck_angle", "lean_angle", "slouch_ratio", "shoulder_tilt", "head_tilt"]
+_WS_CLOSE_TOO_BIG = 1009   # RFC 6455 close 코드: 메시지가 너무 큼
+
+
+def posture_state(result, seat_name=None, seq=0):
+    """PostureResult → JSON으로 보낼 상태 dict (계산할 수 없는 값은 null)"""
+    metrics = {}
+    for name in _STATE_FIELDS:
+        value = result.metrics.get(name)
+        if value is not None:
+            value = float(value)
+            metrics[name] = round(value, 3) if math.isfinite(value) else None
+    return {
+        "seat": seat_name,
+        "seq": seq,
+        "time": time.time(),
+        "stage": result.stage,
+        "fps": round(result.fps, 1),
+        "pose_ok": result.pose_ok,
+        "person": result.landmarks is not None,
+        "gesture": result.gesture,
+        "metrics": metrics,
+        "warnings": list(result.warnings),
+        "events": [[event, round(float(value), 3)] for event, value in result.events],
+        "messages": list(result.messages),
+        "stretch_alert": result.stretch_alert,
+    }
+
+
+# === WebSocket 프레임 (RFC 6455, 서버 → 클라이언트는 마스크 없음) ===
+def ws_frame(payload, opcode=0x1):
+    """텍스트(opcode 1) / close(8) / pong(10) 프레임 만들기"""
+    header = bytes([0x80 | opcode])
+    n = len(payload)
+    if n < 126:
+        header += bytes([n])
+    elif n < 1 << 16:
+        header += bytes([126]) + struct.pack("!H", n)
+    else:
+        header += bytes([127]) + struct.pack("!Q", n)
+    return header + payload
+
+
+class _FrameTooLarge(ValueError):
+    """클라이언트 프레임이 LIVE_API_MAX_FRAME_BYTES보다 큼 (payload는 읽지 않음)"""
+
+
+def _unmask(payload, mask):
+    """마스크 4바이트를 반복한 키와 payload 전체를 큰 정수 하나로 한 번에 XOR"""
+    n = len(payload)
+    if not n:
+        return payload
+    key = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, "little") ^ int.from_bytes(key, "little")).to_bytes(n, "little")
+
+
+async def _read_ws_frame(reader, max_bytes=LIVE_API_MAX_FRAME_BYTES):
+    """
+    클라이언트 프레임 1개 읽기 → (opcode, payload) (클라이언트 → 서버는 항상 마스크됨).
+    헤더의 길이가 max_bytes를 넘으면 payload를 읽기 전에 _FrameTooLarge (메모리를 무한정 잡지 않도록).
+    """
+    b0, b1 = await reader.readexactly(2)
+    n = b1 & 0x7F
+    if n == 126:
+        n = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif n == 127:
+        n = struct.unpack("!Q", await reader.readexactly(8))[0]
+    if n > max_bytes:
+        raise _FrameTooLarge(f"frame of {n} bytes exceeds {max_bytes}")
+    mask = await reader.readexactly(4) if b1 & 0x80 else None
+    payload = await reader.readexactly(n)
+    if mask:
+        payload = _unmask(payload, mask)
+    return b0 & 0x0F, payload
+
+
+class _Subscriber:
+    """WebSocket 구독자 1명: 보낼 최신 프레임 1개만 보관 (밀리면 이전 것은 덮어씀)"""
+
+    def __init__(self, writer, min_interval):
+        self.writer = writer
+        self.min_interval = min_interval
+        self.pending = None
+        self.ready = asyncio.Event()
+        self.last_sent = 0.0
+        self.sent = 0
+        self.skipped = 0
+
+    def offer(self, frame):
+        if self.pending is not None:
+            self.skipped += 1
+        self.pending = frame
+        self.ready.set()
+
+
+class LiveStateServer:
+    """
+    좌석 하나의 실시간 상태 서버 (asyncio 루프를 전용 스레드에서 실행).
+    - publish(result): 메인 루프에서 프레임마다 호출 (참조 1개만 바꿈)
+    - start(port) / stop()
+    """
+
+    def __init__(self, seat_name=None, max_hz=LIVE_API_MAX_HZ, max_clients=LIVE_API_MAX_CLIENTS):
+        self.seat_name = seat_name
+        self.max_hz = max_hz
+        self.max_clients = max_clients
+        self._latest = None          # (순번, PostureResult) - 메인 루프가 통째로 바꿔 끼움
+        self._published = 0
+        self._snapshot = b"{}"       # 마지막으로 만든 상태 JSON
+        self._snapshot_seq = 0
+        self._subscribers = set()
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self.address = None
+
+        # 통계
+        self.broadcasts = 0
+        self.rejected = 0
+
+    # --- 메인 루프 쪽 ---
+    def publish(self, result):
+        """최신 결과 등록 (잠금 없음: 튜플 참조 하나를 바꿔 끼우는 것뿐)"""
+        self._published += 1
+        self._latest = (self._published, result)
+
+    # --- 서버 스레드 ---
+    def start(self, port, host="127.0.0.1"):
+        """서버 스레드 시작 후 (host, port) 반환 (port=0이면 빈 포트 자동 선택)"""
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, host, port, backlog=self.max_clients))
+            self.address = self._server.sockets[0].getsockname()[:2]
+            self._loop.create_task(self._broadcast_loop())
+            started.set()
+            try:
+                self._loop.run_forever()
+            finally:
+                # 남은 연결 처리 태스크까지 모두 취소한 뒤 루프 종료
+                self._server.close()
+                tasks = asyncio.all_tasks(self._loop)
+                for task in tasks:
+                    task.cancel()
+                self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+                self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="live-api", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.address
+
+    def stop(self):
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=2.0)
+
+    def _refresh_snapshot(self):
+        """새 결과가 있으면 상태 JSON을 한 번만 만들어 두고 True 반환"""
+        latest = self._latest
+        if latest is None or latest[0] == self._snapshot_seq:
+            return False
+        seq, result = latest
+        state = posture_state(result, self.seat_name, seq)
+        self._snapshot = json.dumps(state, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._snapshot_seq = seq
+        return True
+
+    async def _broadcast_loop(self):
+        """max_hz 주기로 새 상태를 확인해 모든 구독자의 최신 칸에 넣기"""
+        interval = 1.0 / self.max_hz
+        while True:
+            await asyncio.sleep(interval)
+            if not self._subscribers or not self._refresh_snapshot():
+                continue
+            frame = ws_frame(self._snapshot)
+            self.broadcasts += 1
+            for subscriber in self._subscribers:
+                subscriber.offer(frame)
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+            if len(request_line) < 2 or request_line[0] != "GET":
+                return self._respond(writer, 405, b"method not allowed\n", "text/plain")
+            url = urlsplit(request_line[1])
+            if url.path == "/state":
+                self._refresh_snapshot()
+                return self._respond(writer, 200, self._snapshot, "application/json")
+            if url.path == "/stats":
+                return self._respond(writer, 200, json.dumps(self.stats()).encode(), "application/json")
+            if url.path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                return await self._serve_websocket(reader, writer, headers, parse_qs(url.query))
+            return self._respond(writer, 404, b"not found (/state, /ws, /stats)\n", "text/plain")
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass   # 클라이언트 연결 끊김 / 서버 종료
+        finally:
+            writer.close()
+
+    def _respond(self, writer, status, body, content_type):
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                  503: "Service Unavailable"}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(body)}\r\nAccess-Control-Allow-Origin: *\r\n"
+                     f"Connection: close\r\n\r\n".encode("latin-1") + body)
+
+    async def _serve_websocket(self, reader, writer, headers, query):
+        # 핸드셰이크(101) 전에 요청을 모두 검사 → 잘못된 요청은 400으로 끝냄
+        key = headers.get("sec-websocket-key", "")
+        try:
+            valid_key = len(base64.b64decode(key, validate=True)) == 16
+        except (binascii.Error, ValueError):
+            valid_key = False
+        if not valid_key or headers.get("sec-websocket-version") != "13":
+            return self._respond(writer, 400, b"Sec-WebSocket-Key and Sec-WebSocket-Version: 13 required\n",
+                                 "text/plain")
+        # ?hz=N: 이 구독자만 초당 N번까지 (기본: 서버 주기 = 프레임마다)
+        try:
+            hz = float(query.get("hz", [self.max_hz])[0])
+        except ValueError:
+            hz = math.nan
+        if not math.isfinite(hz) or hz <= 0:
+            return self._respond(writer, 400, b"hz must be a positive number\n", "text/plain")
+        if len(self._subscribers) >= self.max_clients:
+            self.rejected += 1
+            return self._respond(writer, 503, b"too many subscribers\n", "text/plain")
+
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        subscriber = _Subscriber(writer, 1.0 / max(min(hz, self.max_hz), 0.1))
+        self._subscribers.add(subscriber)
+        if self._snapshot_seq:
+            subscriber.offer(ws_frame(self._snapshot))   # 연결하자마자 현재 상태 1개
+        receiver = asyncio.ensure_future(self._receive(reader, subscriber))
+        try:
+            while not receiver.done():
+                await subscriber.ready.wait()
+                wait = subscriber.last_sent + subscriber.min_interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                frame, subscriber.pending = subscriber.pending, None
+                subscriber.ready.clear()
+                if frame is None:
+                    continue
+                writer.write(frame)
+                await writer.drain()   # 느린 구독자는 여기서 자기 태스크만 기다림
+                subscriber.last_sent = time.monotonic()
+                subscriber.sent += 1
+        finally:
+            self._subscribers.discard(subscriber)
+            receiver.cancel()
+
+    async def _receive(self, reader, subscriber):
+        """클라이언트 프레임 처리 (close → 종료, ping → pong, 나머지 무시)"""
+        try:
+            while True:
+                opcode, payload = await _read_ws_frame(reader)
+                if opcode == 0x8:
+                    subscriber.writer.write(ws_frame(payload[:2], 0x8))
+                    break
+                if opcode == 0x9:
+                    subscriber.writer.write(ws_frame(payload, 0xA))
+        except _FrameTooLarge:
+            subscriber.writer.write(ws_frame(struct.pack("!H", _WS_CLOSE_TOO_BIG), 0x8))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            subscriber.ready.set()   # 전송 루프를 깨워 종료
+
+    def stats(self):
+        return {"subscribers": len(self._subscribers), "published": self._published,
+                "broadcasts": self.broadcasts, "rejected": self.rejected}
+
+
+# === 부하 테스트 클라이언트 ===
+async def _load_client(host, port, path, seconds, counts):
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                 f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode())
+    status = await reader.readline()
+    if b"101" not in status:
+        counts["rejected"] += 1
+        writer.close()
+        return
+    while (await reader.readline()).strip():
+        pass
+    deadline = time.monotonic() + seconds
+    try:
+        while True:
+            b0, b1 = await asyncio.wait_for(reader.readexactly(2), max(deadline - time.monotonic(), 0.01))
+            n = b1 & 0x7F
+            if n == 126:
+                n = struct.unpack("!H", await reader.readexactly(2))[0]
+            elif n == 127:
+                n = struct.unpack("!Q", await reader.readexactly(8))[0]
+            state = json.loads(await reader.readexactly(n))
+            counts["messages"] += 1
+            counts["lag_sum"] += time.time() - state["time"]
+    except asyncio.TimeoutError:
+        pass
+    writer.close()
+
+
+async def load_test(url, clients, seconds):
+    """clients개의 WebSocket 구독자를 동시에 연결해 seconds초 동안 받은 메시지 수/지연 집계"""
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    counts = {"messages": 0, "rejected": 0, "lag_sum": 0.0}
+    await asyncio.gather(*[_load_client(parts.hostname, parts.port, path, seconds, counts) for _ in range(clients)])
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="실시간 상태 WebSocket 구독자 부하 테스트")
+    parser.add_argument("--url", default="ws://127.0.0.1:8765/ws", help="구독할 WebSocket 주소")
+    parser.add_argument("--clients", type=int, default=100, help="동시 구독자 수")
+    parser.add_argument("--seconds", type=float, default=10.0, help="측정 시간")
+    args = parser.parse_args()
+
+    counts = asyncio.run(load_test(args.url, args.clients, args.seconds))
+    accepted = args.clients - counts["rejected"]
+    print(f"📡 {accepted}/{args.clients} subscribers, {counts['messages']} messages "
+          f"({counts['messages'] / max(accepted, 1) / args.seconds:.1f}/s each), "
+          f"avg lag {counts['lag_sum'] / max(counts['messages'], 1) * 1000:.1f} ms")
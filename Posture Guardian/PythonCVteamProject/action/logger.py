@@ -1,20 +1,251 @@
 # logger.py
-# 목적: CSV 파일에 이벤트 로그 기록
-# Workflow: setup_log_file()로 초기화 → log_event()로 이벤트 기록
+# 목적: CSV 파일에 이벤트 로그 기록 (영상 처리 스레드를 막지 않도록 백그라운드 스레드에서 일괄 기록)
+# Workflow: setup_log_file()로 기록 스레드 시작 (기존 기록은 유지, 날짜/크기 기준으로 파일 교체)
+#           → log_event()/log_duration()은 큐에 넣기만 함 → 기록 스레드가 모아서 쓰고 주기적으로 flush + fsync
+#           → 같은 스레드가 분/시간/일 요약(rollups.py)도 함께 갱신
+#           → 프로그램 종료 시 close_log_files()(atexit 자동 등록)로 남은 이벤트까지 기록
 
+import atexit
 import csv
+import os
+import queue
+import threading
 from datetime import datetime
-from config import LOG_FILENAME
-
-def setup_log_file():
-    """CSV 로그 파일 초기화"""
-    with open(LOG_FILENAME, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(["timestamp", "event_type", "value"])
-
-def log_event(event_type, value):
-    """이벤트 로그 기록"""
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(LOG_FILENAME, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow([now, event_type, round(value, 2)])
\ No newline at end of file
+from pathlib import Path
+
+from config import (
+    LOG_FILENAME,
+    LOG_QUEUE_SIZE,
+    LOG_BATCH_SIZE,
+    LOG_FLUSH_INTERVAL_SEC,
+    LOG_MAX_BYTES,
+)
+from rollups import RollupStore, rollup_dir
+
+LOG_HEADER = ["timestamp", "event_type", "value"]
+
+_writers = {}                 # 로그 파일 경로 → EventLogWriter
+_writers_lock = threading.Lock()
+
+
+def rotated_filename(path, day):
+    """교체된 로그 파일 이름: posture_log.csv → posture_log_2025-11-14.csv (이미 있으면 _1, _2 ...)"""
+    path = Path(path)
+    candidate = path.with_name(f"{path.stem}_{day}{path.suffix}")
+    index = 1
+    while candidate.exists():
+        candidate = path.with_name(f"{path.stem}_{day}_{index}{path.suffix}")
+        index += 1
+    return candidate
+
+
+def log_history_files(filename):
+    """현재 로그 파일 + rotated_filename()으로 교체된 이전 파일들 (오래된 것부터, 없는 파일은 제외)"""
+    path = Path(filename)
+    history = sorted(path.parent.glob(f"{path.stem}_[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*{path.suffix}"))
+    if path.exists():
+        history.append(path)
+    return history
+
+
+class EventLogWriter:
+    """
+    이벤트 로그 전용 기록 스레드.
+    - 큐가 가득 차면 이벤트를 버리고 dropped로 집계 (영상 루프는 절대 기다리지 않음)
+    - LOG_BATCH_SIZE개씩 모아 쓰고, LOG_FLUSH_INTERVAL_SEC마다 flush + fsync
+    - 날짜가 바뀌거나 LOG_MAX_BYTES를 넘으면 기존 파일을 날짜 이름으로 바꾸고 새 파일 시작
+    - rollups=True면 rollups/<로그 이름>/ 에 분/시간/일 요약도 갱신 (os.devnull이면 생략)
+    - 디스크 오류 등으로 기록이 실패해도 스레드는 계속 동작: 못 쓴 이벤트를 보관하고 파일을 다시 열어 재시도
+    """
+
+    def __init__(self, filename, rollups=True):
+        self.path = Path(filename)
+        self.queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.dropped = 0
+        self.written = 0
+        self.errors = 0          # 기록 실패 횟수
+        self.failing = False     # 마지막 기록 시도가 실패했는지
+        self._file = None
+        self._writer = None
+        self._day = None
+        self._stopped = threading.Event()
+        self.rollups = None
+        if rollups and self.path != Path(os.devnull):
+            self.rollups = RollupStore(rollup_dir(self.path))
+        self._thread = threading.Thread(target=self._run, name=f"log-writer-{self.path.name}", daemon=True)
+        self._open()
+        self._thread.start()
+
+    # --- 파일 관리 (기록 스레드에서만 호출, _open은 시작 시 1회) ---
+    def _open(self):
+        """이어쓰기 모드로 열기 (기존 기록 유지). 파일이 지난 날짜 것이면 먼저 교체."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        today = datetime.now().strftime("%Y-%m-%d")
+        if self.path.is_file() and self.path.stat().st_size > 0:
+            file_day = datetime.fromtimestamp(self.path.stat().st_mtime).strftime("%Y-%m-%d")
+            if file_day != today:
+                os.replace(self.path, rotated_filename(self.path, file_day))
+
+        self._file = open(self.path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._day = today
+        if self._file.tell() == 0:
+            self._writer.writerow(LOG_HEADER)
+
+    def _rotate_if_needed(self, day):
+        """날짜 변경 / 최대 크기 초과 시 파일 교체"""
+        if day == self._day and self._file.tell() < LOG_MAX_BYTES:
+            return
+        if not self.path.is_file():  # os.devnull 등 일반 파일이 아니면 교체하지 않음
+            self._day = day
+            return
+        self._sync()
+        self._file.close()
+        os.replace(self.path, rotated_filename(self.path, self._day))
+        self._open()
+
+    def _sync(self):
+        """버퍼를 디스크까지 기록 (전원 차단/강제 종료 대비)"""
+        self._file.flush()
+        try:
+            os.fsync(self._file.fileno())
+        except OSError:
+            pass
+
+    def _write_batch(self, batch):
+        """batch의 이벤트를 순서대로 기록하고, 처리한 만큼 batch 앞에서 제거 (도중에 실패하면 나머지는 남음)"""
+        done = 0
+        try:
+            for kind, when, event_type, value in batch:
+                if kind == "duration":
+                    # 나쁜 자세 지속 시간은 CSV에 쓰지 않고 요약에만 반영
+                    if self.rollups is not None:
+                        self.rollups.add_duration(event_type, value, when)
+                    done += 1
+                    continue
+                timestamp = when.strftime("%Y-%m-%d %H:%M:%S")
+                self._rotate_if_needed(timestamp[:10])
+                self._writer.writerow([timestamp, event_type, round(value, 2)])
+                if self.rollups is not None:
+                    self.rollups.add_event(event_type, round(value, 2), when)
+                self.written += 1
+                done += 1
+        finally:
+            del batch[:done]
+
+    def _flush_pending(self, pending):
+        """
+        pending 이벤트 기록 + 요약 갱신. 예외가 나도 기록 스레드는 죽지 않음:
+        오류를 출력하고 파일을 닫아 두었다가 다음 주기에 다시 열어서 남은 이벤트부터 재시도.
+        """
+        try:
+            if self._file is None:
+                self._open()
+            if pending:
+                self._write_batch(pending)
+                self._sync()
+            if self.rollups is not None:
+                self.rollups.maybe_flush()
+        except Exception as e:
+            self.errors += 1
+            if not self.failing:
+                print(f"⚠️ 로그 기록 실패 ({self.path}): {e} → {LOG_FLUSH_INTERVAL_SEC:g}초마다 다시 시도")
+            self.failing = True
+            self._close_file()
+            self._stopped.wait(LOG_FLUSH_INTERVAL_SEC)  # 이벤트가 계속 들어와도 재시도는 주기마다 한 번만
+            return
+        if self.failing:
+            print(f"✅ 로그 기록 복구 ({self.path})")
+            self.failing = False
+
+    def _close_file(self):
+        """파일 닫기 (닫다가 난 오류는 무시, 다음 기록 때 _open으로 다시 열림)"""
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+        self._file = self._writer = None
+
+    def _run(self):
+        """큐에서 이벤트를 모아 일괄 기록하는 루프"""
+        pending = []   # 아직 기록하지 못한 이벤트 (기록 실패 시 다음 주기까지 보관)
+        while True:
+            try:
+                # 재시도할 이벤트가 있으면 기다리지 않음 (실패 후 대기는 _flush_pending에서 이미 함)
+                pending.append(self.queue.get(timeout=0 if pending else LOG_FLUSH_INTERVAL_SEC))
+            except queue.Empty:
+                if self._stopped.is_set() and not pending:
+                    break
+            while len(pending) < LOG_BATCH_SIZE:
+                try:
+                    pending.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if len(pending) > LOG_QUEUE_SIZE:
+                # 오래 실패하면 가장 오래된 이벤트부터 버림 (메모리가 끝없이 늘지 않도록)
+                self.dropped += len(pending) - LOG_QUEUE_SIZE
+                del pending[:len(pending) - LOG_QUEUE_SIZE]
+            stopping = self._stopped.is_set()
+            self._flush_pending(pending)
+            if stopping and self.failing:
+                break  # 종료 중에도 기록이 실패하면 남은 이벤트는 포기 (dropped로 집계)
+        self.dropped += len(pending)
+        if self._file is not None:
+            try:
+                self._sync()
+            except Exception:
+                pass
+        self._close_file()
+        if self.rollups is not None:
+            try:
+                self.rollups.flush()
+            except Exception as e:
+                print(f"⚠️ 요약 기록 실패 ({self.path}): {e}")
+
+    # --- 외부 호출용 ---
+    def put(self, event_type, value, kind="event"):
+        """이벤트를 큐에 넣기 (가득 차 있으면 버림). kind="duration"이면 value는 나쁜 자세 지속 시간(초)"""
+        try:
+            self.queue.put_nowait((kind, datetime.now(), event_type, value))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5.0):
+        """남은 이벤트를 모두 기록하고 스레드 종료"""
+        self._stopped.set()
+        self._thread.join(timeout)
+
+    def stats(self):
+        """기록/대기/누락 이벤트 수"""
+        return {"written": self.written, "pending": self.queue.qsize(), "dropped": self.dropped,
+                "errors": self.errors}
+
+
+def setup_log_file(filename=LOG_FILENAME):
+    """CSV 로그 파일 기록 스레드 시작 (기존 기록은 지우지 않고 이어씀)"""
+    with _writers_lock:
+        writer = _writers.get(filename)
+        if writer is None:
+            writer = _writers[filename] = EventLogWriter(filename)
+    return writer
+
+def log_event(event_type, value, filename=LOG_FILENAME):
+    """이벤트 로그 기록 요청 (파일 기록은 백그라운드 스레드가 수행)"""
+    writer = _writers.get(filename) or setup_log_file(filename)
+    writer.put(event_type, value)
+
+def log_duration(event_type, seconds, filename=LOG_FILENAME):
+    """경고가 난 나쁜 자세 구간이 끝났을 때 지속 시간을 요약에 반영 (CSV에는 기록하지 않음)"""
+    writer = _writers.get(filename) or setup_log_file(filename)
+    writer.put(event_type, seconds, kind="duration")
+
+def close_log_files():
+    """모든 로그 기록 스레드를 종료하고 남은 이벤트를 디스크에 기록"""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
+
+atexit.register(close_log_files)
@@ -1,35 +1,25 @@
 # main.py
 # 목적: 전체 프로그램 실행 로직 (카메라 연결 → 포즈 분석 → 제스처 인식 → 상태 머신 → 경고/로그 기록 → UI 출력)
-# Workflow: VideoStream으로 프레임 읽기 → MediaPipe Pose/Hands 처리 → posture/gesture 분석 → StateManager로 상태 관리 → logger/audio_utils 호출
+# Workflow: 카메라 연결(별도 스레드)과 동시에 MediaPipe 로드 + 빈 프레임으로 warm-up
+#           → VideoStream으로 프레임 읽기 → PostureEngine.process()로 Pose/Hands 처리 및 Stage 상태 머신 실행
+#           → (헤드리스가 아니면) PostureRenderer로 그리기 → cv2.imshow
 import warnings
 warnings.filterwarnings("ignore") # 라이브러리 내부 경고문 무시 (출력하지 않음)
-import cv2, time, numpy as np
-import mediapipe as mp
-from state_manager import StateManager
-from PIL import ImageFont, ImageDraw, Image
+import argparse
+import cv2, time
+from concurrent.futures import ThreadPoolExecutor
 
 # === 모듈 import ===
-# 명시 호출 (Pylance 인식 문제)
 from config import (
-    POSE_MIN_DETECTION_CONFIDENCE,
-    POSE_MIN_TRACKING_CONFIDENCE,
-    HANDS_MAX_NUM_HANDS,
-    HANDS_MIN_DETECTION_CONFIDENCE,
-    HANDS_MIN_TRACKING_CONFIDENCE,
-    SOUND_NECK,
-    SOUND_LEAN_FORWARD,
-    SOUND_LEAN_BACK,
-    SOUND_SLOUCH,
-    STRETCH_INTERVAL_SEC,
-    STRETCH_ALERT_DURATION_SEC,
+    LOG_FILENAME, STATS_INTERVAL_SEC, MOTION_GATE_ENABLED, POSE_ROI_ENABLED, FRAME_WAIT_TIMEOUT_SEC, TRACE_DIR,
+    LANDMARK_PREDICTION_FPS, FPS_WINDOW_SEC, ALERT_BACKEND,
 )
-from config import * # posture_log.csv, mp3 경로, confidence 값 불러오기
-from video_stream import VideoStream
-from gesture_utils import is_victory, is_palm
-from posture_analysis import calculate_angle_2d
-from logger import setup_log_file, log_event
+import audio_utils
+from video_stream import parse_source
+from frame_bus import open_stream
+from logger import setup_log_file, close_log_files
 from audio_utils import play_alert
-from state_manager import StateManager
+# (posture_engine(mediapipe), renderer(PIL)는 run_monitor 안에서 카메라 연결을 시작한 뒤 import)
 
 
 # === 1. 초기화 ===
@@ -38,364 +28,309 @@ username = ""
 password = ""
 ip_address = ""
 # (성능 최적화) 저해상도 스트림(stream2) 사용 권장
-rtsp_url = f"rtsp://{username}:{password}@{ip_address}:554/stream2" 
+rtsp_url = f"rtsp://{username}:{password}@{ip_address}:554/stream2"
 
-setup_log_file()
-cap = VideoStream(rtsp_url).start() 
 
-print("✅ Camera stream successfully connected.")
-print("   ('q' key to quit.)")
+class StartupProfile:
+    """시작 단계별 소요 시간 기록 (--profile-startup 리포트용)"""
 
-# MediaPipe 모델 초기화
-mp_pose = mp.solutions.pose
-pose = mp_pose.Pose(
-    min_detection_confidence=POSE_MIN_DETECTION_CONFIDENCE,
-    min_tracking_confidence=POSE_MIN_TRACKING_CONFIDENCE
-)
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(
-    max_num_hands=HANDS_MAX_NUM_HANDS,
-    min_detection_confidence=HANDS_MIN_DETECTION_CONFIDENCE,
-    min_tracking_confidence=HANDS_MIN_TRACKING_CONFIDENCE
-)
-mp_drawing = mp.solutions.drawing_utils
-mp_drawing_styles = mp.solutions.drawing_styles
-
-state = StateManager()
-current_stage = 1
-FPS = 30
-
-# --- 스트레칭 알림 타이머 초기화 ---
-stretch_last_time = time.time()
-stretch_alert_until = 0.0
-
-stretch_alert_until = 0.0
-
-# === [추가] 한글 폰트 로드 (PIL) ===
-font_path = "c:/Windows/Fonts/malgun.ttf" # 윈도우 맑은 고딕
-try:
-    # 폰트 크기는 0.7 폰트 스케일과 비슷하게 20~25pt로 설정
-    font = ImageFont.truetype(font_path, 25)
-    print(f"✅ Korean font '{font_path}' loaded.")
-except IOError:
-    print(f"🚨 ERROR: Font not found at '{font_path}'.")
-    print("-> Please check font path. Using default (broken) font.")
-    font = None # 폰트 로드 실패
-
-# === [추가] PIL로 텍스트 그리는 헬퍼 함수 ===
-def draw_text_with_pil(img, text, position, text_color_bgr):
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._last = self.start
+        self.phases = []       # [(단계 이름, 초)] 메인 스레드에서 순서대로 실행된 단계
+        self.parallel = []     # [(단계 이름, 초)] 다른 스레드에서 동시에 실행된 단계
+
+    def mark(self, name):
+        """직전 mark 이후 걸린 시간을 name 단계로 기록"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def report(self, seat_label=""):
+        total = time.perf_counter() - self.start
+        print(f"{seat_label}⏱ Startup profile (first result after {total:.2f}s)")
+        for name, sec in self.phases:
+            print(f"{seat_label}   {name:<24} {sec * 1000:8.1f} ms")
+        for name, sec in self.parallel:
+            print(f"{seat_label}   {name + ' (parallel)':<24} {sec * 1000:8.1f} ms")
+
+
+def _connect_camera(src, profile):
     """
-    OpenCV 이미지를 받아 PIL로 변환 후 한글 텍스트를 그리고
-    다시 OpenCV 이미지로 변환하여 반환합니다.
+    카메라 연결 (VideoStream 생성자는 연결될 때까지 최대 10 × 0.5초 재시도하므로 별도 스레드에서 실행).
+    src가 "bus:<이름>"이면 frame_bus.py 캡처 서비스의 공유 메모리에 연결
     """
-    if font is None: # 폰트 로드 실패 시, 원래 OpenCV 함수 사용
-        cv2.putText(img, text, position, cv2.FONT_HERSHEY_SIMPLEX, 0.7, text_color_bgr, 2)
-        return img
-
-    # 1. OpenCV BGR 이미지를 RGB PIL 이미지로 변환
-    img_pil = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
-    
-    # 2. Draw 객체 생성
-    draw = ImageDraw.Draw(img_pil)
-    
-    # 3. BGR 색상을 RGB로 변환 (PIL은 RGB 사용)
-    text_color_rgb = (text_color_bgr[2], text_color_bgr[1], text_color_bgr[0])
-    
-    # 4. 텍스트 그리기 (폰트가 없으면 기본 폰트 사용)
-    if font:
-        draw.text(position, text, font=font, fill=text_color_rgb)
-    else:
-        draw.text(position, text, fill=text_color_rgb) # 기본 폰트
-    
-    # 5. PIL RGB 이미지를 다시 BGR OpenCV 이미지로 변환
-    img_cv = cv2.cvtColor(np.array(img_pil), cv2.COLOR_RGB2BGR)
-    return img_cv
-
-# === 2. 메인 루프 ===
-while True:
-    ret, frame = cap.read()
-    if not ret or frame is None:
-        print("- Waiting for frame...")
-        time.sleep(0.5)
-        continue
-
-    frame = cv2.flip(frame, 1)
-    frame = cv2.resize(frame, (FRAME_WIDTH, FRAME_HEIGHT))
-    image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-    # === [수정] 포즈 감지 (상세 가이드 추가) ===
-    # (원본 코드의 상세 가이드 로직으로 복원)
-    pose_results = pose.process(image_rgb)
-    current_pose_ok = False # 기본값 초기화
-    adjustment_messages = [] # 카메라 위치 안내 메세지 초기화
-    landmarks = None # 랜드마크 초기화
-
-    if pose_results.pose_landmarks:
-        landmarks = pose_results.pose_landmarks.landmark
-        try: # try-except로 랜드마크 접근 보호
-            nose = landmarks[mp_pose.PoseLandmark.NOSE.value]
-            left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-            right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-            left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-            right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
-
-            # 랜드마크가 화면에 잘 보이는지 (visibility) 확인
-            if all(lm.visibility > 0.7 for lm in [nose, left_shoulder, right_shoulder, left_hip, right_hip]):
-                
-                # 1. [복원] 중앙 정렬
-                shoulder_center_x = (left_shoulder.x + right_shoulder.x) / 2
-                if not (0.5 - CENTER_TOLERANCE < shoulder_center_x < 0.5 + CENTER_TOLERANCE):
-                    adj_msg = "RIGHT" if shoulder_center_x < 0.5 else "LEFT"
-                    adjustment_messages.append(f"[ADJUST] Please move {adj_msg}")
-                
-                # 2. [복원] 상하/거리 정렬
-                if nose.y < HEAD_ROOM_Y:
-                    adjustment_messages.append("[ADJUST] Too close (move DOWN/BACK)")
-                elif (left_hip.y > HIP_ROOM_Y or right_hip.y > HIP_ROOM_Y):
-                    adjustment_messages.append("[ADJUST] Too far (move UP/CLOSER)")
-                
-                # 3. [복원] 모든 조정 메시지가 없으면 -> 자세 OK
-                if not adjustment_messages:
-                    current_pose_ok = True
-            
-            else: 
-                adjustment_messages.append("[ERROR] Body not fully visible.")
-        except Exception as e:
-            adjustment_messages.append("[ERROR] Landmarks not fully detected.")
-    else:
-        adjustment_messages.append("[GUIDE] Please stand in front of the camera.")
-
-    # 손 제스처 감지
-    detected_gesture = None
-    if current_stage in [2, 3]:
-        hand_results = hands.process(image_rgb)
-        if hand_results.multi_hand_landmarks:
-            hand_landmarks = hand_results.multi_hand_landmarks[0]
-            if is_palm(hand_landmarks):
-                detected_gesture = "PALM"
-            elif is_victory(hand_landmarks):
-                detected_gesture = "VICTORY"
-            mp_drawing.draw_landmarks(
-                frame, hand_landmarks, mp_hands.HAND_CONNECTIONS,
-                mp_drawing_styles.get_default_hand_landmarks_style(),
-                mp_drawing_styles.get_default_hand_connections_style()
-            )
-
-    # === Stage 로직 ===
-    display_messages = []
-    if current_stage == 1:
-        # Stage 1: 카메라 세팅 (10초 유지)
-        if current_pose_ok:
-            if state.ok_start_time is None:
-                state.ok_start_time = time.time()
-            elapsed = time.time() - state.ok_start_time
-            if elapsed >= HOLD_DURATION:
-                current_stage = 2
-                state.reset()
-                display_messages = ["[ STAGE 2 ] Show Palm to START"]
-            else:
-                display_messages.append(f"[ OK ] Hold for {HOLD_DURATION - elapsed:.1f}s")
-        else:
-            state.ok_start_time = None
-            display_messages = adjustment_messages # [수정] 상세 가이드 메시지 표시
-
-    elif current_stage == 2:
-        # Stage 2: 손바닥 제스처 대기 (3초 유지)
-        display_messages = ["[ STAGE 2 ] Show Palm to START"]
-        if detected_gesture == "PALM":
-            if state.palm_start_time is None:
-                state.palm_start_time = time.time()
-            elapsed = time.time() - state.palm_start_time
-            if elapsed >= GESTURE_HOLD_DURATION:
-                current_stage = 3
-                state.reset()
-                display_messages = ["[ STAGE 3 ] Monitoring STARTED!"]
-            else:
-                display_messages.append(f"[ GESTURE ] Hold Palm {GESTURE_HOLD_DURATION - elapsed:.1f}s")
-        else:
-            state.palm_start_time = None
-
-    elif current_stage == 3:
-        # Stage 3: 모니터링 (자세 분석 + 브이 제스처로 종료)
-        display_messages = ["[ STAGE 3 ] Monitoring... (Show 브이 Victory to STOP)"]
-
-        if landmarks: # 자세 감지가 안 돼서 current_pose_ok 삭제
-            # --- 거북목 감지 ---
-            try: # [수정] 랜드마크 접근 보호
-                ear = landmarks[mp_pose.PoseLandmark.LEFT_EAR.value]
-                shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-                hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-                neck_angle = calculate_angle_2d(ear, shoulder, hip)
-
-                if neck_angle and neck_angle < NECK_ANGLE_THRESHOLD:
-                    if state.bad_neck_start_time is None:
-                        state.bad_neck_start_time = time.time()
-                    
-                    # 나쁜 자세 지속 시간 (거북목)
-                    state.neck_duration +=1
-                    neck_duration_sec = state.neck_duration / FPS
-
-                    elapsed = time.time() - state.bad_neck_start_time
-                    if elapsed > BAD_POSTURE_DURATION:
-                        display_messages.append(f"[WARNING] Turtle Neck! ({neck_angle:.0f}deg, {elapsed:.1f}s)")
-                        if not state.neck_warning_triggered:
-                            log_event("Turtle_Neck", neck_angle)
-                            state.neck_warning_triggered = True
-                            print(f"Neck angle  : {neck_angle:.1f}   (Held {neck_duration_sec:.1f}s)")
-                            play_alert(SOUND_NECK)
-                else:
-                    state.bad_neck_start_time = None
-                    state.neck_warning_triggered = False
-
-                # --- 허리 기울임 감지 ---
-                dy = -(shoulder.y - hip.y)
-                dx = shoulder.x - hip.x
-                lean_angle = np.degrees(np.arctan2(dy, dx))
-                if not (LEAN_ANGLE_THRESHOLD_LOW < lean_angle < LEAN_ANGLE_THRESHOLD_HIGH):
-                    if state.bad_lean_start_time is None:
-                        state.bad_lean_start_time = time.time()
-
-                    # 나쁜 자세 지속 시간 (기댄 자세 앞/뒤)
-                    state.lean_duration +=1
-                    lean_duration_sec = state.lean_duration / FPS
-
-                    elapsed = time.time() - state.bad_lean_start_time
-                    if elapsed > BAD_POSTURE_DURATION:
-                        if lean_angle > LEAN_ANGLE_THRESHOLD_HIGH:
-                            msg = "Leaning Forward!"
-                            sound = SOUND_LEAN_FORWARD
-                        else:
-                            msg = "Leaning Back!"
-                            sound = SOUND_LEAN_BACK
-                        display_messages.append(f"[WARNING] {msg} ({lean_angle:.0f} deg, {elapsed: .1f}s)")
-                        if not state.lean_warning_triggered:
-                            log_event("Leaning", lean_angle)
-                            state.lean_warning_triggered = True
-                            print(f"Lean angle  : {lean_angle:.1f}   (Held {lean_duration_sec:.1f}s)")
-                            play_alert(sound)
-                else:
-                    state.bad_lean_start_time = None
-                    state.lean_warning_triggered = False
-
-                # --- 구부정 감지 ---
-                torso_h = abs(shoulder.x - hip.x)
-                torso_v = abs(shoulder.y - hip.y)
-                if torso_v > 0.01:
-                    slouch_ratio = torso_h / torso_v
-                    if slouch_ratio > SLOUCH_RATIO_THRESHOLD:
-                        if state.bad_slouch_start_time is None:
-                            state.bad_slouch_start_time = time.time()
-
-                        # 나쁜 자세 지속 시간 (구부정..)
-                        state.slouch_duration +=1
-                        slouch_duration_sec = state.slouch_duration / FPS
-
-                        elapsed = time.time() - state.bad_slouch_start_time
-                        if elapsed > BAD_POSTURE_DURATION:
-                            display_messages.append(f"[WARNING] Slouching! (ratio={slouch_ratio:.2f}, {elapsed: .1f}s)")
-                            if not state.slouch_warning_triggered:
-                                log_event("Slouching", slouch_ratio)
-                                state.slouch_warning_triggered = True
-                                print(f"Slouch ratio: {slouch_ratio:.2f}   (Held {slouch_duration_sec:.2f}s)")
-                                play_alert(SOUND_SLOUCH)
-                    else:
-                        state.bad_slouch_start_time = None
-                        state.slouch_warning_triggered = False
-            
-            except Exception as e:
-                # Stage 3에서 랜드마크 계산 중 오류 발생 시
-                display_messages.append("[ERROR] Angle calculation failed.")
-                
-        # --- [스트레칭 리마인더: 테스트용 1분 주기] ---
-        now = time.time()
-        if now - stretch_last_time >= STRETCH_INTERVAL_SEC:
-            stretch_last_time = now
-            stretch_alert_until = now + STRETCH_ALERT_DURATION_SEC
-            print("[STRETCH] It's time to stretch your body!")
-
-
-        # --- 브이 제스처로 종료 ---
-        if detected_gesture == "VICTORY":
-            if state.fist_start_time is None:
-                state.fist_start_time = time.time()
-            elapsed = time.time() - state.fist_start_time
-            if elapsed >= GESTURE_HOLD_DURATION:
-                current_stage = 1
-                state.reset()
-                display_messages = ["[ RESET ] Monitoring stopped."]
-            else:
-                # ✅ [추가] 브이 제스처 카운트다운 메시지
-                display_messages.append(f"[ GESTURE ] Hold Victory {GESTURE_HOLD_DURATION - elapsed:.1f}s")
-        else:
-            state.fist_start_time = None
-
-    # === [신규] 공통 리셋 로직 (Safety Reset) ===
-    # 2/3단계일 때, 자세가 30초 이상 이탈하면 1단계로 강제 리셋
-    if current_stage == 2 or current_stage == 3:
-        if not current_pose_ok:
-            if state.not_ok_start_time is None: 
-                state.not_ok_start_time = time.time()
-            elapsed_not_ok = time.time() - state.not_ok_start_time
-            remaining_time = RESET_DURATION - elapsed_not_ok
-            
-            if remaining_time <= 0:
-                # 30초 이탈 -> 1단계로 리셋
-                current_stage = 1
-                state.reset() # StateManager로 모든 타이머 리셋
-                display_messages = ["[ RESET ] Position lost. Returning to setup..."]
-                # 스트레칭 타이머도 리셋
-                stretch_last_time = time.time()
-                stretch_alert_until = 0.0
+    t0 = time.perf_counter()
+    cap = open_stream(src)
+    profile.parallel.append(("camera connect", time.perf_counter() - t0))
+    return cap
+
+
+def _preload_alerts(profile):
+    """경고음 MP3를 PCM으로 미리 디코딩 (첫 경고 때 디코딩 지연이 없도록)"""
+    t0 = time.perf_counter()
+    audio_utils.preload()
+    profile.parallel.append(("alert preload", time.perf_counter() - t0))
+
+
+def run_monitor(src=rtsp_url, seat_name=None, log_filename=LOG_FILENAME, alert=play_alert,
+                headless=False, stats_queue=None, stop_event=None, motion_gate=MOTION_GATE_ENABLED,
+                pose_roi=POSE_ROI_ENABLED, trace=False, profile_startup=False, pipelined=False,
+                predict_fps=LANDMARK_PREDICTION_FPS, metrics_port=None, metrics_json=None,
+                live_port=None, calibration=None):
+    """
+    한 좌석(카메라 1대)의 캡처 → 포즈 → Stage 1~3 상태 머신을 실행합니다.
+    좌석마다 VideoStream, PostureEngine(Pose/Hands 모델, StateManager), 로그 파일을 따로 가지므로
+    multi_seat.py가 워커 프로세스마다 이 함수를 하나씩 실행할 수 있습니다.
+
+    - alert: 경고음 재생 콜백 (좌석별 경고 라우팅, 기본값은 play_alert)
+    - headless: True면 그리기/창 출력을 모두 건너뛰고 추론만 수행
+    - stats_queue: (seat_name, 처리 프레임 수, 경과 초)를 주기적으로 보고할 큐
+    - stop_event: set()되면 루프를 종료하는 이벤트 (multiprocessing.Event 등)
+    - motion_gate: 움직임이 없거나 사람이 없을 때 추론을 건너뛰고 루프 속도를 낮춤
+    - pose_roi: 사람 영역만 잘라서 포즈 추론
+    - trace: True면 추론한 프레임의 랜드마크/자세 수치를 TRACE_DIR에 기록 (trace_recorder.py)
+    - profile_startup: 첫 결과가 나올 때까지 단계별 소요 시간 출력
+    - pipelined: 추론/분석/렌더링을 각각 다른 스레드에서 동시에 실행 (pipeline.py)
+    - predict_fps: 0보다 크면 포즈 추론은 이 주기로만 실행하고 그 사이 프레임은 랜드마크 예측 (landmark_filter.py)
+    - metrics_port: 지정하면 http://127.0.0.1:<port>/metrics 로 단계별 지연 히스토그램/카운터 제공 (telemetry.py)
+    - metrics_json: 지정하면 같은 지표를 METRICS_DUMP_INTERVAL_SEC마다 이 파일에 JSON으로 저장
+    - live_port: 지정하면 http://127.0.0.1:<port>/state, ws://127.0.0.1:<port>/ws 로 실시간 자세 상태 제공 (live_api.py)
+    - calibration: calibrate.py가 만든 사용자별 보정 JSON (Stage 3 기준값/유지 시간을 덮어씀)
+    """
+    profile = StartupProfile()
+    seat_label = f"[{seat_name}] " if seat_name else ""
+    window_name = 'Posture Guardian - Project (Voice Enabled)'
+    if seat_name:
+        window_name += f" - {seat_name}"
+
+    log_writer = setup_log_file(log_filename)
+    profile.mark("log writer")
+
+    # 카메라 연결, 경고음 디코딩, 모델 로드를 동시에 진행
+    connector = ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup")
+    cap_future = connector.submit(_connect_camera, src, profile)
+    if alert is play_alert:
+        connector.submit(_preload_alerts, profile)
+
+    from posture_engine import PostureEngine
+    profile.mark("import mediapipe")
+
+    trace_recorder = None
+    if trace:
+        from trace_recorder import TraceRecorder, monotonic_clock_offset
+        trace_recorder = TraceRecorder(TRACE_DIR.format(seat=seat_name or "default"),
+                                       clock_offset=monotonic_clock_offset())
+
+    engine_options = {}
+    if calibration:
+        from calibrate import load_calibration
+        engine_options["rules"] = load_calibration(calibration)
+        print(f"{seat_label}🎯 calibrated posture rules from {calibration}")
+    if pipelined:
+        from pipeline import PosturePipeline, pipeline_buffers
+        engine_options["preprocess_buffers"] = pipeline_buffers()
+
+    engine = PostureEngine(log_filename=log_filename, alert=alert, seat_name=seat_name,
+                           motion_gate=motion_gate, pose_roi=pose_roi, trace_recorder=trace_recorder,
+                           predict_fps=predict_fps, **engine_options)
+    profile.mark("model load")
+    engine.warm_up()
+    profile.mark("model warm-up")
+
+    renderer = None
+    if not headless:
+        # 렌더링 레이어는 화면을 띄울 때만 로드 (PIL 폰트 등)
+        from renderer import PostureRenderer
+        renderer = PostureRenderer()
+        profile.mark("renderer")
+
+    cap = cap_future.result()
+    connector.shutdown()
+    profile.mark("wait for camera")
+
+    print(f"{seat_label}✅ Camera stream successfully connected.")
+    if not headless:
+        print("   ('q' key to quit.)")
+
+    telemetry = None
+    if metrics_port is not None or metrics_json:
+        from telemetry import Telemetry
+        telemetry = Telemetry(seat_name)
+        cap.read_observer = lambda seconds: telemetry.observe("decode", seconds)
+        telemetry.add_counter("captured_frames", lambda: cap.captured)
+        telemetry.add_counter("dropped_frames", lambda: cap.dropped)
+        telemetry.add_counter("log_events_dropped", lambda: log_writer.dropped)
+        telemetry.add_counter("log_write_errors", lambda: log_writer.errors)
+        telemetry.add_gauge("alert_queue_depth", audio_utils.pending_alerts)
+        telemetry.add_gauge("log_queue_depth", lambda: log_writer.queue.qsize())
+        telemetry.add_gauge("effective_fps", lambda: engine.fps)
+        telemetry.add_gauge("stage", lambda: engine.current_stage)
+        if engine.scheduler is not None:
+            telemetry.add_counter("skipped_still_frames", lambda: engine.scheduler.skipped_still)
+            telemetry.add_counter("skipped_absent_frames", lambda: engine.scheduler.skipped_absent)
+        if metrics_port is not None:
+            host, port = telemetry.serve(metrics_port)
+            print(f"{seat_label}📡 metrics on http://{host}:{port}/metrics")
+        if metrics_json:
+            telemetry.start_json_dump(metrics_json)
+
+    live = None
+    if live_port is not None:
+        from live_api import LiveStateServer
+        live = LiveStateServer(seat_name)
+        host, port = live.start(live_port)
+        print(f"{seat_label}📡 live state on http://{host}:{port}/state (WebSocket: /ws)")
+        if telemetry is not None:
+            telemetry.add_gauge("live_subscribers", lambda: live.stats()["subscribers"])
+
+    pipeline = PosturePipeline(engine, cap).start() if pipelined else None
+    if telemetry is not None and pipeline is not None:
+        telemetry.add_counter("pipeline_dropped_before_analysis", lambda: pipeline.stats()["dropped_before_analysis"])
+        telemetry.add_counter("pipeline_dropped_before_render", lambda: pipeline.stats()["dropped_before_render"])
+
+    # --- 처리량(FPS) 측정 ---
+    frames_processed = 0
+    run_start_time = time.time()
+    stats_last_time = run_start_time
+    stats_last_frames = 0
+
+    # === 2. 메인 루프 ===
+    try:
+        while stop_event is None or not stop_event.is_set():
+            if pipeline is not None:
+                # 파이프라인 모드: 추론/분석 스레드가 처리한 결과만 받아서 그리기
+                result = pipeline.get(timeout=FRAME_WAIT_TIMEOUT_SEC)
+                if result is None:
+                    if pipeline.stopped:
+                        break  # 카메라 연결 실패/영상 끝
+                    print("- Waiting for frame...")
+                    continue
             else:
-                display_messages.append(f"[ WARNING ] Position lost. Reset in {remaining_time:.0f}s")
-                # (중요) 이탈 사유를 보여주기 위해 adjustment_messages를 추가
-                display_messages.extend(adjustment_messages) 
-        else:
-            # 자세가 정상이면 리셋 타이머 초기화
-            if state.not_ok_start_time is not None: 
-                state.not_ok_start_time = None
-
-    # --- [스트레칭 알림 표시] ---
-    if time.time() < stretch_alert_until:
-        h, w = frame.shape[:2]
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (0, 0), (w, 80), (0, 0, 0), -1)
-        alpha = 0.5
-        frame = cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0)
-
-        # [수정] 한글 메시지로 변경 및 PIL 함수 사용
-        stretch_msg = "스트레칭 시간입니다!" 
-        text_color_bgr = (255, 255, 255) # 흰색 (BGR)
-        
-        # (주의: PIL 폰트 기준점이 약간 달라서 (20, 50) -> (20, 40)으로 y좌표 조정)
-        frame = draw_text_with_pil(frame, stretch_msg, (20, 40), text_color_bgr)
-        
-    # UI 메시지 출력
-    # y_offset = 30  <- (이 변수는 PIL 헬퍼 함수를 쓰면 필요 없어짐)
-    for i, msg in enumerate(display_messages):
-        # [수정] 메시지 색상 변경 로직 추가 (이건 그대로 사용)
-        color = (0, 255, 0) # 기본 녹색 (OK)
-        if "ERROR" in msg or "GUIDE" in msg: color = (0, 0, 255) # 적색
-        elif "ADJUST" in msg: color = (0, 165, 255) # 주황
-        elif "WARNING" in msg or "RESET" in msg: color = (0, 69, 255) # 진한 주황
-        elif "Hold" in msg: color = (255, 255, 0) # 청록색 (대기)
-
-        # [수정] cv2.putText 대신 PIL 헬퍼 함수 사용
-        # (주의: PIL은 이미지를 반환하므로 frame을 덮어써야 함)
-        # (PIL 폰트 기준점이 약간 다르므로 y 좌표를 살짝 조정 (예: 25 + i * 35))
-        frame = draw_text_with_pil(frame, msg, (20, 25 + i * 35), color)
-
-    if pose_results.pose_landmarks:
-        mp_drawing.draw_landmarks(frame, pose_results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
-
-    cv2.imshow('Posture Guardian - Project (Voice Enabled)', frame)
-
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
-
-# === 종료 처리 ===
-print("Shutting down...")
-pose.close()
-hands.close()
-cap.stop()
-cv2.destroyAllWindows()
\ No newline at end of file
+                # 새 프레임이 올 때까지 대기 (같은 프레임을 두 번 처리하지 않음)
+                ret, frame, seq, capture_time = cap.read_new(timeout=FRAME_WAIT_TIMEOUT_SEC)
+                if not ret or frame is None:
+                    if cap.stopped:
+                        break  # 카메라 연결 실패
+                    print("- Waiting for frame...")
+                    continue
+
+                result = engine.process(frame, capture_time)
+            if frames_processed == 0:
+                profile.mark("first frame")
+                if profile_startup:
+                    profile.report(seat_label)
+
+            if telemetry is not None:
+                telemetry.observe_result(result)
+            if live is not None:
+                live.publish(result)
+
+            # --- 처리량 보고 ---
+            frames_processed += 1
+            now = time.time()
+            if stats_queue is not None and now - stats_last_time >= STATS_INTERVAL_SEC:
+                stats_queue.put((seat_name, frames_processed - stats_last_frames, now - stats_last_time))
+                stats_last_time = now
+                stats_last_frames = frames_processed
+
+            # 부재 모드에서는 캡처 스레드가 디코드를 줄여 CPU를 쉬게 함 (파이프라인 모드는 추론 스레드가 알림)
+            if engine.scheduler and pipeline is None:
+                cap.set_idle(engine.scheduler.idle_delay())
+
+            if renderer is None:
+                continue
+
+            t_render = time.perf_counter()
+            frame = renderer.render(result)
+            cv2.imshow(window_name, frame)
+            t_wait = time.perf_counter()
+            key = cv2.waitKey(1)
+            if telemetry is not None:
+                telemetry.observe("render", t_wait - t_render)
+                telemetry.observe("waitkey", time.perf_counter() - t_wait)
+
+            if key & 0xFF == ord('q'):
+                break
+    except KeyboardInterrupt:
+        pass
+
+    # === 종료 처리 ===
+    if pipeline is not None:
+        pipeline.stop()
+    total_elapsed = time.time() - run_start_time
+    if total_elapsed > 0:
+        print(f"{seat_label}📈 {frames_processed} frames in {total_elapsed:.1f}s ({frames_processed / total_elapsed:.1f} FPS, "
+              f"last {FPS_WINDOW_SEC:g}s: {engine.fps:.1f} FPS)")
+    s = cap.stats()
+    print(f"{seat_label}🎞 captured={s['captured']}, processed={frames_processed}, "
+          f"dropped={s['dropped']}, duplicates={s['duplicates']}"
+          + (f", idle grab-only={s['idle_grabbed']}" if s.get('idle_grabbed') else ""))
+    if engine.scheduler is not None:
+        s = engine.scheduler.stats()
+        print(f"{seat_label}💤 inference skipped: still={s['skipped_still']}, absent={s['skipped_absent']} "
+              f"({s['skip_ratio'] * 100:.0f}% of frames, ~{s['saved_sec']:.1f}s of inference saved)")
+    if engine.predictor is not None:
+        s = engine.predictor.stats()
+        print(f"{seat_label}🔮 landmark prediction: {s['predictions']} predicted / {s['updates']} inferred frames")
+    if pipeline is not None:
+        s = pipeline.stats()
+        print(f"{seat_label}🧵 pipeline: inferred={s['inferred']}, analyzed={s['analyzed']}, "
+              f"dropped={s['dropped_before_analysis']}+{s['dropped_before_render']}, "
+              f"latency avg={s['latency_avg_ms']}ms max={s['latency_max_ms']}ms")
+    print(f"{seat_label}Shutting down...")
+    if live is not None:
+        s = live.stats()
+        print(f"{seat_label}📡 live state: {s['broadcasts']} broadcasts, {s['subscribers']} subscribers connected")
+        live.stop()
+    if telemetry is not None:
+        if metrics_json:
+            telemetry.dump_json(metrics_json)
+        telemetry.close()
+    engine.close()
+    cap.stop()
+    close_log_files()
+    if alert is play_alert:
+        s = audio_utils.get_engine().stats()
+        print(f"{seat_label}🔊 alerts played={s['played']}, failed={s['failed']}, merged={s['merged']}, "
+              f"stale={s['dropped_stale']}, wait avg={s['wait_avg_ms']}ms")
+        audio_utils.get_engine().close()
+    s = log_writer.stats()
+    print(f"{seat_label}📝 events logged={s['written']}, dropped={s['dropped']}, write errors={s['errors']}")
+    if trace_recorder is not None:
+        s = trace_recorder.stats()
+        print(f"{seat_label}🧾 trace frames={s['frames']} in {s['chunks']} chunk(s) ({trace_recorder.directory})")
+    if renderer is not None:
+        cv2.destroyWindow(window_name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Posture Guardian - 단일 좌석 모니터링")
+    parser.add_argument("--source", default=rtsp_url,
+                        help="RTSP URL, 동영상 파일, 카메라 번호 또는 bus:<이름> (frame_bus.py 공유 메모리)")
+    parser.add_argument("--headless", action="store_true", help="화면 출력/그리기 없이 추론과 경고만 실행 (Ctrl+C로 종료)")
+    parser.add_argument("--no-motion-gate", action="store_true", help="움직임과 관계없이 매 프레임 추론")
+    parser.add_argument("--pose-roi", action="store_true", help="사람 영역만 잘라서 포즈 추론 (POSE_ROI_ENABLED가 꺼져 있어도 켬)")
+    parser.add_argument("--no-pose-roi", action="store_true", help="사람 영역 자르기 없이 항상 전체 프레임으로 포즈 추론")
+    parser.add_argument("--trace", action="store_true", help="프레임별 랜드마크/자세 수치를 traces/ 에 기록")
+    parser.add_argument("--profile-startup", action="store_true", help="시작 단계별 소요 시간 출력")
+    parser.add_argument("--pipeline", action="store_true", help="추론/분석/렌더링을 스레드별로 동시에 실행")
+    parser.add_argument("--predict-fps", type=float, default=LANDMARK_PREDICTION_FPS,
+                        help="포즈 추론 주기 (그 사이 프레임은 랜드마크 예측, 0이면 매 프레임 추론)")
+    parser.add_argument("--metrics-port", type=int, default=None, help="단계별 지연/카운터를 제공할 로컬 HTTP 포트 (/metrics)")
+    parser.add_argument("--metrics-json", default=None, help="지표를 주기적으로 저장할 JSON 파일 경로")
+    parser.add_argument("--calibration", default=None, help="calibrate.py로 만든 사용자별 보정 JSON")
+    parser.add_argument("--live-port", type=int, default=None, help="실시간 상태 API 포트 (GET /state, WebSocket /ws)")
+    parser.add_argument("--alert-backend", default=ALERT_BACKEND, choices=["auto", "pcm", "playsound", "null", "wav"],
+                        help="경고음 출력 장치 (null/wav는 사운드 카드 없이 테스트)")
+    parser.add_argument("--alert-wav", default="alerts.wav", help="--alert-backend wav 출력 파일")
+    args = parser.parse_args()
+
+    audio_utils.configure(args.alert_backend, wav_path=args.alert_wav)
+
+    run_monitor(parse_source(args.source), headless=args.headless,
+                motion_gate=MOTION_GATE_ENABLED and not args.no_motion_gate,
+                pose_roi=(POSE_ROI_ENABLED or args.pose_roi) and not args.no_pose_roi,
+                trace=args.trace, profile_startup=args.profile_startup, pipelined=args.pipeline,
+                predict_fps=args.predict_fps, metrics_port=args.metrics_port, metrics_json=args.metrics_json,
+                live_port=args.live_port, calibration=args.calibration)
@@ -0,0 +1,195 @@
+# multi_seat.py
+# 목적: 여러 좌석(카메라 N대)을 좌석별 워커 프로세스에서 동시에 모니터링
+# Workflow: 좌석 목록 파싱 → 좌석마다 워커 프로세스 1개 실행(run_monitor) → 통계 큐에서 처리량 수집 → 좌석별/전체 FPS 출력
+#
+# 사용 예:
+#   python multi_seat.py desk1=rtsp://.../stream2 desk2=rtsp://.../stream2
+#   python multi_seat.py 0 1 --mute desk2 --show
+# (기본은 헤드리스: 좌석별 창 없이 실행, --show로 좌석마다 창 표시)
+
+import argparse
+import multiprocessing as mp_proc
+import os
+import queue
+import time
+from pathlib import Path
+
+from config import SEAT_LOG_FILENAME, STATS_INTERVAL_SEC, CALIBRATION_FILE
+
+
+def parse_seats(specs):
+    """
+    'name=source' 또는 'source' 형식의 좌석 목록을 [(name, source), ...]로 변환.
+    이름이 없으면 seat1, seat2 ... 순서로 붙입니다.
+    """
+    seats = []
+    for i, spec in enumerate(specs, start=1):
+        name, sep, source = spec.partition("=")
+        # rtsp://user:pw@... 처럼 '='가 URL 안에 있는 경우는 이름으로 보지 않음
+        if not sep or "://" in name:
+            name, source = f"seat{i}", spec
+        seats.append((name, source))
+    return seats
+
+
+def _seat_worker(seat_name, source, cpu, muted, headless, trace, profile_startup, metrics_port,
+                 live_port, stats_queue, stop_event):
+    """
+    워커 프로세스 진입점: 좌석 하나의 캡처 → 포즈 → Stage 1~3 전체를 실행.
+    좌석끼리 코어를 나눠 쓰도록 내부 스레드 수를 1로 제한하고, 가능하면 코어에 고정합니다.
+    """
+    # (중요) numpy/OpenCV가 import되기 전에 스레드 수를 제한해야 코어 간 경합이 없음
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, {cpu})
+        except OSError:
+            pass
+
+    import cv2
+    cv2.setNumThreads(1)
+
+    import audio_utils
+    from main import run_monitor
+    from video_stream import parse_source
+
+    # 음소거 좌석: 경고 대기 목록/통계는 그대로 쓰고 출력 장치만 소리 없는 null로 (워커마다 별도 엔진)
+    if muted:
+        audio_utils.configure("null")
+
+    # calibrate.py로 이 좌석(사용자)의 보정 파일을 만들어 두었으면 적용
+    calibration = CALIBRATION_FILE.format(seat=seat_name)
+
+    try:
+        run_monitor(
+            parse_source(source),
+            seat_name=seat_name,
+            log_filename=SEAT_LOG_FILENAME.format(seat=seat_name),
+            alert=audio_utils.play_alert,
+            headless=headless,
+            trace=trace,
+            profile_startup=profile_startup,
+            metrics_port=metrics_port,
+            live_port=live_port,
+            calibration=calibration if Path(calibration).exists() else None,
+            stats_queue=stats_queue,
+            stop_event=stop_event,
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+def _print_throughput(totals, window_frames, window_secs, exit_codes=None):
+    """좌석별 / 전체 처리량 출력 (종료된 좌석은 종료 코드 표시)"""
+    exit_codes = exit_codes or {}
+    lines = []
+    combined = 0.0
+    for name in sorted(window_frames):
+        fps = window_frames[name] / window_secs[name] if window_secs[name] > 0 else 0.0
+        combined += fps
+        status = f", exited code={exit_codes[name]}" if name in exit_codes else ""
+        lines.append(f"{name}: {fps:5.1f} FPS (total {totals[name]} frames{status})")
+    print(f"📈 [THROUGHPUT] combined {combined:.1f} FPS | " + " | ".join(lines))
+
+
+def run_multi_seat(seats, muted=(), headless=True, pin_cpus=True, trace=False, profile_startup=False,
+                   metrics_port=None, live_port=None):
+    """
+    좌석마다 워커 프로세스를 띄우고, 종료될 때까지 처리량을 집계합니다.
+    - seats: [(name, source), ...]
+    - muted: 경고음을 재생하지 않을 좌석 이름 목록
+    - trace: 좌석별로 프레임 랜드마크/자세 수치 기록 (traces/<좌석 이름>)
+    - metrics_port: 지정하면 좌석 i(0부터)가 metrics_port + i 포트에서 /metrics 제공
+    - live_port: 지정하면 좌석 i가 live_port + i 포트에서 실시간 상태(/state, /ws) 제공
+    """
+    # fork 대신 spawn: MediaPipe/OpenCV 내부 스레드 상태를 복제하지 않도록 좌석마다 새 인터프리터 사용
+    ctx = mp_proc.get_context("spawn")
+    stats_queue = ctx.Queue()
+    stop_event = ctx.Event()
+    cpu_count = os.cpu_count() or 1
+
+    workers = []
+    for i, (name, source) in enumerate(seats):
+        cpu = i % cpu_count if pin_cpus else None
+        p = ctx.Process(
+            target=_seat_worker,
+            args=(name, source, cpu, name in muted, headless, trace, profile_startup,
+                  None if metrics_port is None else metrics_port + i,
+                  None if live_port is None else live_port + i, stats_queue, stop_event),
+            name=f"seat-{name}",
+            daemon=True,
+        )
+        p.start()
+        workers.append(p)
+        print(f"✅ [{name}] worker started (pid={p.pid}, source={source})")
+
+    totals = {name: 0 for name, _ in seats}
+    window_frames = {name: 0 for name, _ in seats}
+    window_secs = {name: 0.0 for name, _ in seats}
+    last_seen = {name: time.time() for name, _ in seats}   # 좌석별 마지막 처리량 보고 시각
+    exit_codes = {}                                         # 종료된 좌석 → 프로세스 종료 코드
+    last_report = time.time()
+
+    try:
+        while any(p.is_alive() for p in workers):
+            try:
+                seat_name, frames, elapsed = stats_queue.get(timeout=0.5)
+                totals[seat_name] += frames
+                window_frames[seat_name] = frames
+                window_secs[seat_name] = elapsed
+                last_seen[seat_name] = time.time()
+            except queue.Empty:
+                pass
+
+            # 종료된 좌석이나 STATS_INTERVAL_SEC의 2배 동안 보고가 없는 좌석은 이전 처리량을 합산하지 않음
+            now = time.time()
+            for (name, _), p in zip(seats, workers):
+                if name not in exit_codes and not p.is_alive():
+                    exit_codes[name] = p.exitcode
+                    print(f"{'✅' if p.exitcode == 0 else '🚨'} [{name}] worker exited (code={p.exitcode})")
+                if name in exit_codes or now - last_seen[name] > 2 * STATS_INTERVAL_SEC:
+                    window_frames[name], window_secs[name] = 0, 0.0
+
+            if now - last_report >= STATS_INTERVAL_SEC:
+                _print_throughput(totals, window_frames, window_secs, exit_codes)
+                last_report = now
+    except KeyboardInterrupt:
+        print("Stopping all seats...")
+    finally:
+        stop_event.set()
+        for p in workers:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+                p.join(timeout=1)
+
+    print("📊 Final per-seat frame counts: " + ", ".join(f"{k}={v}" for k, v in totals.items()))
+    print("📊 Worker exit codes: " + ", ".join(f"{name}={p.exitcode}" for (name, _), p in zip(seats, workers)))
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Posture Guardian - 멀티 좌석 모니터링")
+    parser.add_argument("sources", nargs="+", help="좌석 목록 ('name=source' 또는 'source', source는 RTSP URL/파일/카메라 번호)")
+    parser.add_argument("--mute", nargs="*", default=[], help="경고음을 끌 좌석 이름")
+    parser.add_argument("--headless", action="store_true", default=True,
+                        help="좌석별 창 출력/그리기 없이 추론만 실행 (기본값, run_multi_seat과 같음)")
+    parser.add_argument("--show", dest="headless", action="store_false", help="좌석마다 화면 창 표시")
+    parser.add_argument("--no-pin", action="store_true", help="워커 프로세스를 CPU 코어에 고정하지 않음")
+    parser.add_argument("--trace", action="store_true", help="좌석별 프레임 랜드마크/자세 수치 기록")
+    parser.add_argument("--profile-startup", action="store_true", help="좌석별 시작 단계 소요 시간 출력")
+    parser.add_argument("--metrics-port", type=int, default=None, help="첫 좌석의 /metrics 포트 (다음 좌석은 +1씩)")
+    parser.add_argument("--live-port", type=int, default=None, help="첫 좌석의 실시간 상태 API 포트 (다음 좌석은 +1씩)")
+    args = parser.parse_args()
+
+    run_multi_seat(
+        parse_seats(args.sources),
+        muted=set(args.mute),
+        headless=args.headless,
+        pin_cpus=not args.no_pin,
+        trace=args.trace,
+        profile_startup=args.profile_startup,
+        metrics_port=args.metrics_port,
+        live_port=args.live_port,
+    )
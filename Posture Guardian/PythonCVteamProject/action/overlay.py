@@ -0,0 +1,120 @@
+# overlay.py
+# 목적: 화면 안내 메시지를 프레임 전체 변환 없이 그리는 텍스트 스프라이트 합성기
+# Workflow: 텍스트를 고정 문구 조각과 숫자 조각으로 나눔 (예: "목 각도 " + "142.3")
+#           → 고정 문구는 (조각, 색상)마다, 숫자는 글자(0-9 . :)마다 PIL로 알파 마스크 스프라이트를 한 번만 생성 → LRU 캐시에 보관
+#           → 프레임에는 스프라이트 영역만 알파 블렌딩 (제자리 수정, 전체 프레임 복사 없음)
+#           (카운트다운/측정값처럼 매 프레임 바뀌는 숫자도 캐시 미스 없이 그려짐)
+
+import re
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw
+
+from config import OVERLAY_CACHE_SIZE
+
+_NUMBER_RUN = re.compile(r"(\d[\d.:]*)")   # split 결과의 홀수 번째 조각이 숫자
+
+
+class TextSprite:
+    """미리 래스터화된 텍스트 한 줄 (알파 마스크 + 색상 전경)"""
+
+    def __init__(self, offset, inv_alpha, foreground, advance):
+        self.offset = offset          # 그리기 위치 기준 좌상단 오프셋 (dx, dy)
+        self.advance = advance        # 다음 조각을 그릴 가로 이동량 (픽셀, 소수 포함)
+        self.inv_alpha = inv_alpha    # (h, w, 1) float32, 1 - alpha
+        self.foreground = foreground  # (h, w, 3) float32, color * alpha + 0.5 (미리 곱한 전경)
+
+    @property
+    def shape(self):
+        return self.inv_alpha.shape[:2]
+
+
+class OverlayCompositor:
+    """
+    텍스트 스프라이트 LRU 캐시 + 제자리 알파 블렌딩.
+    PIL 폰트(한글 포함)로 래스터화하므로 draw_text_with_pil과 같은 글꼴로 그려집니다.
+    """
+
+    def __init__(self, font, cache_size=OVERLAY_CACHE_SIZE):
+        self.font = font
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+        # 통계
+        self.hits = 0
+        self.misses = 0
+
+    def _rasterize(self, text, color_bgr):
+        """텍스트를 알파 마스크로 그려 TextSprite 생성 (캐시 미스 때만 호출)"""
+        left, top, right, bottom = self.font.getbbox(text)
+        w, h = max(1, right - left), max(1, bottom - top)
+        mask = Image.new("L", (w, h), 0)
+        ImageDraw.Draw(mask).text((-left, -top), text, font=self.font, fill=255)
+
+        alpha = np.asarray(mask, dtype=np.float32)[:, :, np.newaxis] / 255.0
+        color = np.asarray(color_bgr, dtype=np.float32).reshape(1, 1, 3)
+        # +0.5: 블렌딩 결과를 uint8로 자를 때 반올림이 되도록 미리 더해 둠
+        return TextSprite((left, top), 1.0 - alpha, alpha * color + 0.5, self.font.getlength(text))
+
+    def sprite(self, text, color_bgr):
+        """캐시에서 스프라이트 조회 (없으면 생성 후 저장, 오래된 것부터 제거)"""
+        key = (text, tuple(color_bgr))
+        sprite = self._cache.get(key)
+        if sprite is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return sprite
+
+        self.misses += 1
+        sprite = self._rasterize(text, color_bgr)
+        self._cache[key] = sprite
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return sprite
+
+    def draw_text(self, frame, text, position, color_bgr):
+        """frame의 스프라이트 영역에만 텍스트를 블렌딩 (제자리 수정, 숫자는 글자 스프라이트를 이어 붙임)"""
+        if self.font is None: # 폰트 로드 실패 시, OpenCV 기본 글꼴 사용
+            cv2.putText(frame, text, position, cv2.FONT_HERSHEY_SIMPLEX, 0.7, color_bgr, 2)
+            return frame
+
+        x, y = position
+        for i, part in enumerate(_NUMBER_RUN.split(text)):
+            if not part:
+                continue
+            for piece in (part if i % 2 else (part,)):
+                sprite = self.sprite(piece, color_bgr)
+                self._blend(frame, sprite, x, y)
+                x += sprite.advance
+        return frame
+
+    def _blend(self, frame, sprite, x, y):
+        """스프라이트 하나를 (x, y) 기준으로 블렌딩"""
+        h, w = sprite.shape
+        x0 = round(x) + sprite.offset[0]
+        y0 = y + sprite.offset[1]
+
+        # 프레임 밖으로 나가는 부분은 잘라냄
+        frame_h, frame_w = frame.shape[:2]
+        sx0, sy0 = max(0, -x0), max(0, -y0)
+        sx1, sy1 = min(w, frame_w - x0), min(h, frame_h - y0)
+        if sx1 <= sx0 or sy1 <= sy0:
+            return
+
+        roi = frame[y0 + sy0:y0 + sy1, x0 + sx0:x0 + sx1]
+        blended = roi * sprite.inv_alpha[sy0:sy1, sx0:sx1] + sprite.foreground[sy0:sy1, sx0:sx1]
+        np.copyto(roi, blended, casting="unsafe")
+
+    def darken_band(self, frame, y0, y1, alpha=0.5):
+        """frame의 [y0, y1) 가로 띠를 검은색 반투명으로 어둡게 (제자리 수정, 전체 프레임 복사 없음)"""
+        band = frame[y0:y1]
+        cv2.convertScaleAbs(band, dst=band, alpha=1.0 - alpha)
+        return frame
+
+    def stats(self):
+        """캐시 적중률"""
+        total = self.hits + self.misses
+        return {"sprites": len(self._cache), "hits": self.hits, "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0}
@@ -0,0 +1,153 @@
+# pipeline.py
+# 목적: 캡처 → 추론 → 분석 → 렌더링 단계를 각각 다른 스레드에서 동시에 실행 (선택 실행 모드, main.py --pipeline)
+#       → 프레임 N을 추론하는 동안 프레임 N-1을 분석/그리기 해서 멀티코어 CPU에서 처리량(FPS) 향상
+# Workflow: VideoStream(캡처 스레드) → [추론 스레드] PostureEngine.infer() → 큐 → [분석 스레드] PostureEngine.analyze()
+#           → 큐 → [호출한 스레드] get()으로 결과를 받아 렌더링/cv2.imshow
+#           (단계 사이 큐는 작은 크기 + 가득 차면 가장 오래된 프레임을 버림 → 지연이 끝없이 늘어나지 않음)
+
+import threading
+import time
+from collections import deque
+
+from config import PIPELINE_QUEUE_SIZE, FRAME_WAIT_TIMEOUT_SEC
+
+
+class DropOldestQueue:
+    """가득 차면 가장 오래된 항목을 버리는 작은 큐 (버린 개수는 dropped로 집계)"""
+
+    def __init__(self, maxsize=PIPELINE_QUEUE_SIZE):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self.closed = False
+
+        # 통계
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1  # deque(maxlen)이 가장 오래된 항목을 자동으로 밀어냄
+            self._items.append(item)
+            self.put_count += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """가장 오래된 항목 반환. timeout 안에 없거나 close()되었으면 None"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self.closed, timeout)
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+
+def pipeline_buffers(queue_size=PIPELINE_QUEUE_SIZE):
+    """
+    파이프라인 모드에서 필요한 전처리 버퍼 세트 수.
+    추론 중 1 + 분석 큐 + 분석 중 1 + 렌더 큐 + 렌더링 중 1 (렌더러가 result.frame에 제자리로 그리므로
+    아직 그리는 중인 프레임의 버퍼를 추론 스레드가 덮어쓰면 안 됨) + 여유 1.
+    버퍼는 순서대로 돌려 쓰므로, 렌더링이 추론보다 훨씬 느려지면(창 이동 등) 그리는 중인 프레임이 덮어써져
+    한 프레임이 섞여 보일 수 있음 (결과 수치에는 영향 없음)
+    """
+    return 2 * queue_size + 4
+
+
+class PosturePipeline:
+    """
+    PostureEngine의 infer()/analyze()를 각각 전용 스레드에서 실행하는 파이프라인.
+    - engine은 preprocess_buffers=pipeline_buffers()로 만들어야 함
+    - 결과는 get()으로 받음 (캡처 시각 timestamp가 그대로 실려 있어 끝단 지연을 계산할 수 있음)
+    """
+
+    def __init__(self, engine, cap, queue_size=PIPELINE_QUEUE_SIZE):
+        self.engine = engine
+        self.cap = cap
+        self._analysis_queue = DropOldestQueue(queue_size)
+        self._output_queue = DropOldestQueue(queue_size)
+        self._stop = threading.Event()
+        self._threads = []
+
+        # 통계
+        self.inferred_frames = 0
+        self.analyzed_frames = 0
+        self.delivered = 0
+        self.latency_sum = 0.0   # 캡처 → get() 반환까지 걸린 시간 합 (초)
+        self.latency_max = 0.0
+
+    @property
+    def stopped(self):
+        return self._stop.is_set()
+
+    def start(self):
+        for name, target in (("inference", self._inference_loop), ("analysis", self._analysis_loop)):
+            thread = threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _inference_loop(self):
+        """[추론 스레드] 새 프레임 → 전처리 + 포즈/손 추론 → 분석 큐"""
+        try:
+            while not self._stop.is_set():
+                ret, frame, seq, capture_time = self.cap.read_new(timeout=FRAME_WAIT_TIMEOUT_SEC)
+                if not ret or frame is None:
+                    if self.cap.stopped:
+                        break
+                    continue
+                self._analysis_queue.put(self.engine.infer(frame, capture_time))
+                self.inferred_frames += 1
+
+                # 부재 모드에서는 캡처 스레드가 디코드 자체를 줄이도록 알림
+                scheduler = self.engine.scheduler
+                self.cap.set_idle(scheduler.idle_delay() if scheduler else 0.0)
+        finally:
+            self._stop.set()
+            self._analysis_queue.close()
+
+    def _analysis_loop(self):
+        """[분석 스레드] 추론 결과 → 제스처/자세 분석 + Stage 상태 머신 → 출력 큐"""
+        try:
+            while True:
+                result = self._analysis_queue.get()
+                if result is None:
+                    break  # 추론 스레드 종료
+                self._output_queue.put(self.engine.analyze(result))
+                self.analyzed_frames += 1
+        finally:
+            self._output_queue.close()
+
+    def get(self, timeout=None):
+        """분석이 끝난 PostureResult 1개 (timeout 안에 없거나 파이프라인이 끝났으면 None)"""
+        result = self._output_queue.get(timeout)
+        if result is not None:
+            latency = time.monotonic() - result.timestamp
+            self.delivered += 1
+            self.latency_sum += latency
+            self.latency_max = max(self.latency_max, latency)
+        return result
+
+    def stop(self, timeout=2.0):
+        """모든 단계 종료 (진행 중인 추론이 끝날 때까지 최대 timeout초 대기)"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._analysis_queue.close()
+        self._output_queue.close()
+
+    def stats(self):
+        """단계별 처리/누락 프레임 수, 캡처 → 결과 전달 지연"""
+        return {
+            "inferred": self.inferred_frames,
+            "analyzed": self.analyzed_frames,
+            "delivered": self.delivered,
+            "dropped_before_analysis": self._analysis_queue.dropped,
+            "dropped_before_render": self._output_queue.dropped,
+            "latency_avg_ms": round(self.latency_sum / self.delivered * 1000, 1) if self.delivered else 0.0,
+            "latency_max_ms": round(self.latency_max * 1000, 1),
+        }
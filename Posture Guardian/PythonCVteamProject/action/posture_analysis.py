@@ -1,11 +1,108 @@
 # posture_analysis.py
 # 목적: MediaPipe Pose 랜드마크를 이용해 자세 각도 계산
-# Workflow: calculate_angle_2d()로 세 점의 각도를 구해 자세 판별에 활용
+# Workflow: landmarks_to_array()로 랜드마크를 (33, 4) 배열로 변환 → compute_posture_metrics()로
+#           거북목 각도 / 허리 기울임 각도 / 구부정 비율 / visibility 마스크를 한 번에 계산
+#           (한 프레임 (33, 4) 또는 녹화 세션 전체 (frames, 33, 4) 모두 같은 함수로 처리)
 
 import numpy as np
 
+from config import SLOUCH_MIN_TORSO_HEIGHT, VISIBILITY_THRESHOLD
+
+# MediaPipe Pose 랜드마크 인덱스 (mp.solutions.pose.PoseLandmark와 동일)
+NUM_POSE_LANDMARKS = 33
+NOSE = 0
+LEFT_EAR = 7
+RIGHT_EAR = 8
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_ELBOW = 13
+RIGHT_ELBOW = 14
+LEFT_WRIST = 15
+RIGHT_WRIST = 16
+LEFT_HIP = 23
+RIGHT_HIP = 24
+
+# 카메라 세팅(Stage 1) 시 반드시 보여야 하는 랜드마크
+BODY_LANDMARKS = [NOSE, LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP]
+
+
+def landmarks_to_array(pose_landmarks, out=None):
+    """MediaPipe pose_landmarks → (33, 4) float32 배열 [x, y, z, visibility]"""
+    if out is None:
+        out = np.empty((NUM_POSE_LANDMARKS, 4), dtype=np.float32)
+    for i, lm in enumerate(pose_landmarks.landmark):
+        out[i] = (lm.x, lm.y, lm.z, lm.visibility)
+    return out
+
+
+def compute_posture_metrics(landmarks, visibility_threshold=VISIBILITY_THRESHOLD):
+    """
+    랜드마크 배열로 자세 수치를 한 번에 계산합니다.
+    - landmarks: (33, 4) 한 프레임 또는 (frames, 33, 4) 여러 프레임
+    - 반환 dict (여러 프레임이면 길이 frames 배열, 한 프레임이면 스칼라):
+        neck_angle    : 귀-어깨-엉덩이 각도 (계산 불가 시 NaN)
+        lean_angle    : 엉덩이→어깨 벡터의 기울기 각도
+        slouch_ratio  : 몸통 수평/수직 거리 비율 (몸통 높이가 너무 작으면 NaN)
+        shoulder_tilt : 양 어깨를 잇는 선이 수평에서 기운 각도 (좌우 비대칭)
+        head_tilt     : 양 귀를 잇는 선이 수평에서 기운 각도 (고개 옆으로 기울임)
+        visible       : 랜드마크별 visibility > 기준값 마스크 ((frames,) 33)
+        body_visible  : 코/양 어깨/양 엉덩이가 모두 보이는지 여부
+    """
+    lm = np.asarray(landmarks, dtype=np.float64)
+    single = lm.ndim == 2
+    if single:
+        lm = lm[np.newaxis]
+
+    ear = lm[:, LEFT_EAR, :2]
+    shoulder = lm[:, LEFT_SHOULDER, :2]
+    hip = lm[:, LEFT_HIP, :2]
+
+    # --- 거북목 각도 (귀-어깨-엉덩이) ---
+    ba = ear - shoulder
+    bc = hip - shoulder
+    dot = np.einsum("ij,ij->i", ba, bc)
+    norm_sq = np.einsum("ij,ij->i", ba, ba) * np.einsum("ij,ij->i", bc, bc)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cosine_angle = dot / np.sqrt(norm_sq)
+        neck_angle = np.degrees(np.arccos(np.clip(cosine_angle, -1.0, 1.0)))
+
+    # --- 허리 기울임 각도 (화면 y축은 아래 방향이므로 부호 반전) ---
+    dx = shoulder[:, 0] - hip[:, 0]
+    dy = -(shoulder[:, 1] - hip[:, 1])
+    lean_angle = np.degrees(np.arctan2(dy, dx))
+
+    # --- 구부정 비율 ---
+    torso_h = np.abs(dx)
+    torso_v = np.abs(dy)
+    valid_torso = torso_v > SLOUCH_MIN_TORSO_HEIGHT
+    slouch_ratio = np.full(torso_v.shape, np.nan)
+    np.divide(torso_h, torso_v, out=slouch_ratio, where=valid_torso)
+
+    # --- 좌우 기울기 (어깨선 / 귀선, 0 = 수평) ---
+    shoulder_line = lm[:, RIGHT_SHOULDER, :2] - shoulder
+    ear_line = lm[:, RIGHT_EAR, :2] - ear
+    shoulder_tilt = np.degrees(np.arctan2(np.abs(shoulder_line[:, 1]), np.abs(shoulder_line[:, 0])))
+    head_tilt = np.degrees(np.arctan2(np.abs(ear_line[:, 1]), np.abs(ear_line[:, 0])))
+
+    visible = lm[:, :, 3] > visibility_threshold
+    body_visible = visible[:, BODY_LANDMARKS].all(axis=1)
+
+    metrics = {
+        "neck_angle": neck_angle,
+        "lean_angle": lean_angle,
+        "slouch_ratio": slouch_ratio,
+        "shoulder_tilt": shoulder_tilt,
+        "head_tilt": head_tilt,
+        "visible": visible,
+        "body_visible": body_visible,
+    }
+    if single:
+        metrics = {k: v[0] for k, v in metrics.items()}
+    return metrics
+
+
 def calculate_angle_2d(a, b, c):
-    """세 랜드마크 좌표로 각도 계산"""
+    """세 랜드마크 좌표로 각도 계산 (단일 각도용, 프레임 분석은 compute_posture_metrics 사용)"""
     try:
         p_a = np.array([a.x, a.y])
         p_b = np.array([b.x, b.y])
@@ -16,4 +113,4 @@ def calculate_angle_2d(a, b, c):
         angle_rad = np.arccos(np.clip(cosine_angle, -1.0, 1.0))
         return np.degrees(angle_rad)
     except:
-        return None
\ No newline at end of file
+        return None
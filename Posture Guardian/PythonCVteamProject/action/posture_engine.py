@@ -0,0 +1,437 @@
+# posture_engine.py
+# 목적: 화면 출력과 분리된 자세 모니터링 엔진 (Stage 1~3 상태 머신)
+# Workflow: PostureEngine 생성 → 프레임마다 process(frame, timestamp) 호출 → PostureResult(단계, 수치, 경고, 안내 메시지) 반환
+#           → (선택) renderer.PostureRenderer로 화면에 그리기
+
+import threading
+import time
+from dataclasses import dataclass, field
+
+import cv2
+import numpy as np
+import mediapipe as mp
+
+from config import *
+from gesture_utils import detect_gesture
+from posture_analysis import (
+    compute_posture_metrics, landmarks_to_array,
+    NOSE, LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP,
+)
+from logger import log_event, log_duration
+from audio_utils import play_alert
+from state_manager import StateManager
+from posture_rules import PostureRuleSet
+from inference_scheduler import InferenceScheduler
+from hand_detector import HandGestureDetector
+from frame_preprocessor import FramePreprocessor
+from roi_tracker import PoseRoiTracker, remap_landmarks
+from landmark_filter import LandmarkPredictor, write_landmarks
+
+mp_pose = mp.solutions.pose
+
+
+@dataclass
+class PostureResult:
+    """process() 한 번의 결과 (렌더링/로그/외부 API가 공통으로 사용)"""
+    timestamp: float
+    stage: int
+    frame: np.ndarray = None              # 좌우반전/리사이즈된 BGR 프레임 (렌더링용)
+    pose_ok: bool = False                 # Stage 1 카메라 세팅 조건 충족 여부
+    pose_landmarks: object = None         # MediaPipe pose_landmarks (없으면 None, 랜드마크 그리기용)
+    landmarks: np.ndarray = None          # (33, 4) 배열 [x, y, z, visibility] (없으면 None)
+    hand_landmarks: list = field(default_factory=list)
+    gesture: str = None                   # "PALM" / "VICTORY" / "FIST" / None (감지된 모든 손 중 여유값이 가장 큰 제스처)
+    gesture_margin: float = 0.0           # 제스처 조건 여유값 (손 크기 대비, gesture_utils.gesture_margins)
+    metrics: dict = field(default_factory=dict)    # neck_angle, lean_angle, slouch_ratio (compute_posture_metrics 결과)
+    warnings: list = field(default_factory=list)   # 이번 프레임에 활성화된 경고 이벤트 이름
+    events: list = field(default_factory=list)     # 이번 프레임에 새로 기록된 (event_type, value)
+    messages: list = field(default_factory=list)   # 화면 안내 메시지 (Stage/경고/가이드)
+    stretch_alert: bool = False           # 스트레칭 배너 표시 여부
+    timings: dict = field(default_factory=dict)    # 단계별 처리 시간(초): preprocess, pose, hands, analysis
+    inferred: bool = True                 # 이번 프레임에서 추론을 실행했는지 (False면 직전 랜드마크 재사용)
+    fps: float = 0.0                      # 엔진이 실제로 분석하고 있는 초당 프레임 수 (PostureEngine.fps)
+
+
+class PostureEngine:
+    """
+    카메라 프레임을 받아 포즈/제스처 분석과 Stage 1~3 상태 머신을 실행하는 클래스.
+    cv2.imshow, PIL 렌더링에 의존하지 않으므로 헤드리스 환경이나 다른 모듈에서 import하여 사용할 수 있습니다.
+    """
+
+    def __init__(self, log_filename=LOG_FILENAME, alert=play_alert, seat_name=None,
+                 motion_gate=MOTION_GATE_ENABLED, pose_roi=POSE_ROI_ENABLED, trace_recorder=None,
+                 preprocess_buffers=PREPROCESS_BUFFERS, predict_fps=LANDMARK_PREDICTION_FPS, rules=POSTURE_RULES):
+        self.log_filename = log_filename
+        self.alert = alert
+        self.seat_label = f"[{seat_name}] " if seat_name else ""
+
+        # MediaPipe 모델 초기화
+        self.pose = mp_pose.Pose(
+            min_detection_confidence=POSE_MIN_DETECTION_CONFIDENCE,
+            min_tracking_confidence=POSE_MIN_TRACKING_CONFIDENCE
+        )
+        # Hands 모델은 Stage 2/3에서 손을 들었을 때 처음 생성 (HandGestureDetector)
+        self.hand_detector = HandGestureDetector()
+
+        # 전처리 출력 버퍼 (매 프레임 새로 할당하지 않음, 파이프라인 모드는 동시에 처리 중인 프레임 수만큼)
+        self.preprocessor = FramePreprocessor(buffers=preprocess_buffers)
+
+        # 사람 영역(ROI)만 잘라서 포즈 추론 (같은 추적 모드 self.pose에 고정된 ROI를 계속 넣음, roi_tracker 참고)
+        self.roi_tracker = PoseRoiTracker() if pose_roi else None
+
+        # 움직임 기반 추론 생략 (정지/부재 시 직전 결과 재사용)
+        self.scheduler = InferenceScheduler() if motion_gate else None
+        self._last_pose_results = None
+        self._last_hand_landmarks = None
+
+        # 랜드마크 예측: predict_fps 주기로만 포즈 추론하고 그 사이 프레임은 One Euro 필터로 예측
+        self.predictor = LandmarkPredictor() if predict_fps else None
+        self.pose_interval = 1.0 / predict_fps if predict_fps else 0.0
+        self._last_pose_time = None
+
+        # (선택) 추론한 프레임의 랜드마크/수치 기록 (trace_recorder.TraceRecorder)
+        self.trace_recorder = trace_recorder
+
+        self.rules = PostureRuleSet(rules)   # Stage 3 나쁜 자세 규칙 (기본 config.POSTURE_RULES, 보정 결과는 calibrate.load_calibration)
+        self.state = StateManager(len(self.rules))
+        # 현재 Stage: 파이프라인 모드에서는 분석 스레드가 바꾸고 추론 스레드가 읽으므로 잠금으로 보호 (current_stage 참고)
+        self._stage_lock = threading.Lock()
+        self._current_stage = 1
+
+        # --- 실측 처리 속도 / 프레임 간격 (나쁜 자세 지속 시간은 프레임 timestamp 간격으로 누적) ---
+        self.fps = 0.0                 # 최근 FPS_WINDOW_SEC 동안 실제로 분석한 초당 프레임 수
+        self.frame_dt = 0.0            # 직전 분석 프레임과의 간격(초)
+        self._last_frame_time = None
+        self._fps_window_start = None
+        self._fps_window_frames = 0
+
+        # --- 스트레칭 알림 타이머 (첫 프레임의 timestamp 기준으로 시작) ---
+        self.stretch_last_time = None
+        self.stretch_alert_until = 0.0
+
+    def warm_up(self):
+        """
+        빈 프레임으로 Pose 그래프를 미리 실행해 첫 실제 프레임의 초기화 지연을 없앰.
+        (ROI를 쓰면 ROI 입력 크기도 한 번 실행. Hands는 손을 들 때까지 만들지 않음)
+        """
+        self.pose.process(np.zeros((FRAME_HEIGHT, FRAME_WIDTH, 3), np.uint8))
+        if self.roi_tracker is not None:
+            roi_w, roi_h = self.roi_tracker.input_size
+            self.pose.process(np.zeros((roi_h, roi_w, 3), np.uint8))
+
+    @property
+    def current_stage(self):
+        """현재 Stage (1~3). infer()/analyze()가 다른 스레드에서 실행되어도 안전하게 읽고 씀"""
+        with self._stage_lock:
+            return self._current_stage
+
+    @current_stage.setter
+    def current_stage(self, stage):
+        with self._stage_lock:
+            self._current_stage = stage
+
+    def close(self):
+        """MediaPipe 모델 해제 + 기록 파일 닫기"""
+        self.pose.close()
+        self.hand_detector.release()
+        if self.trace_recorder is not None:
+            self.trace_recorder.close()
+
+    # === 전처리 + 추론 ===
+    def preprocess(self, frame):
+        """좌우반전 + 리사이즈 후 (BGR 프레임, RGB 이미지) 반환 (미리 할당한 버퍼 재사용)"""
+        return self.preprocessor.process(frame)
+
+    def process(self, frame, timestamp=None):
+        """
+        프레임 1장을 분석하고 PostureResult를 반환합니다 (infer → analyze를 순서대로 실행).
+        timestamp를 주지 않으면 time.time()을 사용합니다 (녹화 영상 재생 시에는 영상 시각을 전달).
+        """
+        return self.analyze(self.infer(frame, timestamp))
+
+    def infer(self, frame, timestamp=None):
+        """
+        전처리 + 포즈/손 추론 단계. 랜드마크와 단계별 시간만 채운 PostureResult 반환.
+        (pipeline.PosturePipeline에서는 추론 스레드가 호출. 모델/전처리 버퍼/ROI 추적기는 이 단계만 사용)
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        stage = self.current_stage   # 이 프레임 동안 같은 Stage로 판단 (분석 스레드가 도중에 바꿀 수 있음)
+        if stage == 1:
+            # Stage 1에서는 손 제스처를 쓰지 않으므로 Hands 모델 해제
+            self.hand_detector.release()
+        t0 = time.perf_counter()
+        frame, image_rgb = self.preprocess(frame)
+        result = PostureResult(timestamp=timestamp, stage=stage, frame=frame)
+        # 예측 모드: 추론 주기가 되지 않았으면 추론하지 않음 (카메라 프레임 간격 오차를 고려해 주기의 90%부터 허용)
+        due = self._last_pose_time is None or timestamp - self._last_pose_time >= self.pose_interval * 0.9
+        # (움직임 판단은 축소 흑백 프레임 비교라 전처리 시간에 포함)
+        result.inferred = due and (self.scheduler is None or self.scheduler.should_infer(frame, timestamp))
+        t1 = time.perf_counter()
+        result.timings["preprocess"] = t1 - t0
+
+        if result.inferred:
+            pose_results = self._last_pose_results = self._infer_pose(image_rgb)
+            self._last_pose_time = timestamp
+            t2 = time.perf_counter()
+            result.timings["pose"] = t2 - t1
+        else:
+            # 움직임이 없으면 직전 추론 결과 재사용
+            pose_results = self._last_pose_results
+            t2 = time.perf_counter()
+
+        if pose_results.pose_landmarks:
+            result.pose_landmarks = pose_results.pose_landmarks
+            if self.predictor is None:
+                result.landmarks = landmarks_to_array(pose_results.pose_landmarks)
+            elif result.inferred:
+                result.landmarks = self.predictor.update(landmarks_to_array(pose_results.pose_landmarks), timestamp)
+            else:
+                # 추론하지 않은 프레임: 예측 위치로 분석하고, 그리기용 랜드마크도 예측 위치로 복사본을 만듦
+                result.landmarks = self.predictor.predict(timestamp)
+                result.pose_landmarks = type(pose_results.pose_landmarks)()
+                result.pose_landmarks.CopyFrom(pose_results.pose_landmarks)
+                write_landmarks(result.pose_landmarks, result.landmarks)
+        elif self.predictor is not None and result.inferred:
+            self.predictor.reset()
+        if self.roi_tracker is not None and result.inferred:
+            self.roi_tracker.update(result.landmarks, image_rgb.shape[1], image_rgb.shape[0])
+
+        # 손 제스처 감지 (Stage 2/3에서 손을 들었을 때만 손 주변 ROI로 추론)
+        if stage in [2, 3]:
+            if result.inferred or self._last_hand_landmarks is None:
+                hands_inferred = self.hand_detector.inferred
+                self._last_hand_landmarks = self.hand_detector.detect(image_rgb, result.landmarks)
+                if self.hand_detector.inferred != hands_inferred:
+                    result.timings["hands"] = time.perf_counter() - t2
+            result.hand_landmarks = self._last_hand_landmarks
+        else:
+            self._last_hand_landmarks = None
+
+        if self.scheduler is not None and result.inferred:
+            self.scheduler.record_inference(timestamp, pose_results.pose_landmarks is not None,
+                                            time.perf_counter() - t1)
+        return result
+
+    def analyze(self, result):
+        """
+        제스처 판정 + 자세 분석 + Stage 1~3 상태 머신 단계 (infer() 결과를 채워서 반환).
+        (pipeline.PosturePipeline에서는 분석 스레드가 호출. StateManager/타이머/로그는 이 단계만 사용)
+        """
+        timestamp = result.timestamp
+        if self.stretch_last_time is None:
+            self.stretch_last_time = timestamp
+        self._update_frame_clock(timestamp)
+
+        if result.hand_landmarks:
+            result.gesture, result.gesture_margin = detect_gesture(result.hand_landmarks)
+
+        t3 = time.perf_counter()
+        adjustment_messages = self._check_position(result)
+        if self.trace_recorder is not None and result.inferred and result.landmarks is not None:
+            self.trace_recorder.record(timestamp, result.landmarks, result.metrics)
+        self._update_stage(result, adjustment_messages, timestamp)
+        result.stage = self.current_stage
+        result.stretch_alert = timestamp < self.stretch_alert_until
+        result.fps = self.fps
+        result.timings["analysis"] = time.perf_counter() - t3
+        return result
+
+    def _update_frame_clock(self, timestamp):
+        """
+        직전 분석 프레임과의 간격(frame_dt)과 실측 FPS 갱신.
+        간격은 DURATION_MAX_FRAME_GAP_SEC까지만 인정 (영상 끊김/일시 정지 동안 지속 시간이 튀지 않도록)
+        """
+        if self._last_frame_time is None:
+            self.frame_dt = 0.0
+            self._fps_window_start = timestamp
+        else:
+            self.frame_dt = min(max(timestamp - self._last_frame_time, 0.0), DURATION_MAX_FRAME_GAP_SEC)
+            self._fps_window_frames += 1
+            elapsed = timestamp - self._fps_window_start
+            if elapsed >= FPS_WINDOW_SEC:
+                self.fps = self._fps_window_frames / elapsed
+                self._fps_window_start = timestamp
+                self._fps_window_frames = 0
+        self._last_frame_time = timestamp
+
+    def _infer_pose(self, image_rgb):
+        """
+        포즈 추론. 추적 중이면 사람 영역만 잘라 작은 고정 크기로 추론하고 랜드마크를 전체 프레임 좌표로 되돌림.
+        잘라낸 영역에서 사람을 놓치면 같은 프레임을 전체 화면으로 다시 추론.
+        (ROI는 사람이 경계에 가까워질 때만 옮겨지므로 추적 그래프는 대부분의 프레임에서 같은 좌표계의 입력을 받음)
+        """
+        if self.roi_tracker is None:
+            return self.pose.process(image_rgb)
+
+        pose_input, roi = self.roi_tracker.crop(image_rgb)
+        pose_results = self.pose.process(pose_input)
+        if roi is None:
+            return pose_results
+        if pose_results.pose_landmarks:
+            remap_landmarks(pose_results.pose_landmarks, roi, image_rgb.shape[1], image_rgb.shape[0])
+            return pose_results
+
+        self.roi_tracker.reset()
+        pose_input, _ = self.roi_tracker.crop(image_rgb)
+        return self.pose.process(pose_input)
+
+    def _check_position(self, result):
+        """자세 수치 계산 후 카메라 위치 가이드 (중앙/상하/거리 정렬) 안내 메시지 목록 반환"""
+        adjustment_messages = []
+        if result.landmarks is None:
+            adjustment_messages.append("[GUIDE] Please stand in front of the camera.")
+            return adjustment_messages
+
+        lm = result.landmarks
+        result.metrics = compute_posture_metrics(lm)
+
+        # 랜드마크가 화면에 잘 보이는지 (visibility) 확인
+        if result.metrics["body_visible"]:
+
+            # 1. 중앙 정렬
+            shoulder_center_x = (lm[LEFT_SHOULDER, 0] + lm[RIGHT_SHOULDER, 0]) / 2
+            if not (0.5 - CENTER_TOLERANCE < shoulder_center_x < 0.5 + CENTER_TOLERANCE):
+                adj_msg = "RIGHT" if shoulder_center_x < 0.5 else "LEFT"
+                adjustment_messages.append(f"[ADJUST] Please move {adj_msg}")
+
+            # 2. 상하/거리 정렬
+            if lm[NOSE, 1] < HEAD_ROOM_Y:
+                adjustment_messages.append("[ADJUST] Too close (move DOWN/BACK)")
+            elif (lm[LEFT_HIP, 1] > HIP_ROOM_Y or lm[RIGHT_HIP, 1] > HIP_ROOM_Y):
+                adjustment_messages.append("[ADJUST] Too far (move UP/CLOSER)")
+
+            # 3. 모든 조정 메시지가 없으면 -> 자세 OK
+            if not adjustment_messages:
+                result.pose_ok = True
+
+        else:
+            adjustment_messages.append("[ERROR] Body not fully visible.")
+        return adjustment_messages
+
+    # === Stage 로직 ===
+    def _update_stage(self, result, adjustment_messages, now):
+        state = self.state
+        display_messages = []
+        if self.current_stage == 1:
+            # Stage 1: 카메라 세팅 (HOLD_DURATION 유지)
+            if result.pose_ok:
+                if state.ok_start_time is None:
+                    state.ok_start_time = now
+                elapsed = now - state.ok_start_time
+                if elapsed >= HOLD_DURATION:
+                    self.current_stage = 2
+                    state.reset()
+                    display_messages = ["[ STAGE 2 ] Show Palm to START"]
+                else:
+                    display_messages.append(f"[ OK ] Hold for {HOLD_DURATION - elapsed:.1f}s")
+            else:
+                state.ok_start_time = None
+                display_messages = adjustment_messages # 상세 가이드 메시지 표시
+
+        elif self.current_stage == 2:
+            # Stage 2: 손바닥 제스처 대기 (GESTURE_HOLD_DURATION 유지)
+            display_messages = ["[ STAGE 2 ] Show Palm to START"]
+            if result.gesture == "PALM":
+                if state.palm_start_time is None:
+                    state.palm_start_time = now
+                elapsed = now - state.palm_start_time
+                if elapsed >= GESTURE_HOLD_DURATION:
+                    self.current_stage = 3
+                    state.reset()
+                    display_messages = ["[ STAGE 3 ] Monitoring STARTED!"]
+                else:
+                    display_messages.append(f"[ GESTURE ] Hold Palm {GESTURE_HOLD_DURATION - elapsed:.1f}s")
+            else:
+                state.palm_start_time = None
+
+        elif self.current_stage == 3:
+            # Stage 3: 모니터링 (자세 분석 + 브이 제스처로 종료)
+            display_messages = ["[ STAGE 3 ] Monitoring... (Show 브이 Victory to STOP)"]
+
+            if result.landmarks is not None: # 자세 감지가 안 돼서 current_pose_ok 삭제
+                try: # 계산 오류 보호
+                    self._check_bad_posture(result.metrics, result, display_messages, now)
+                except Exception as e:
+                    # Stage 3에서 랜드마크 계산 중 오류 발생 시
+                    display_messages.append("[ERROR] Angle calculation failed.")
+
+            # --- 스트레칭 리마인더 ---
+            if now - self.stretch_last_time >= STRETCH_INTERVAL_SEC:
+                self.stretch_last_time = now
+                self.stretch_alert_until = now + STRETCH_ALERT_DURATION_SEC
+                print(f"{self.seat_label}[STRETCH] It's time to stretch your body!")
+
+            # --- 브이 제스처로 종료 ---
+            if result.gesture == "VICTORY":
+                if state.fist_start_time is None:
+                    state.fist_start_time = now
+                elapsed = now - state.fist_start_time
+                if elapsed >= GESTURE_HOLD_DURATION:
+                    self.current_stage = 1
+                    state.reset()
+                    display_messages = ["[ RESET ] Monitoring stopped."]
+                else:
+                    # 브이 제스처 카운트다운 메시지
+                    display_messages.append(f"[ GESTURE ] Hold Victory {GESTURE_HOLD_DURATION - elapsed:.1f}s")
+            else:
+                state.fist_start_time = None
+
+        # === 공통 리셋 로직 (Safety Reset) ===
+        # 2/3단계일 때, 자세가 RESET_DURATION 이상 이탈하면 1단계로 강제 리셋
+        if self.current_stage == 2 or self.current_stage == 3:
+            if not result.pose_ok:
+                if state.not_ok_start_time is None:
+                    state.not_ok_start_time = now
+                elapsed_not_ok = now - state.not_ok_start_time
+                remaining_time = RESET_DURATION - elapsed_not_ok
+
+                if remaining_time <= 0:
+                    # 이탈 시간 초과 -> 1단계로 리셋
+                    self.current_stage = 1
+                    state.reset() # StateManager로 모든 타이머 리셋
+                    display_messages = ["[ RESET ] Position lost. Returning to setup..."]
+                    # 스트레칭 타이머도 리셋
+                    self.stretch_last_time = now
+                    self.stretch_alert_until = 0.0
+                else:
+                    display_messages.append(f"[ WARNING ] Position lost. Reset in {remaining_time:.0f}s")
+                    # (중요) 이탈 사유를 보여주기 위해 adjustment_messages를 추가
+                    display_messages.extend(adjustment_messages)
+            else:
+                # 자세가 정상이면 리셋 타이머 초기화
+                if state.not_ok_start_time is not None:
+                    state.not_ok_start_time = None
+
+        result.messages = display_messages
+
+    def _fire_warning(self, event_type, value, sound):
+        """경고 이벤트 로그 기록 + 경고음 재생"""
+        log_event(event_type, value, self.log_filename)
+        self.alert(sound)
+
+    def _end_bad_posture(self, event_type, start_time, warning_triggered, now):
+        """경고가 났던 나쁜 자세 구간이 끝나면 전체 지속 시간을 요약(rollups)에 기록"""
+        if warning_triggered and start_time is not None:
+            log_duration(event_type, now - start_time, self.log_filename)
+
+    def _check_bad_posture(self, metrics, result, display_messages, now):
+        """Stage 3: config.POSTURE_RULES의 나쁜 자세 규칙 (거북목 / 허리 기울임 / 구부정 ...)을 한 번에 평가"""
+        state = self.state
+        evaluation = self.rules.evaluate(metrics, state, now, self.frame_dt)
+
+        # --- 경고가 났던 나쁜 자세 구간이 끝남 → 지속 시간 기록 ---
+        for i, start_time in evaluation.ended:
+            self._end_bad_posture(self.rules[i].event, start_time, True, now)
+
+        # --- 유지 시간을 넘긴 규칙: 화면 경고 (처음 1번만 로그 + 경고음) ---
+        for i in evaluation.active:
+            rule = self.rules[i]
+            value = float(evaluation.values[i])
+            side = "above" if evaluation.above[i] else "below"
+            display_messages.append(rule.warning_text(value, side, evaluation.elapsed[i]))
+            result.warnings.append(rule.event)
+            if evaluation.fired[i]:
+                result.events.append((rule.event, value))
+                print(f"{self.seat_label}{rule.held_text(value, state.bad_duration[i])}")
+                self._fire_warning(rule.event, value, rule.sound_for(side))
@@ -0,0 +1,138 @@
+# posture_rules.py
+# 목적: Stage 3 나쁜 자세 감지를 "수치 + 기준(below/above) + 유지 시간 + 메시지 + 경고음" 규칙 목록으로 선언하고
+#       모든 규칙을 한 번에 평가 (규칙마다 따로 있던 시작 시간/지속 시간/경고 플래그를 배열 하나씩으로 공유)
+# Workflow: config.POSTURE_RULES → PostureRuleSet 생성 (기준값을 배열로 정리)
+#           → 프레임마다 evaluate(metrics, state, now, dt)로 모든 규칙의 나쁜 자세 여부/타이머/히스테리시스를 벡터 연산
+#           → PostureEngine이 결과(경고 중 / 새 경고 / 끝난 구간)로 화면 메시지, 로그, 경고음 처리
+#
+# 새 규칙 추가 = config.POSTURE_RULES에 dict 하나 추가 (metric은 compute_posture_metrics 결과 이름)
+
+import numpy as np
+
+from config import BAD_POSTURE_DURATION, POSTURE_RULES
+
+
+class PostureRule:
+    """
+    나쁜 자세 규칙 1개.
+    - event: 로그/경고 이름 (예: "Turtle_Neck")
+    - metric: compute_posture_metrics 결과 이름 (예: "neck_angle")
+    - below / above: 값이 below보다 작거나 above보다 크면 나쁜 자세 (둘 중 하나 또는 둘 다)
+    - inclusive: True면 기준값과 같아도 나쁜 자세 (below 이하 / above 이상)
+    - hold: 나쁜 자세가 이 시간(초)보다 오래 유지되면 경고
+    - hysteresis: 나쁜 자세로 판정된 뒤에는 기준보다 이만큼 더 돌아와야 해제 (경계에서 경고가 깜빡이지 않도록)
+    - message / sound: 문자열, 또는 방향별로 다르면 {"below": ..., "above": ...}
+    - label / value_format: 콘솔 출력 이름과 값 표시 형식
+    - on_nan: 값을 계산할 수 없을 때 "clear"(나쁜 자세 해제), "hold"(판단 보류, 상태 유지)
+              또는 "bad"(below 방향 나쁜 자세로 판정)
+    """
+
+    def __init__(self, event, metric, below=None, above=None, hold=BAD_POSTURE_DURATION, hysteresis=0.0,
+                 message=None, sound=None, label=None, value_format="{:.1f}", on_nan="clear", inclusive=False):
+        if below is None and above is None:
+            raise ValueError(f"rule {event}: below 또는 above 기준이 필요합니다")
+        if on_nan not in ("clear", "hold", "bad"):
+            raise ValueError(f"rule {event}: on_nan은 'clear', 'hold' 또는 'bad'")
+        self.event = event
+        self.metric = metric
+        self.below = below
+        self.above = above
+        self.hold = hold
+        self.hysteresis = hysteresis
+        self.message = message or event
+        self.sound = sound
+        self.label = label or metric
+        self.value_format = value_format
+        self.on_nan = on_nan
+        self.inclusive = inclusive
+
+    def _by_side(self, option, side):
+        return option.get(side) if isinstance(option, dict) else option
+
+    def message_for(self, side):
+        return self._by_side(self.message, side)
+
+    def sound_for(self, side):
+        return self._by_side(self.sound, side)
+
+    def warning_text(self, value, side, elapsed):
+        """화면 경고 메시지: [WARNING] 메시지 (값, 경과 시간)"""
+        return f"[WARNING] {self.message_for(side)} ({self.value_format.format(value)}, {elapsed:.1f}s)"
+
+    def held_text(self, value, held):
+        """경고 발생 시 콘솔 출력: 이름: 값 (Held 누적 지속 시간)"""
+        return f"{self.label:<12}: {self.value_format.format(value)}   (Held {held:.1f}s)"
+
+
+class RuleEvaluation:
+    """evaluate() 한 번의 결과 (규칙 인덱스 배열)"""
+
+    def __init__(self, values, above, elapsed, active, fired, ended):
+        self.values = values     # 규칙별 이번 프레임 값
+        self.above = above       # 규칙별 above 방향으로 벗어났는지 (False면 below 방향)
+        self.elapsed = elapsed   # 규칙별 나쁜 자세 시작 후 경과 시간 (나쁜 자세가 아니면 NaN)
+        self.active = active     # 유지 시간을 넘겨 경고 중인 규칙
+        self.fired = fired       # 이번 프레임에 처음 경고한 규칙 (로그/경고음)
+        self.ended = ended       # [(규칙, 시작 시각)] 이번 프레임에 끝난, 경고가 났던 나쁜 자세 구간
+
+
+class PostureRuleSet:
+    """
+    규칙 목록을 배열로 정리해 한 번에 평가.
+    타이머 상태는 StateManager의 규칙별 배열(bad_start_time / bad_duration / warning_triggered)을 사용.
+    """
+
+    def __init__(self, rules=POSTURE_RULES):
+        self.rules = [rule if isinstance(rule, PostureRule) else PostureRule(**rule) for rule in rules]
+        self.metric_names = [rule.metric for rule in self.rules]
+        self.low = np.array([-np.inf if r.below is None else r.below for r in self.rules], dtype=np.float64)
+        self.high = np.array([np.inf if r.above is None else r.above for r in self.rules], dtype=np.float64)
+        self.hysteresis = np.array([r.hysteresis for r in self.rules], dtype=np.float64)
+        self.hold = np.array([r.hold for r in self.rules], dtype=np.float64)
+        self.nan_hold = np.array([r.on_nan == "hold" for r in self.rules], dtype=bool)
+        self.nan_bad = np.array([r.on_nan == "bad" for r in self.rules], dtype=bool)
+        self.inclusive = np.array([r.inclusive for r in self.rules], dtype=bool)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def __getitem__(self, index):
+        return self.rules[index]
+
+    def evaluate(self, metrics, state, now, dt):
+        """
+        모든 규칙을 한 번에 평가하고 state의 타이머를 갱신.
+        - 나쁜 자세가 시작되면 시작 시각 기록, 나쁜 자세인 동안 dt(프레임 간격)를 지속 시간에 누적
+        - 시작 후 hold초가 지나면 경고 중 (처음 1번만 fired)
+        - 해제되면 시작 시각/경고 플래그 초기화 (지속 시간은 Stage 3 동안 누적 유지)
+        """
+        values = np.fromiter((metrics[name] for name in self.metric_names), np.float64, len(self.rules))
+        start = state.bad_start_time
+        was_bad = ~np.isnan(start)
+
+        # 히스테리시스: 이미 나쁜 자세인 규칙은 기준을 안쪽으로 좁혀서 판정
+        margin = np.where(was_bad, self.hysteresis, 0.0)
+        low, high = self.low + margin, self.high - margin
+        with np.errstate(invalid="ignore"):
+            # 방향은 항상 엄격 비교 (이전 판정: 기준값과 같으면 below 방향, 예: 95도 = Leaning Back)
+            above = values > high
+            # inclusive는 나쁜 자세 여부에만 적용 (기준값과 같아도 나쁜 자세)
+            bad = np.where(self.inclusive, (values <= low) | (values >= high), (values < low) | above)
+        nan = np.isnan(values)
+        bad |= nan & self.nan_bad
+        skip = nan & self.nan_hold
+
+        start[bad & ~was_bad] = now
+        state.bad_duration[bad] += dt
+        elapsed = np.where(bad, now - start, np.nan)
+        with np.errstate(invalid="ignore"):
+            active = bad & (elapsed > self.hold)
+        fired = active & ~state.warning_triggered
+        state.warning_triggered |= fired
+
+        cleared = was_bad & ~bad & ~skip
+        ended = [(i, start[i]) for i in np.flatnonzero(cleared & state.warning_triggered)]
+        start[cleared] = np.nan
+        state.warning_triggered[cleared] = False
+
+        return RuleEvaluation(values, above, elapsed, np.flatnonzero(active), fired, ended)
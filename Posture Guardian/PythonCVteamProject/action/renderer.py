@@ -0,0 +1,124 @@
+# renderer.py
+# 목적: PostureEngine 결과(PostureResult)를 OpenCV 프레임 위에 그리는 선택적 렌더링 레이어
+# Workflow: PostureRenderer 생성(한글 폰트 로드) → render(result)로 안내 메시지/스트레칭 배너/랜드마크 그리기
+#           (텍스트는 overlay.OverlayCompositor의 캐시된 스프라이트로 그림, 헤드리스 모드에서는 생성하지 않음)
+
+import cv2
+import numpy as np
+import mediapipe as mp
+from PIL import ImageFont, ImageDraw, Image
+
+from overlay import OverlayCompositor
+
+mp_pose = mp.solutions.pose
+mp_hands = mp.solutions.hands
+mp_drawing = mp.solutions.drawing_utils
+mp_drawing_styles = mp.solutions.drawing_styles
+
+FONT_PATH = "c:/Windows/Fonts/malgun.ttf" # 윈도우 맑은 고딕
+
+
+def load_font(font_path=FONT_PATH, size=25):
+    """한글 폰트 로드 (실패 시 None)"""
+    try:
+        # 폰트 크기는 0.7 폰트 스케일과 비슷하게 20~25pt로 설정
+        font = ImageFont.truetype(font_path, size)
+        print(f"✅ Korean font '{font_path}' loaded.")
+        return font
+    except IOError:
+        print(f"🚨 ERROR: Font not found at '{font_path}'.")
+        print("-> Please check font path. Using default (broken) font.")
+        return None # 폰트 로드 실패
+
+
+def draw_text_with_pil(img, text, position, text_color_bgr, font=None):
+    """
+    OpenCV 이미지를 받아 PIL로 변환 후 한글 텍스트를 그리고
+    다시 OpenCV 이미지로 변환하여 반환합니다.
+    (메시지마다 전체 프레임을 변환하므로 느림: PostureRenderer(use_sprites=False)와 벤치마크 비교용으로만 사용)
+    """
+    if font is None: # 폰트 로드 실패 시, 원래 OpenCV 함수 사용
+        cv2.putText(img, text, position, cv2.FONT_HERSHEY_SIMPLEX, 0.7, text_color_bgr, 2)
+        return img
+
+    # 1. OpenCV BGR 이미지를 RGB PIL 이미지로 변환
+    img_pil = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+
+    # 2. Draw 객체 생성
+    draw = ImageDraw.Draw(img_pil)
+
+    # 3. BGR 색상을 RGB로 변환 (PIL은 RGB 사용)
+    text_color_rgb = (text_color_bgr[2], text_color_bgr[1], text_color_bgr[0])
+
+    # 4. 텍스트 그리기
+    draw.text(position, text, font=font, fill=text_color_rgb)
+
+    # 5. PIL RGB 이미지를 다시 BGR OpenCV 이미지로 변환
+    img_cv = cv2.cvtColor(np.array(img_pil), cv2.COLOR_RGB2BGR)
+    return img_cv
+
+
+def message_color(msg):
+    """메시지 종류별 색상 (BGR)"""
+    color = (0, 255, 0) # 기본 녹색 (OK)
+    if "ERROR" in msg or "GUIDE" in msg: color = (0, 0, 255) # 적색
+    elif "ADJUST" in msg: color = (0, 165, 255) # 주황
+    elif "WARNING" in msg or "RESET" in msg: color = (0, 69, 255) # 진한 주황
+    elif "Hold" in msg: color = (255, 255, 0) # 청록색 (대기)
+    return color
+
+
+class PostureRenderer:
+    """PostureResult를 화면용 프레임으로 그리는 클래스"""
+
+    def __init__(self, font_path=FONT_PATH, use_sprites=True):
+        self.font = load_font(font_path)
+        self.use_sprites = use_sprites
+        self.compositor = OverlayCompositor(self.font)
+
+    def render(self, result):
+        """결과 프레임에 손/포즈 랜드마크, 스트레칭 배너, 안내 메시지를 그려 반환"""
+        frame = result.frame
+
+        for hand_landmarks in result.hand_landmarks:
+            mp_drawing.draw_landmarks(
+                frame, hand_landmarks, mp_hands.HAND_CONNECTIONS,
+                mp_drawing_styles.get_default_hand_landmarks_style(),
+                mp_drawing_styles.get_default_hand_connections_style()
+            )
+
+        if self.use_sprites:
+            frame = self._draw_overlay(frame, result)
+        else:
+            frame = self._draw_overlay_pil(frame, result)
+
+        if result.pose_landmarks:
+            mp_drawing.draw_landmarks(frame, result.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+
+        return frame
+
+    def _draw_overlay(self, frame, result):
+        """스트레칭 배너 + 안내 메시지 (캐시된 스프라이트, 제자리 블렌딩)"""
+        if result.stretch_alert:
+            self.compositor.darken_band(frame, 0, 80, alpha=0.5)
+            # (주의: PIL 폰트 기준점이 약간 달라서 (20, 50) -> (20, 40)으로 y좌표 조정)
+            self.compositor.draw_text(frame, "스트레칭 시간입니다!", (20, 40), (255, 255, 255))
+
+        # (PIL 폰트 기준점이 약간 다르므로 y 좌표를 살짝 조정 (예: 25 + i * 35))
+        for i, msg in enumerate(result.messages):
+            self.compositor.draw_text(frame, msg, (20, 25 + i * 35), message_color(msg))
+        return frame
+
+    def _draw_overlay_pil(self, frame, result):
+        """이전 방식: 메시지마다 전체 프레임 PIL 변환 + 배너용 전체 프레임 복사 (벤치마크 비교용)"""
+        if result.stretch_alert:
+            h, w = frame.shape[:2]
+            overlay = frame.copy()
+            cv2.rectangle(overlay, (0, 0), (w, 80), (0, 0, 0), -1)
+            alpha = 0.5
+            frame = cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0)
+            frame = draw_text_with_pil(frame, "스트레칭 시간입니다!", (20, 40), (255, 255, 255), self.font)
+
+        for i, msg in enumerate(result.messages):
+            frame = draw_text_with_pil(frame, msg, (20, 25 + i * 35), message_color(msg), self.font)
+        return frame
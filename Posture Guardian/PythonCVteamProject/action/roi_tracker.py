@@ -0,0 +1,123 @@
+# roi_tracker.py
+# 목적: 사람이 있는 영역만 잘라 작은 고정 크기로 pose.process에 입력해 추론 비용 절감
+# Workflow: 이전 프레임의 머리/어깨/팔/엉덩이 랜드마크로 여유 있는 사각형 ROI 계산 → crop()으로 잘라 고정 크기로 리사이즈
+#           → 추론 결과를 remap_landmarks()로 전체 프레임 정규화 좌표로 되돌림 → 추적 실패 시 reset()으로 전체 프레임 사용
+# ROI는 사람이 경계 가까이 가거나 크게 멀어질 때만 옮김 (그 외에는 같은 자리 유지)
+#   → 추적 모드 Pose 그래프 하나가 매 프레임 같은 좌표계의 잘라낸 이미지를 받아 내부 추적/스무딩을 그대로 사용
+#     (사람 검출기는 추적을 놓쳤을 때만 실행, 좌표계가 바뀌는 것은 ROI가 옮겨질 때뿐)
+
+import cv2
+import numpy as np
+
+from config import (POSE_ROI_INPUT_SIZE, POSE_ROI_PADDING, POSE_ROI_MIN_VISIBILITY, POSE_ROI_KEEP_MARGIN,
+                    POSE_ROI_SHRINK_RATIO)
+
+# ROI 계산에 쓰는 랜드마크: 얼굴(0~10), 어깨/팔꿈치/손목(11~16), 엉덩이(23, 24)
+TRACK_LANDMARKS = list(range(0, 17)) + [23, 24]
+
+
+def remap_landmarks(landmark_list, roi, frame_w, frame_h):
+    """
+    ROI 기준 정규화 좌표의 MediaPipe 랜드마크를 전체 프레임 정규화 좌표로 변환 (제자리 수정).
+    - roi: (x0, y0, x1, y1) 전체 프레임 픽셀 좌표
+    """
+    x0, y0, x1, y1 = roi
+    crop_w, crop_h = x1 - x0, y1 - y0
+    for lm in landmark_list.landmark:
+        lm.x = (x0 + lm.x * crop_w) / frame_w
+        lm.y = (y0 + lm.y * crop_h) / frame_h
+        lm.z = lm.z * crop_w / frame_w
+    return landmark_list
+
+
+class PoseRoiTracker:
+    """
+    이전 프레임 랜드마크로 다음 프레임의 포즈 추론 영역을 정하는 추적기.
+    ROI는 입력 크기(POSE_ROI_INPUT_SIZE)와 같은 가로세로 비율로 맞춰 리사이즈 시 왜곡이 없고,
+    랜드마크 상자가 ROI 안쪽(keep_margin)에 머무는 동안은 옮기지 않습니다.
+    """
+
+    def __init__(self, input_size=POSE_ROI_INPUT_SIZE, padding=POSE_ROI_PADDING, keep_margin=POSE_ROI_KEEP_MARGIN,
+                 shrink_ratio=POSE_ROI_SHRINK_RATIO):
+        self.input_size = input_size
+        self.padding = padding
+        self.keep_margin = keep_margin
+        self.shrink_ratio = shrink_ratio
+        self.roi = None                  # 다음 추론에 쓸 ROI (None이면 전체 프레임)
+        self._buffer = np.empty((input_size[1], input_size[0], 3), np.uint8)
+
+        # 통계
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.lost = 0
+        self.moves = 0                   # ROI를 새로 정한 횟수 (추적 그래프의 좌표계가 바뀐 횟수)
+
+    def reset(self):
+        """추적 실패: 다음 추론은 전체 프레임으로"""
+        if self.roi is not None:
+            self.lost += 1
+        self.roi = None
+
+    def crop(self, image_rgb):
+        """
+        (추론 입력 이미지, 사용한 ROI) 반환. 추적 중이 아니면 (전체 이미지, None).
+        반환 이미지는 내부 버퍼이므로 다음 crop() 호출 전에 사용해야 함.
+        """
+        if self.roi is None:
+            self.full_frames += 1
+            return image_rgb, None
+        x0, y0, x1, y1 = self.roi
+        cv2.resize(image_rgb[y0:y1, x0:x1], self.input_size, dst=self._buffer, interpolation=cv2.INTER_AREA)
+        self.roi_frames += 1
+        return self._buffer, self.roi
+
+    def update(self, landmarks, frame_w, frame_h):
+        """
+        전체 프레임 기준 (33, 4) 랜드마크로 다음 ROI 계산. 추적용 랜드마크가 충분히 보이지 않으면 추적 해제.
+        현재 ROI 안쪽에 여유 있게 들어와 있고 너무 작아지지 않았으면 ROI를 그대로 둠.
+        """
+        if landmarks is None:
+            self.reset()
+            return
+        points = landmarks[TRACK_LANDMARKS]
+        points = points[points[:, 3] > POSE_ROI_MIN_VISIBILITY]
+        if len(points) < 4:
+            self.reset()
+            return
+
+        x_min, y_min = points[:, 0].min() * frame_w, points[:, 1].min() * frame_h
+        x_max, y_max = points[:, 0].max() * frame_w, points[:, 1].max() * frame_h
+        box_w, box_h = x_max - x_min, y_max - y_min
+        cx, cy = (x_min + x_max) / 2, (y_min + y_max) / 2
+
+        # 여유 공간 추가 후 입력 크기와 같은 가로세로 비율로 확장
+        w = box_w * (1 + 2 * self.padding)
+        h = box_h * (1 + 2 * self.padding)
+        aspect = self.input_size[0] / self.input_size[1]
+        if w / max(h, 1) < aspect:
+            w = h * aspect
+        else:
+            h = w / aspect
+
+        # 프레임보다 크면 추적 의미가 없으므로 전체 프레임 사용
+        if w >= frame_w or h >= frame_h:
+            self.roi = None
+            return
+
+        if self.roi is not None:
+            rx0, ry0, rx1, ry1 = self.roi
+            mx, my = box_w * self.keep_margin, box_h * self.keep_margin
+            inside = rx0 <= x_min - mx and ry0 <= y_min - my and x_max + mx <= rx1 and y_max + my <= ry1
+            if inside and w >= (rx1 - rx0) * self.shrink_ratio:
+                return  # 같은 ROI 유지
+
+        # 프레임 밖으로 나가지 않도록 위치 이동 (크기 유지)
+        x0 = int(min(max(cx - w / 2, 0), frame_w - w))
+        y0 = int(min(max(cy - h / 2, 0), frame_h - h))
+        self.roi = (x0, y0, x0 + int(w), y0 + int(h))
+        self.moves += 1
+
+    def stats(self):
+        """ROI/전체 프레임 추론 횟수, 추적 실패 횟수, ROI 이동 횟수"""
+        return {"roi_frames": self.roi_frames, "full_frames": self.full_frames, "lost": self.lost,
+                "moves": self.moves}
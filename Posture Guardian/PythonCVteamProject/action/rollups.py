@@ -0,0 +1,234 @@
+# rollups.py
+# 목적: 경고 로그를 기록하면서 분/시간/일 단위 요약(발생 횟수, 나쁜 자세 지속 시간, 최솟값/최댓값)을 함께 갱신
+#       → 일간/주간 리포트는 원본 CSV 전체가 아니라 필요한 날짜의 요약 파일만 읽음 (기록이 쌓여도 리포트 시간 일정)
+# Workflow: logger의 기록 스레드가 RollupStore.add_event() / add_duration() 호출 → 날짜별 파티션 파일에 주기적으로 저장
+#           → daily_report(날짜) / weekly_report(마지막 날짜)로 요약 조회
+#
+# 저장 형식 (로그 파일 하나당 디렉터리 하나, 예: rollups/posture_log/):
+#   2025-11-14.json         {"day": {이벤트: 요약}, "hour": {"13": {이벤트: 요약}, ...}}
+#   2025-11-14.minute.json  {"13:05": {이벤트: 요약}, ...}
+#   요약 = {"count": 경고 횟수, "bad_seconds": 경고가 난 나쁜 자세의 총 지속 시간(초), "min": 최솟값, "max": 최댓값}
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from config import LOG_FILENAME, ROLLUP_FLUSH_INTERVAL_SEC
+
+
+def rollup_dir(log_filename):
+    """로그 파일에 대응하는 요약 디렉터리: posture_log.csv → rollups/posture_log/"""
+    path = Path(log_filename)
+    return path.parent / "rollups" / path.stem
+
+
+def _empty_summary():
+    return {"count": 0, "bad_seconds": 0.0, "min": None, "max": None}
+
+
+def _merge_value(summary, value):
+    summary["min"] = value if summary["min"] is None else min(summary["min"], value)
+    summary["max"] = value if summary["max"] is None else max(summary["max"], value)
+
+
+def _load_json(path):
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    """임시 파일에 쓴 뒤 교체 (저장 중 종료되어도 이전 요약이 남음)"""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+class RollupStore:
+    """
+    날짜별 파티션 요약 저장소. 메모리에는 현재 날짜 파티션만 들고 있다가
+    ROLLUP_FLUSH_INTERVAL_SEC마다(변경이 있을 때만) 또는 날짜가 바뀔 때 파일로 저장합니다.
+    (logger의 기록 스레드에서만 호출되므로 별도 잠금 없음)
+    """
+
+    def __init__(self, directory, flush_interval=ROLLUP_FLUSH_INTERVAL_SEC):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self._day = None
+        self._summary = None   # {"day": {...}, "hour": {...}}
+        self._minutes = None   # {"HH:MM": {...}}
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    def _partition(self, when):
+        """when이 속한 날짜 파티션을 메모리로 불러오기 (날짜가 바뀌면 이전 파티션 저장)"""
+        day = when.strftime("%Y-%m-%d")
+        if day != self._day:
+            self.flush()
+            self._day = day
+            self._summary = _load_json(self.directory / f"{day}.json") or {"day": {}, "hour": {}}
+            self._minutes = _load_json(self.directory / f"{day}.minute.json") or {}
+        return self._summary
+
+    def _buckets(self, event_type, when):
+        """when이 속한 일/시간/분 요약 3개 반환 (없으면 생성)"""
+        summary = self._partition(when)
+        hour = summary["hour"].setdefault(when.strftime("%H"), {})
+        minute = self._minutes.setdefault(when.strftime("%H:%M"), {})
+        self._dirty = True
+        return [bucket.setdefault(event_type, _empty_summary()) for bucket in (summary["day"], hour, minute)]
+
+    def add_event(self, event_type, value, when):
+        """경고 1회 반영 (횟수 + 최솟값/최댓값)"""
+        for summary in self._buckets(event_type, when):
+            summary["count"] += 1
+            _merge_value(summary, value)
+
+    def add_duration(self, event_type, seconds, when):
+        """나쁜 자세 구간 1개 반영 (끝난 시각의 분/시간/일에 지속 시간 합산)"""
+        for summary in self._buckets(event_type, when):
+            summary["bad_seconds"] = round(summary["bad_seconds"] + seconds, 2)
+
+    def maybe_flush(self):
+        """저장 주기가 지났으면 저장"""
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """현재 파티션을 파일로 저장 (변경이 있을 때만)"""
+        self._last_flush = time.monotonic()
+        if not self._dirty:
+            return
+        _write_json(self.directory / f"{self._day}.json", self._summary)
+        _write_json(self.directory / f"{self._day}.minute.json", self._minutes)
+        self._dirty = False
+
+
+# === 리포트 (요약 파일만 읽음) ===
+def partition_days(directory):
+    """요약 파티션이 있는 날짜 목록 (YYYY-MM-DD, 오래된 것부터)"""
+    return sorted(path.name[:-len(".json")] for path in Path(directory).glob("????-??-??.json"))
+
+
+def daily_report(directory, day):
+    """
+    하루 요약: {"day": 날짜, "events": {이벤트: 요약}, "hours": {"HH": {이벤트: 요약}}}
+    (분 단위가 필요하면 minute_report 사용)
+    """
+    summary = _load_json(Path(directory) / f"{day}.json") or {"day": {}, "hour": {}}
+    return {"day": day, "events": summary["day"], "hours": summary["hour"]}
+
+
+def minute_report(directory, day):
+    """하루의 분 단위 요약: {"HH:MM": {이벤트: 요약}}"""
+    return _load_json(Path(directory) / f"{day}.minute.json") or {}
+
+
+def weekly_report(directory, last_day=None):
+    """
+    last_day(포함)까지 7일 요약: {"days": {날짜: {이벤트: 요약}}, "events": {이벤트: 7일 합계}}
+    날짜별 파티션 7개의 일 요약만 읽음.
+    """
+    last = datetime.strptime(last_day, "%Y-%m-%d") if last_day else datetime.now()
+    days, totals = {}, {}
+    for offset in range(6, -1, -1):
+        day = (last - timedelta(days=offset)).strftime("%Y-%m-%d")
+        events = daily_report(directory, day)["events"]
+        days[day] = events
+        for event_type, summary in events.items():
+            total = totals.setdefault(event_type, _empty_summary())
+            total["count"] += summary["count"]
+            total["bad_seconds"] = round(total["bad_seconds"] + summary["bad_seconds"], 2)
+            for value in (summary["min"], summary["max"]):
+                if value is not None:
+                    _merge_value(total, value)
+    return {"days": days, "events": totals}
+
+
+def _carry_durations(old, new):
+    """이전 요약의 bad_seconds를 새 요약에 옮김 (CSV에는 지속 시간이 없으므로 다시 만들 때 보존)"""
+    for key, value in old.items():
+        if "bad_seconds" in value:
+            if value["bad_seconds"]:
+                new.setdefault(key, _empty_summary())["bad_seconds"] = value["bad_seconds"]
+        else:
+            _carry_durations(value, new.setdefault(key, {}))
+
+
+def rebuild_from_csv(csv_paths, directory):
+    """
+    기존 CSV 로그(교체된 파일 포함)로 요약을 다시 만듦 (요약 기능 이전 기록 가져오기용).
+    임시 디렉터리에 새로 만든 뒤 CSV에 나온 날짜의 파티션만 통째로 교체하므로 여러 번 실행해도 중복 집계되지 않음.
+    CSV에는 지속 시간이 없으므로 bad_seconds는 기존 파티션에 있던 값을 그대로 유지합니다.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".rebuild-", dir=directory))
+    try:
+        rows = _replay_csv(csv_paths, RollupStore(staging))
+        for path in staging.glob("*.json"):
+            target = directory / path.name
+            old = _load_json(target)
+            if old is not None:
+                new = _load_json(path)
+                _carry_durations(old, new)
+                _write_json(path, new)
+            os.replace(path, target)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return rows
+
+
+def _replay_csv(csv_paths, store):
+    """CSV 행을 store에 경고로 반영하고 저장, 반영한 행 수 반환"""
+    rows = 0
+    for csv_path in csv_paths:
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    when = datetime.strptime(row["timestamp"], "%Y-%m-%d %H:%M:%S")
+                    store.add_event(row["event_type"], float(row["value"]), when)
+                except (KeyError, ValueError):
+                    continue
+                rows += 1
+    store.flush()
+    return rows
+
+
+def _print_events(events, indent="   "):
+    for event_type, s in sorted(events.items()):
+        print(f"{indent}{event_type:<12} count={s['count']:<4} bad={s['bad_seconds'] / 60:6.1f}min "
+              f"min={s['min']} max={s['max']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="자세 경고 요약 리포트 (분/시간/일 요약 파일 사용)")
+    parser.add_argument("--log", default=LOG_FILENAME, help="요약을 볼 로그 파일 (rollups/<이름>/ 사용)")
+    parser.add_argument("--day", default=None, help="리포트 날짜 YYYY-MM-DD (기본: 오늘)")
+    parser.add_argument("--week", action="store_true", help="--day까지 7일 주간 리포트")
+    parser.add_argument("--rebuild", nargs="+", metavar="CSV", help="기존 CSV 로그로 요약 다시 만들기")
+    args = parser.parse_args()
+
+    directory = rollup_dir(args.log)
+    if args.rebuild:
+        print(f"✅ {rebuild_from_csv(args.rebuild, directory)} events imported into {directory}")
+    day = args.day or datetime.now().strftime("%Y-%m-%d")
+    if args.week:
+        report = weekly_report(directory, day)
+        print(f"📊 Weekly report (until {day})")
+        for d, events in report["days"].items():
+            print(f" {d}: " + (", ".join(f"{k}={v['count']}" for k, v in sorted(events.items())) or "-"))
+        _print_events(report["events"])
+    else:
+        report = daily_report(directory, day)
+        print(f"📊 Daily report {day}")
+        _print_events(report["events"])
@@ -2,13 +2,16 @@
 # 목적: 자세 모니터링 과정에서 발생하는 상태 변수와 타이머, 지속 시간 타이머를 관리
 # Workflow: StateManager 객체 생성 → reset()으로 상태 초기화 → main 루프에서 참조 및 갱신
 
-import time
+import numpy as np
+
+from config import POSTURE_RULES
 
 class StateManager:
     """자세 모니터링 상태 및 타이머 관리 클래스"""
 
-    def __init__(self):
+    def __init__(self, rule_count=len(POSTURE_RULES)):
         # 객체 생성 시 모든 상태 초기화
+        self.rule_count = rule_count
         self.reset()
 
     def reset(self):
@@ -19,26 +22,18 @@ class StateManager:
         self.palm_start_time = None        # 손바닥 제스처 시작 시간
         self.fist_start_time = None        # 주먹 제스처 시작 시간
 
-        # 나쁜 자세 감지 타이머
-        self.bad_neck_start_time = None    # 거북목 감지 시작 시간
-        self.bad_lean_start_time = None    # 앞으로/뒤로 기울임 감지 시작 시간
-        self.bad_slouch_start_time = None  # 구부정 감지 시작 시간
+        # 나쁜 자세 규칙별 타이머 (posture_rules.PostureRuleSet 순서대로 배열 1칸씩)
+        self.bad_start_time = np.full(self.rule_count, np.nan)   # 나쁜 자세 감지 시작 시간 (NaN이면 정상 자세)
 
-        # 나쁜 자세 지속 (유지) 시간 카운트 (누적 시간)
-        self.neck_duration = 0
-        self.lean_duration = 0 # 앞/뒤
-        self.slouch_duration = 0 # 구부정..
+        # 나쁜 자세 지속 (유지) 시간 (누적 시간, 초 단위 - 프레임 timestamp 간격으로 누적)
+        self.bad_duration = np.zeros(self.rule_count)
 
         # 경고 발생 여부 플래그
-        self.neck_warning_triggered = False
-        self.lean_warning_triggered = False
-        self.slouch_warning_triggered = False
+        self.warning_triggered = np.zeros(self.rule_count, dtype=bool)
 
     def reset_warnings(self):
         """경고 플래그만 초기화"""
-        self.neck_warning_triggered = False
-        self.lean_warning_triggered = False
-        self.slouch_warning_triggered = False
+        self.warning_triggered[:] = False
 
     def reset_gestures(self):
         """제스처 관련 타이머 초기화"""
@@ -47,6 +42,4 @@ class StateManager:
 
     def reset_duration(self):
         '''지속 시간 카운터 초기화'''
-        self.neck_duration = 0
-        self.lean_duration = 0
-        self.slouch_duration = 0
\ No newline at end of file
+        self.bad_duration[:] = 0.0
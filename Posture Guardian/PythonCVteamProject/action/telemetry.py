@@ -0,0 +1,193 @@
+# telemetry.py
+# 목적: 단계별 처리 시간(디코드/전처리/pose/hands/분석/렌더링/waitKey)을 고정 구간 히스토그램으로 집계하고
+#       프레임/누락/건너뜀 카운터, 경고음/로그 큐 길이와 함께 로컬 HTTP /metrics (Prometheus 텍스트)와 JSON 파일로 공개
+# Workflow: Telemetry 생성 → 프레임마다 observe()/observe_result()로 시간 기록 (bisect 1번 + 정수 덧셈, 잠금 없음)
+#           → 누적 카운터는 add_counter(), 큐 길이 등 오르내리는 값은 add_gauge()로 등록한 함수를 조회 시점에만 호출
+#           → serve(port)로 /metrics, /metrics.json 제공 + start_json_dump(path)로 주기적 JSON 저장
+#
+# 확인 예: curl http://127.0.0.1:9108/metrics
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from config import LATENCY_BUCKETS, METRICS_DUMP_INTERVAL_SEC
+
+STAGES = ["decode", "preprocess", "pose", "hands", "analysis", "render", "waitkey", "capture_to_result"]
+
+
+def _escape_label(value):
+    """Prometheus 라벨 값 이스케이프 (\\, \", 줄바꿈)"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class LatencyHistogram:
+    """고정 구간(초) 히스토그램. 한 단계는 한 스레드에서만 기록하므로 잠금 없이 누적"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def quantile(self, q):
+        """구간 경계로 근사한 분위수 (JSON 요약용)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        running = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            running += n
+            if running >= target:
+                return bound if bound != float("inf") else self.buckets[-1]
+        return self.buckets[-1]
+
+
+class Telemetry:
+    """좌석 하나의 단계별 히스토그램 + 카운터 + 게이지"""
+
+    def __init__(self, seat_name=None):
+        self.labels = {"seat": seat_name or "default"}
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+        self.counters = {"frames": 0, "inferred_frames": 0}
+        self._counter_funcs = {}   # 이름 → 누적 값을 돌려주는 함수 (조회 시점에만 호출)
+        self._gauges = {}          # 이름 → 값을 돌려주는 함수 (조회 시점에만 호출)
+        self.started = time.time()
+        self._server = None
+        self._dump_stop = threading.Event()
+
+    # --- 기록 (프레임 루프에서 호출) ---
+    def observe(self, stage, seconds):
+        self.histograms[stage].observe(seconds)
+
+    def observe_result(self, result):
+        """PostureResult의 단계별 시간 + 캡처부터 결과까지 지연 기록"""
+        for stage, seconds in result.timings.items():
+            self.histograms[stage].observe(seconds)
+        self.histograms["capture_to_result"].observe(time.monotonic() - result.timestamp)
+        self.counters["frames"] += 1
+        if result.inferred:
+            self.counters["inferred_frames"] += 1
+
+    def add_counter(self, name, func):
+        """조회할 때마다 func()를 호출해 값을 얻는 누적 카운터 등록 (예: 캡처/누락 프레임 수, posture_<name>_total로 공개)"""
+        self._counter_funcs[name] = func
+
+    def add_gauge(self, name, func):
+        """조회할 때마다 func()를 호출해 값을 얻는 지표 등록 (예: 큐 길이, 현재 FPS)"""
+        self._gauges[name] = func
+
+    # --- 내보내기 ---
+    @staticmethod
+    def _read(funcs):
+        values = {}
+        for name, func in funcs.items():
+            try:
+                values[name] = float(func())
+            except Exception:
+                continue  # 종료 중 등으로 읽을 수 없는 값은 건너뜀
+        return values
+
+    def _gauge_values(self):
+        return self._read(self._gauges)
+
+    def _counter_values(self):
+        """프레임 루프가 직접 올리는 카운터 + add_counter()로 등록한 카운터"""
+        values = dict(self.counters)
+        values.update((name, int(value)) for name, value in self._read(self._counter_funcs).items())
+        return values
+
+    def prometheus_text(self):
+        """Prometheus 텍스트 형식 (version 0.0.4)"""
+        label = ",".join(f'{k}="{_escape_label(v)}"' for k, v in self.labels.items())
+        lines = ["# TYPE posture_stage_latency_seconds histogram"]
+        for stage, hist in self.histograms.items():
+            running = 0
+            for bound, n in zip(hist.buckets, hist.counts):
+                running += n
+                lines.append(f'posture_stage_latency_seconds_bucket{{{label},stage="{stage}",le="{bound}"}} {running}')
+            lines.append(f'posture_stage_latency_seconds_bucket{{{label},stage="{stage}",le="+Inf"}} {hist.count}')
+            lines.append(f'posture_stage_latency_seconds_sum{{{label},stage="{stage}"}} {hist.sum:.6f}')
+            lines.append(f'posture_stage_latency_seconds_count{{{label},stage="{stage}"}} {hist.count}')
+        for name, value in self._counter_values().items():
+            lines.append(f"# TYPE posture_{name}_total counter")
+            lines.append(f"posture_{name}_total{{{label}}} {value}")
+        for name, value in self._gauge_values().items():
+            lines.append(f"# TYPE posture_{name} gauge")
+            lines.append(f"posture_{name}{{{label}}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self):
+        """JSON 요약 (단계별 횟수/평균/근사 p50·p95, 카운터, 게이지)"""
+        stages = {}
+        for stage, hist in self.histograms.items():
+            if not hist.count:
+                continue
+            stages[stage] = {"count": hist.count,
+                             "avg_ms": round(hist.sum / hist.count * 1000, 3),
+                             "p50_ms": round(hist.quantile(0.5) * 1000, 3),
+                             "p95_ms": round(hist.quantile(0.95) * 1000, 3),
+                             "buckets": dict(zip([str(b) for b in hist.buckets] + ["+Inf"], hist.counts))}
+        return {"labels": self.labels, "time": time.time(), "uptime_sec": round(time.time() - self.started, 1),
+                "stages": stages, "counters": self._counter_values(), "gauges": self._gauge_values()}
+
+    # --- HTTP 엔드포인트 / JSON 파일 ---
+    def serve(self, port, host="127.0.0.1"):
+        """/metrics (Prometheus), /metrics.json 을 제공하는 HTTP 서버를 백그라운드 스레드로 시작"""
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, content_type = telemetry.prometheus_text(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, content_type = json.dumps(telemetry.to_dict()), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass  # 요청마다 콘솔에 출력하지 않음
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        return self._server.server_address
+
+    def start_json_dump(self, path, interval=METRICS_DUMP_INTERVAL_SEC):
+        """interval초마다 to_dict()를 path에 저장 (임시 파일에 쓴 뒤 교체)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        def dump_loop():
+            while not self._dump_stop.wait(interval):
+                self.dump_json(path)
+
+        threading.Thread(target=dump_loop, name="metrics-json", daemon=True).start()
+
+    def dump_json(self, path):
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(self.to_dict(), indent=1), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def close(self):
+        self._dump_stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
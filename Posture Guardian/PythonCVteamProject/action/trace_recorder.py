@@ -0,0 +1,217 @@
+# trace_recorder.py
+# 목적: 프레임별 포즈 랜드마크(33 x [x, y, z, visibility])와 자세 수치(neck/lean/slouch)를 작은 바이너리로 계속 기록
+#       → 나중에 임계값을 다시 맞추거나 문제 상황을 그대로 재현할 수 있도록 (posture_log.csv는 경고 순간만 기록)
+# Workflow: TraceRecorder(디렉터리) → 추론한 프레임마다 record(timestamp, landmarks, metrics)
+#           → 청크 파일(float16 .npy, 메모리 매핑)에 이어쓰기 + 청크별 타임스탬프 인덱스(float64 .npy)
+#           → TraceReader(디렉터리).read(start, end)로 해당 시간 구간만 NumPy 배열로 읽기
+#
+# 저장 형식 (디렉터리 하나 = 좌석 하나):
+#   chunk_<첫 프레임 시각(ms)>.npy     (TRACE_CHUNK_FRAMES, 135) float16  [랜드마크 132개 + neck, lean, slouch]
+#   chunk_<첫 프레임 시각(ms)>.ts.npy  (TRACE_CHUNK_FRAMES,) float64     프레임 시각 (아직 안 쓴 칸은 NaN)
+#   프레임당 278바이트 → 30 FPS로 계속 추론하면 1시간 약 30MB, 하루 약 720MB, 24시간×7일이면 좌석당 주 약 5GB
+#   (움직임 게이트로 건너뛴 프레임은 기록하지 않으므로 실제로는 이보다 적음)
+# 보존 기간: 새 청크를 만들 때마다 TRACE_MAX_AGE_DAYS보다 오래됐거나 TRACE_MAX_BYTES를 넘는 오래된 청크 쌍을 삭제
+#   (기본 7일 / 6GiB: 24시간 기록해도 1주일치가 남도록 용량 상한에 여유를 둠)
+
+import time
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from config import TRACE_CHUNK_FRAMES, TRACE_FLUSH_FRAMES, TRACE_MAX_AGE_DAYS, TRACE_MAX_BYTES
+from posture_analysis import NUM_POSE_LANDMARKS
+
+METRIC_COLUMNS = ["neck_angle", "lean_angle", "slouch_ratio"]
+LANDMARK_COLUMNS = NUM_POSE_LANDMARKS * 4
+TRACE_COLUMNS = LANDMARK_COLUMNS + len(METRIC_COLUMNS)
+
+
+def _chunk_paths(directory):
+    """디렉터리의 (청크 시작 시각(초), 데이터 경로, 타임스탬프 경로) 목록 (시간 순)"""
+    chunks = []
+    for ts_path in Path(directory).glob("chunk_*.ts.npy"):
+        start_ms = int(ts_path.name[len("chunk_"):-len(".ts.npy")])
+        chunks.append((start_ms / 1000.0, ts_path.with_name(f"chunk_{start_ms}.npy"), ts_path))
+    chunks.sort()
+    return chunks
+
+
+def prune_chunks(directory, now, max_age_days=TRACE_MAX_AGE_DAYS, max_bytes=TRACE_MAX_BYTES):
+    """
+    보존 기간 적용: 오래된 청크 쌍(.npy + .ts.npy)부터 삭제하고 삭제한 청크 수 반환.
+    - 다음 청크 시작 시각이 now - max_age_days보다 이르면 (= 청크의 모든 프레임이 기간 밖) 삭제
+    - 남은 청크 합계가 max_bytes를 넘으면 가장 오래된 청크부터 삭제
+    - 가장 최근 청크(기록 중인 청크)는 삭제하지 않음
+    """
+    chunks = _chunk_paths(directory)
+    sizes = [data_path.stat().st_size + ts_path.stat().st_size if data_path.exists() else ts_path.stat().st_size
+             for _, data_path, ts_path in chunks]
+    total = sum(sizes)
+    cutoff = None if max_age_days is None else now - max_age_days * 86400
+    deleted = 0
+    for i, (_, data_path, ts_path) in enumerate(chunks[:-1]):
+        expired = cutoff is not None and chunks[i + 1][0] <= cutoff
+        oversize = max_bytes is not None and total > max_bytes
+        if not (expired or oversize):
+            break
+        ts_path.unlink(missing_ok=True)   # 타임스탬프 먼저 삭제: 읽는 쪽은 데이터만 남은 청크를 보지 않음
+        data_path.unlink(missing_ok=True)
+        total -= sizes[i]
+        deleted += 1
+    return deleted
+
+
+def _filled_count(timestamps):
+    """청크에서 실제로 기록된 프레임 수 (타임스탬프가 NaN인 첫 칸의 위치)"""
+    empty = np.flatnonzero(np.isnan(timestamps))
+    return int(empty[0]) if len(empty) else len(timestamps)
+
+
+class TraceRecorder:
+    """
+    이어쓰기 전용 프레임 기록기.
+    - 청크 파일을 TRACE_CHUNK_FRAMES 크기로 미리 만들고 메모리 매핑해서 한 행씩 채움 (프레임마다 파일 열기/쓰기 호출 없음)
+    - 데이터 행을 먼저 쓰고 타임스탬프를 나중에 쓰므로, 강제 종료되어도 타임스탬프가 있는 행까지는 온전함
+    - clock_offset: 기록 시각 = timestamp + clock_offset
+      (run_monitor는 time.monotonic 캡처 시각을 넘기므로 time.time() - time.monotonic()을 전달해 실제 시각으로 저장)
+    - 새 청크를 만들 때마다 prune_chunks()로 보존 기간/크기 제한 적용 (재시작 시 첫 청크에서도 적용)
+    """
+
+    def __init__(self, directory, clock_offset=0.0, chunk_frames=TRACE_CHUNK_FRAMES,
+                 max_age_days=TRACE_MAX_AGE_DAYS, max_bytes=TRACE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.clock_offset = clock_offset
+        self.chunk_frames = chunk_frames
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self._data = None
+        self._timestamps = None
+        self._row = 0
+        self._row_buffer = np.empty(TRACE_COLUMNS, np.float16)
+
+        # 통계
+        self.frames = 0
+        self.chunks = 0
+        self.deleted_chunks = 0   # 보존 기간/크기 제한으로 삭제한 청크 수
+
+    def _new_chunk(self, timestamp):
+        """새 청크 파일 2개 생성 (항상 새 청크로 시작하므로 기존 기록은 건드리지 않음)"""
+        self._close_chunk()
+        start_ms = int(timestamp * 1000)
+        while (self.directory / f"chunk_{start_ms}.ts.npy").exists():
+            start_ms += 1
+        self._data = open_memmap(self.directory / f"chunk_{start_ms}.npy", mode="w+",
+                                 dtype=np.float16, shape=(self.chunk_frames, TRACE_COLUMNS))
+        self._timestamps = open_memmap(self.directory / f"chunk_{start_ms}.ts.npy", mode="w+",
+                                       dtype=np.float64, shape=(self.chunk_frames,))
+        self._timestamps[:] = np.nan
+        self._row = 0
+        self.chunks += 1
+        self.deleted_chunks += prune_chunks(self.directory, timestamp, self.max_age_days, self.max_bytes)
+
+    def _close_chunk(self):
+        if self._data is None:
+            return
+        self.flush()
+        self._data = self._timestamps = None
+
+    def record(self, timestamp, landmarks, metrics):
+        """
+        프레임 1장 기록.
+        - landmarks: (33, 4) 배열, metrics: compute_posture_metrics() 결과 dict
+        """
+        timestamp += self.clock_offset
+        if self._data is None or self._row >= self.chunk_frames:
+            self._new_chunk(timestamp)
+
+        row = self._row_buffer
+        row[:LANDMARK_COLUMNS] = landmarks.reshape(-1)
+        for i, name in enumerate(METRIC_COLUMNS):
+            row[LANDMARK_COLUMNS + i] = metrics.get(name, np.nan)
+        self._data[self._row] = row
+        self._timestamps[self._row] = timestamp  # 타임스탬프 = 이 행의 기록 완료 표시
+        self._row += 1
+        self.frames += 1
+
+        if self.frames % TRACE_FLUSH_FRAMES == 0:
+            self.flush()
+
+    def flush(self):
+        """메모리 매핑된 변경분을 파일에 반영"""
+        if self._data is not None:
+            self._data.flush()
+            self._timestamps.flush()
+
+    def close(self):
+        self._close_chunk()
+
+    def stats(self):
+        """기록 프레임 수 / 청크 수 / 디스크 사용량(바이트)"""
+        row_bytes = TRACE_COLUMNS * 2 + 8
+        return {"frames": self.frames, "chunks": self.chunks, "deleted_chunks": self.deleted_chunks,
+                "bytes": self.chunks * self.chunk_frames * row_bytes}
+
+
+class TraceReader:
+    """TraceRecorder 디렉터리 읽기 (필요한 청크만 메모리 매핑으로 열어 해당 구간만 복사)"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def time_range(self):
+        """(첫 프레임 시각, 마지막 프레임 시각), 기록이 없으면 None"""
+        chunks = _chunk_paths(self.directory)
+        if not chunks:
+            return None
+        last_ts = np.load(chunks[-1][2], mmap_mode="r")
+        count = _filled_count(last_ts)
+        end = float(last_ts[count - 1]) if count else chunks[-1][0]
+        return chunks[0][0], end
+
+    def read(self, start=None, end=None):
+        """
+        [start, end) 구간 프레임을 dict로 반환 (시각은 time.time() 기준 초, None이면 처음/끝까지).
+            timestamp: (n,) float64, landmarks: (n, 33, 4) float32,
+            neck_angle / lean_angle / slouch_ratio: (n,) float32
+        """
+        chunks = _chunk_paths(self.directory)
+        timestamps, rows = [], []
+        for i, (chunk_start, data_path, ts_path) in enumerate(chunks):
+            next_start = chunks[i + 1][0] if i + 1 < len(chunks) else np.inf
+            if start is not None and next_start <= start:
+                continue
+            if end is not None and chunk_start >= end:
+                break
+
+            ts = np.load(ts_path, mmap_mode="r")
+            count = _filled_count(ts)
+            ts = ts[:count]
+            lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+            hi = count if end is None else int(np.searchsorted(ts, end, side="left"))
+            if hi <= lo:
+                continue
+            data = np.load(data_path, mmap_mode="r")
+            timestamps.append(np.array(ts[lo:hi]))
+            rows.append(data[lo:hi].astype(np.float32))
+
+        if rows:
+            timestamps = np.concatenate(timestamps)
+            rows = np.concatenate(rows)
+        else:
+            timestamps = np.empty(0, np.float64)
+            rows = np.empty((0, TRACE_COLUMNS), np.float32)
+
+        trace = {
+            "timestamp": timestamps,
+            "landmarks": rows[:, :LANDMARK_COLUMNS].reshape(-1, NUM_POSE_LANDMARKS, 4),
+        }
+        for i, name in enumerate(METRIC_COLUMNS):
+            trace[name] = rows[:, LANDMARK_COLUMNS + i]
+        return trace
+
+
+def monotonic_clock_offset():
+    """time.monotonic() 캡처 시각을 time.time() 기준으로 바꾸는 보정값"""
+    return time.time() - time.monotonic()
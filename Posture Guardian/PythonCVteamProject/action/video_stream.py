@@ -1,18 +1,45 @@
-import cv2, time
-from threading import Thread
+import cv2, os, time
+from threading import Thread, Condition
+
+from config import STREAM_READ_FAILURE_TIMEOUT_SEC
+
+def parse_source(src):
+    """'0', '1' 같은 숫자 문자열은 카메라 번호(int)로, 나머지는 RTSP URL/파일 경로로 그대로 사용"""
+    if isinstance(src, str) and src.isdigit():
+        return int(src)
+    return src
 
 class VideoStream:
-    """웹캠/RTSP 스트림을 별도 스레드에서 읽어오는 클래스"""
+    """
+    웹캠/RTSP 스트림을 별도 스레드에서 읽어오는 클래스.
+    프레임마다 순번(seq)과 캡처 시각(time.monotonic)을 붙이고, Condition으로 새 프레임 도착을 알려서
+    소비자가 같은 프레임을 두 번 처리하거나 빈 루프를 돌지 않도록 합니다.
+    """
 
     def __init__(self, src=0):
         self.cap = cv2.VideoCapture(src)
+        self.is_file = isinstance(src, str) and os.path.isfile(src)   # 동영상 파일: 끝까지 읽으면 종료
         print("Connecting to stream...")
 
+        self._cond = Condition()
+        self.seq = 0                 # 마지막으로 캡처된 프레임 순번 (1부터 시작)
+        self.timestamp = None        # 마지막 프레임 캡처 시각 (time.monotonic)
+        self._consumed_seq = 0       # 소비자가 마지막으로 가져간 프레임 순번
+
+        # 통계
+        self.captured = 0            # 캡처 성공 프레임 수
+        self.dropped = 0             # 한 번도 읽히지 않고 덮어써진 프레임 수
+        self.duplicates = 0          # read()가 이미 가져간 프레임을 다시 반환한 횟수
+        self.read_observer = None    # cap.read() 소요 시간(초)을 받을 함수 (telemetry 디코드 시간 측정용)
+        self.idle_interval = 0.0     # 0보다 크면 부재 모드: 이 간격마다만 디코드 (set_idle 참고)
+        self.idle_grabbed = 0        # 부재 모드에서 grab()만 하고 디코드를 건너뛴 프레임 수
+
         # ✅ 카메라 초기화 재시도 로직 추가
         self.ret, self.frame = None, None
         for _ in range(10):  # 최대 10번 시도
             self.ret, self.frame = self.cap.read()
             if self.ret:
+                self._publish_locked(self.ret, self.frame, time.monotonic())
                 break
             time.sleep(0.5)  # 잠시 대기 후 재시도
 
@@ -27,18 +54,102 @@ class VideoStream:
             Thread(target=self.update, args=(), daemon=True).start()
         return self
 
+    def _publish_locked(self, ret, frame, timestamp):
+        """
+        새 프레임 저장 (self._cond를 잡은 상태 또는 스레드 시작 전에 호출).
+        읽기 실패(ret=False)는 저장하지 않음: 아직 가져가지 않은 마지막 정상 프레임을 덮어쓰지 않도록.
+        """
+        if not ret:
+            return
+        if self.seq > self._consumed_seq:
+            self.dropped += 1  # 이전 프레임이 읽히기 전에 덮어써짐
+        self.ret, self.frame = ret, frame
+        self.seq += 1
+        self.captured += 1
+        self.timestamp = timestamp
+
     def update(self):
-        """프레임을 지속적으로 읽어오는 루프"""
+        """
+        프레임을 지속적으로 읽어오는 루프.
+        동영상 파일은 끝(첫 읽기 실패)에서, 카메라/RTSP는 STREAM_READ_FAILURE_TIMEOUT_SEC 동안 계속 실패하면
+        stopped로 바꾸고 대기 중인 read_new()를 깨워 소비자가 종료할 수 있게 함.
+        """
+        failing_since = None
+        last_decode = 0.0
         while True:
             if self.stopped:
                 self.cap.release()
                 return
-            self.ret, self.frame = self.cap.read()
+            interval = self.idle_interval
+            # 부재 모드(카메라/RTSP): 장치 버퍼만 비우고(grab) 디코드/색변환(retrieve)은 interval마다 한 번만
+            decode = not interval or self.is_file or time.monotonic() - last_decode >= interval
+            t0 = time.perf_counter()
+            if decode:
+                ret, frame = self.cap.read()
+            else:
+                ret, frame = self.cap.grab(), None
+            timestamp = time.monotonic()
+            if ret:
+                failing_since = None
+            elif failing_since is None:
+                failing_since = timestamp
+            if ret and not decode:
+                self.idle_grabbed += 1
+                continue
+            if ret:
+                last_decode = timestamp
+                if self.read_observer is not None:
+                    self.read_observer(time.perf_counter() - t0)
+            ended = not ret and (self.is_file or timestamp - failing_since >= STREAM_READ_FAILURE_TIMEOUT_SEC)
+            if ret or ended:
+                with self._cond:
+                    self._publish_locked(ret, frame, timestamp)
+                    if ended:
+                        self.stopped = True  # frame/seq는 그대로 두고 대기 중인 read_new()만 깨움
+                    self._cond.notify_all()
+            if ended:
+                print("🎬 End of video file." if self.is_file else
+                      f"🚨 Stream lost: no frame for {STREAM_READ_FAILURE_TIMEOUT_SEC:g}s.")
+            elif not ret:
+                time.sleep(0.01)  # 연결 끊김: 빈 루프로 CPU를 쓰지 않도록 잠시 대기
+            elif interval and self.is_file:
+                time.sleep(interval)  # 동영상 파일은 건너뛰지 않고 읽는 속도만 낮춤
 
     def read(self):
-        """현재 프레임 반환"""
-        return self.ret, self.frame
+        """현재 프레임 반환 (새 프레임이 아니어도 반환, 기존 호환용)"""
+        with self._cond:
+            if self.seq == self._consumed_seq:
+                self.duplicates += 1
+            self._consumed_seq = self.seq
+            return self.ret, self.frame
+
+    def read_new(self, timeout=None):
+        """
+        아직 가져가지 않은 새 프레임이 올 때까지 대기 후 (ret, frame, seq, timestamp) 반환.
+        timeout(초) 안에 새 프레임이 없거나 스트림이 종료되면 ret=False.
+        """
+        with self._cond:
+            has_new = self._cond.wait_for(lambda: self.seq > self._consumed_seq or self.stopped, timeout)
+            if not has_new or self.seq == self._consumed_seq:
+                return False, None, self.seq, self.timestamp
+            self._consumed_seq = self.seq
+            return True, self.frame, self.seq, self.timestamp
+
+    def set_idle(self, interval):
+        """
+        부재 모드 설정 (interval초, 0이면 해제). 소비자가 잠드는 대신 캡처 스레드가
+        카메라/RTSP는 grab()만 하고 interval마다 한 프레임만 디코드, 동영상 파일은 읽는 속도를 낮춤.
+        """
+        self.idle_interval = interval
+
+    def stats(self):
+        """캡처/누락/중복 프레임 수"""
+        with self._cond:
+            return {"captured": self.captured, "consumed_seq": self._consumed_seq,
+                    "dropped": self.dropped, "duplicates": self.duplicates, "idle_grabbed": self.idle_grabbed}
 
     def stop(self):
         """스트리밍 종료"""
-        self.stopped = True
\ No newline at end of file
+        with self._cond:
+            self.stopped = True
+            self._cond.notify_all()
@@ -1,107 +1,249 @@
-# === [NEW] 자세 로그 시각화 (이벤트별 + 개별 그래프 포함) ===
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
+# visualize_posture_log.py
+# 목적: 자세 경고 로그 시각화 리포트 생성기 (이벤트별 빈도 / 누적 그래프 / 자세별 타임라인)
+# Workflow: 리포트 기간(기본: 요약이 있는 마지막 날까지 7일) 결정
+#           → 빈도/누적 그래프는 rollups의 일/분 요약 파일에서, 자세별 타임라인만 기간 안의 원본 CSV 행에서 만듦
+#           → 그래프별 입력 데이터 해시 계산 → 지난 실행과 입력이 같은 그래프는 건너뜀
+#           → 나머지는 프로세스 풀에서 Agg 백엔드로 동시에 그려 visualize_results 폴더에 PNG 저장
+#
+# 사용 예:
+#   python visualize_posture_log.py
+#   python visualize_posture_log.py --log ../posture_log_desk1.csv --output ../visualize_results/desk1 --force
+#   python visualize_posture_log.py --day 2025-11-14 --days 1
+#
+# (import만으로는 아무것도 실행하지 않음. matplotlib은 실제로 그림을 그리는 워커에서만 import)
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
 from pathlib import Path
 
-def visualize_posture_log(csv_path=None):
+from logger import log_history_files
+from rollups import daily_report, minute_report, partition_days, rollup_dir
+
+DEFAULT_LOG = Path(__file__).parent.parent / "posture_log.csv"
+DEFAULT_OUTPUT_DIR = Path(__file__).parent.parent / "visualize_results"
+CACHE_FILENAME = ".report_cache.json"   # 그래프별 입력 데이터 해시 (변경 없는 그래프 건너뛰기용)
+REPORT_DAYS = 7                         # 기본 리포트 기간 (일)
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DAY_FORMAT = "%Y-%m-%d"
+_ROTATED_DAY = re.compile(r"_(\d{4}-\d{2}-\d{2})(?:_\d+)?$")   # posture_log_2025-11-14(_1).csv
+
+
+# === 1. 데이터 읽기 ===
+def report_days(directory, last_day=None, days=REPORT_DAYS):
+    """요약 파티션이 있는 날짜 중 last_day(기본: 마지막 파티션)까지 days일 범위에 드는 날짜 목록"""
+    available = partition_days(directory)
+    if not available:
+        return []
+    last_day = last_day or available[-1]
+    first_day = (datetime.strptime(last_day, DAY_FORMAT) - timedelta(days=days - 1)).strftime(DAY_FORMAT)
+    return [day for day in available if first_day <= day <= last_day]
+
+
+def load_events(csv_paths, first_day, last_day):
     """
-    posture_log.csv를 불러와:
-      (1) 이벤트별 발생 빈도
-      (2) 시간 흐름 누적 그래프
-      (3) 자세별 개별 그래프
-    를 자동 저장한다.
+    로그 CSV들에서 first_day~last_day(포함) 행만 읽어 시간순 [(datetime, event_type), ...] 반환.
+    교체된 파일은 이름의 날짜(그 파일의 마지막 날)로 범위 밖 파일을 열지 않고 건너뜀.
     """
-    try:
-        # 경로 설정
-        if csv_path is None:
-            csv_path = Path(__file__).parent.parent / "posture_log.csv"
-        else:
-            csv_path = Path(csv_path)
-
-        if not csv_path.exists():
-            print(f"⚠️ 로그 파일이 없습니다: {csv_path}")
-            return
-
-        df = pd.read_csv(csv_path)
-        if df.empty:
-            print("⚠️ 로그 데이터가 비어있습니다. 그래프를 생성하지 않습니다.")
-            return
-
-        # timestamp 파싱
-        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
-        df = df.dropna(subset=["timestamp"]).sort_values("timestamp")
-        if df.empty:
-            print("⚠️ 유효한 timestamp가 없어 그래프를 생성할 수 없습니다.")
-            return
-
-        # ---------- (1) 이벤트별 발생 빈도 ----------
-        counts = df["event_type"].value_counts()
+    events = []
+    for csv_path in csv_paths:
+        match = _ROTATED_DAY.search(Path(csv_path).stem)
+        file_day = match.group(1) if match else None
+        if file_day is not None and file_day < first_day:
+            continue  # 파일의 모든 행이 기간 이전
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    if not first_day <= row["timestamp"][:10] <= last_day:
+                        continue
+                    events.append((datetime.strptime(row["timestamp"], TIME_FORMAT), row["event_type"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        if file_day is not None and file_day > last_day:
+            break  # 이후 파일은 이 파일이 교체된 뒤의 기록이므로 모두 기간 이후
+    events.sort()
+    return events
+
+
+def build_jobs(directory, days, events):
+    """
+    그래프 작업 목록 생성: [(그래프 종류, 파일 이름, 입력 데이터), ...]
+    빈도/누적 그래프는 요약 파일(일/분 단위)에서, 타임라인은 events(기간 안의 CSV 행)에서 만듦.
+    입력 데이터는 프로세스 간 전달과 해시 계산이 쉽도록 문자열/숫자 리스트로만 구성.
+    """
+    counts = Counter()
+    for day in days:
+        for event_type, summary in daily_report(directory, day)["events"].items():
+            counts[event_type] += summary["count"]
+    jobs = [("bar", "posture_stats_bar.png", {"labels": list(counts), "counts": list(counts.values())})]
+
+    # 누적 그래프: 분 단위 요약을 누적 합 (첫 경고~마지막 경고 사이의 빈 분도 포함)
+    minute_counts = Counter()
+    for day in days:
+        for minute, events_in_minute in minute_report(directory, day).items():
+            when = datetime.strptime(f"{day} {minute}", "%Y-%m-%d %H:%M")
+            minute_counts[when] += sum(summary["count"] for summary in events_in_minute.values())
+    times, cumulative, total = [], [], 0
+    if minute_counts:
+        when, end = min(minute_counts), max(minute_counts)
+        while when <= end:
+            total += minute_counts.get(when, 0)
+            times.append(when.strftime(TIME_FORMAT))
+            cumulative.append(total)
+            when += timedelta(minutes=1)
+    jobs.append(("cumulative", "posture_stats_line.png", {"times": times, "cumulative": cumulative}))
+
+    # 자세별 타임라인 (원본 CSV 필요)
+    for event_type in counts:
+        times = [t.strftime(TIME_FORMAT) for t, e in events if e == event_type]
+        if times:
+            filename = f"{event_type}_timeline.png".replace(" ", "_")
+            jobs.append(("timeline", filename, {"event": event_type, "times": times}))
+    return jobs
+
+
+def _digest(kind, data):
+    return hashlib.sha1(json.dumps([kind, data], sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# === 2. 그래프 그리기 (워커 프로세스에서 실행) ===
+def _pyplot():
+    """화면 없이 파일로만 그리는 Agg 백엔드로 pyplot 로드"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+    return plt, mdates
+
+
+def _parse_times(times):
+    return [datetime.strptime(t, TIME_FORMAT) for t in times]
+
+
+def render_figure(kind, path, data):
+    """그래프 1개를 그려 path에 저장 (프로세스 풀에서 호출되므로 모듈 최상위 함수)"""
+    plt, mdates = _pyplot()
+
+    if kind == "bar":
+        # (1) 이벤트별 발생 빈도
         plt.figure(figsize=(8, 5))
-        plt.bar(counts.index, counts.values, color="#6fa8dc")
+        plt.bar(data["labels"], data["counts"], color="#6fa8dc")
         plt.title("Posture Warning Frequency")
         plt.xlabel("Event Type")
         plt.ylabel("Count")
         plt.grid(axis='y', linestyle='--', alpha=0.6)
-        for i, v in enumerate(counts.values):
+        for i, v in enumerate(data["counts"]):
             plt.text(i, v + 0.1, str(v), ha='center', fontweight='bold')
-        plt.tight_layout()
-        plt.savefig("posture_stats_bar.png")
-        plt.close()
-        print("✅ posture_stats_bar.png 저장 완료")
-
-        # ---------- (2) 시간 흐름 누적 그래프 ----------
-        df["count"] = 1
-        time_series = (
-            df.set_index("timestamp")
-              .resample("30S")
-              .sum(numeric_only=True)
-              .fillna(0)
-        )
-        time_series["cumulative"] = time_series["count"].cumsum()
 
+    elif kind == "cumulative":
+        # (2) 시간 흐름 누적 그래프
         plt.figure(figsize=(8, 5))
-        plt.plot(time_series.index, time_series["cumulative"], marker='o', color="#ff7f50")
+        plt.plot(_parse_times(data["times"]), data["cumulative"], marker='o', color="#ff7f50")
         plt.title("Cumulative Posture Warnings Over Time")
         plt.xlabel("Time")
         plt.ylabel("Cumulative Count")
-        ax = plt.gca()
-        ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M:%S"))
+        plt.gca().xaxis.set_major_formatter(mdates.DateFormatter("%m-%d %H:%M"))
         plt.xticks(rotation=45)
         plt.grid(True, linestyle='--', alpha=0.6)
-        plt.tight_layout()
-        plt.savefig("posture_stats_line.png")
-        plt.close()
-        print("✅ posture_stats_line.png 저장 완료")
-
-        # ---------- (3) 자세별 개별 그래프 ----------
-        for event in df["event_type"].unique():
-            sub = df[df["event_type"] == event]
-            if sub.empty:
-                continue
-
-            plt.figure(figsize=(8, 4))
-            plt.plot(sub["timestamp"], range(1, len(sub)+1),
-                     marker='o', linestyle='-', label=event)
-            plt.title(f"{event} Occurrences Over Time")
-            plt.xlabel("Time")
-            plt.ylabel("Count (incremental)")
-            plt.grid(True, linestyle='--', alpha=0.6)
-            plt.legend()
-            ax = plt.gca()
-            ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M:%S"))
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-
-            filename = f"{event}_timeline.png".replace(" ", "_")
-            plt.savefig(filename)
-            plt.close()
-            print(f"✅ {filename} 저장 완료")
-
-        print("📊 모든 그래프 생성 완료.")
-
-    except Exception as e:
-        print(f"🚨 시각화 중 오류 발생: {e}")
-
-# === 프로그램 종료 후 자동 실행 ===
-visualize_posture_log()
+
+    elif kind == "timeline":
+        # (3) 자세별 개별 그래프
+        plt.figure(figsize=(8, 4))
+        plt.plot(_parse_times(data["times"]), range(1, len(data["times"]) + 1),
+                 marker='o', linestyle='-', label=data["event"])
+        plt.title(f"{data['event']} Occurrences Over Time")
+        plt.xlabel("Time")
+        plt.ylabel("Count (incremental)")
+        plt.grid(True, linestyle='--', alpha=0.6)
+        plt.legend()
+        plt.gca().xaxis.set_major_formatter(mdates.DateFormatter("%H:%M:%S"))
+        plt.xticks(rotation=45)
+
+    else:
+        raise ValueError(f"unknown figure kind: {kind}")
+
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+    return str(path)
+
+
+# === 3. 리포트 생성 ===
+def visualize_posture_log(log_filename=DEFAULT_LOG, output_dir=DEFAULT_OUTPUT_DIR, workers=None, force=False,
+                          last_day=None, days=REPORT_DAYS):
+    """
+    요약과 로그를 읽어 그래프를 output_dir에 저장하고, 새로 그린 파일 목록을 반환합니다.
+    - log_filename: 로그 파일 (요약은 rollups/<이름>/, 타임라인은 날짜/크기로 교체된 이전 파일도 함께 읽음)
+    - workers: 프로세스 수 (기본: 그릴 그래프 수와 CPU 수 중 작은 값, 1이면 현재 프로세스에서 그림)
+    - force: 입력이 바뀌지 않은 그래프도 다시 그림
+    - last_day, days: 리포트 기간 (last_day까지 days일, 기본: 요약이 있는 마지막 날까지 REPORT_DAYS일)
+    """
+    directory = rollup_dir(log_filename)
+    report_range = report_days(directory, last_day, days)
+    if not report_range:
+        print(f"⚠️ 요약 데이터가 없습니다: {directory} "
+              f"(이전 로그는 python rollups.py --log {log_filename} --rebuild <CSV...> 로 가져오기)")
+        return []
+
+    events = load_events(log_history_files(log_filename), report_range[0], report_range[-1])
+    print(f"📅 리포트 기간: {report_range[0]} ~ {report_range[-1]}")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    print(f"📊 그래프를 '{output_dir}' 폴더에 저장합니다.")
+
+    # 입력 데이터가 지난 실행과 같고 파일도 남아 있으면 건너뜀
+    cache_path = output_dir / CACHE_FILENAME
+    try:
+        cache = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cache = {}
+    jobs = build_jobs(directory, report_range, events)
+    pending = []
+    for kind, filename, data in jobs:
+        digest = _digest(kind, data)
+        if not force and cache.get(filename) == digest and (output_dir / filename).exists():
+            continue
+        pending.append((kind, output_dir / filename, data, digest))
+
+    skipped = len(jobs) - len(pending)
+    if not pending:
+        print("✅ 변경된 데이터가 없어 모든 그래프를 건너뜁니다.")
+        return []
+
+    workers = workers or min(len(pending), os.cpu_count() or 1)
+    if workers <= 1 or len(pending) == 1:
+        paths = [render_figure(kind, path, data) for kind, path, data, _ in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(render_figure, kind, path, data) for kind, path, data, _ in pending]
+            paths = [f.result() for f in futures]
+
+    for (_, path, _, digest), saved in zip(pending, paths):
+        cache[path.name] = digest
+        print(f"✅ {Path(saved).name} 저장 완료")
+    cache_path.write_text(json.dumps(cache, indent=1), encoding="utf-8")
+
+    print(f"📊 그래프 {len(paths)}개 생성 완료 (변경 없음 {skipped}개 건너뜀).")
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Posture Guardian - 자세 경고 로그 시각화")
+    parser.add_argument("--log", default=DEFAULT_LOG,
+                        help="로그 CSV 파일 (날짜/크기로 교체된 이전 파일도 함께 읽음)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="그래프 저장 폴더")
+    parser.add_argument("--workers", type=int, default=None, help="그래프를 그릴 프로세스 수 (1이면 순차 실행)")
+    parser.add_argument("--force", action="store_true", help="데이터가 바뀌지 않은 그래프도 다시 그리기")
+    parser.add_argument("--day", default=None, help="리포트 마지막 날짜 YYYY-MM-DD (기본: 요약이 있는 마지막 날)")
+    parser.add_argument("--days", type=int, default=REPORT_DAYS, help="리포트 기간 (일)")
+    args = parser.parse_args()
+
+    visualize_posture_log(args.log, args.output, workers=args.workers, force=args.force,
+                          last_day=args.day, days=args.days)
@@ -0,0 +1,9 @@
+# conftest.py
+# 목적: action/ 모듈을 프로그램과 같은 방식(from config import ...)으로 import할 수 있도록 경로 추가
+#
+# 실행: PythonCVteamProject 폴더에서  python -m pytest tests
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "action"))
@@ -0,0 +1,136 @@
+# test_frame_bus.py
+# 목적: 공유 메모리 고리 버퍼의 순번(seq) 규칙 확인 - 최신/순차 읽기, 덮어써진 프레임 건너뛰기,
+#       복사 도중 작성자가 슬롯을 덮어쓴 경우(찢어진 읽기) 버리기, 종료 알림
+
+import uuid
+
+import numpy as np
+import pytest
+
+from frame_bus import FrameBusReader, FrameBusWriter
+
+SHAPE = (4, 6, 3)
+SLOTS = 4
+
+
+@pytest.fixture
+def bus():
+    name = f"test_{uuid.uuid4().hex[:12]}"
+    writer = FrameBusWriter(name, SHAPE, SLOTS)
+    readers = []
+
+    def attach(**kwargs):
+        reader = FrameBusReader(name, timeout=1, **kwargs)
+        readers.append(reader)
+        return reader
+
+    yield writer, attach
+    for reader in readers:
+        reader.stop()
+    if hasattr(writer, "header"):
+        writer.close()
+
+
+def publish(writer, count):
+    for _ in range(count):
+        seq = writer.seq + 1
+        writer.publish(np.full(SHAPE, seq, np.uint8), 1000.0 + seq)
+
+
+def test_latest_mode_skips_to_newest(bus):
+    writer, attach = bus
+    reader = attach()
+    publish(writer, 3)
+    ret, frame, seq, timestamp = reader.read_new(timeout=0)
+    assert ret and seq == 3 and timestamp == 1003.0 and (frame == 3).all()
+    assert reader.dropped == 2
+    assert reader.read_new(timeout=0)[0] is False
+
+
+def test_sequential_mode_reads_every_frame_still_in_ring(bus):
+    writer, attach = bus
+    reader = attach(sequential=True)
+    publish(writer, 2)
+    assert [reader.read_new(timeout=0)[2] for _ in range(2)] == [1, 2]
+
+    # 슬롯 수보다 많이 밀리면 남아 있는 가장 오래된 프레임부터 (쓰는 중일 수 있는 1칸은 제외)
+    publish(writer, 10)
+    seqs = []
+    while True:
+        ret, frame, seq, _ = reader.read_new(timeout=0)
+        if not ret:
+            break
+        assert (frame == seq).all()
+        seqs.append(seq)
+    assert seqs == [10, 11, 12]
+    assert reader.dropped == 7
+
+
+def test_sequential_reader_attached_before_first_frame(bus):
+    writer, attach = bus
+    reader = attach(sequential=True)
+    assert reader.read_new(timeout=0)[0] is False   # 빈 0번 슬롯을 프레임으로 내주지 않음
+    publish(writer, 1)
+    assert reader.read_new(timeout=0)[2] == 1
+
+
+def test_slot_being_written_is_not_read(bus):
+    writer, attach = bus
+    reader = attach()
+    publish(writer, 1)
+    reader.slot_seq[1] = -1   # 작성자가 쓰는 중 표시
+    assert reader._take(1, copy=True) is None
+    reader.slot_seq[1] = 1
+    assert reader._take(1, copy=True)[1] == 1001.0
+
+
+def test_torn_read_is_discarded(bus):
+    writer, attach = bus
+    reader = attach()
+    publish(writer, 1)
+
+    class RacingFrames:
+        """복사하는 동안 작성자가 고리 버퍼를 한 바퀴 돌아 같은 슬롯을 덮어씀"""
+        def __init__(self, frames):
+            self.frames = frames
+
+        def __getitem__(self, i):
+            frames = self.frames
+            class Slot:
+                def copy(self):
+                    publish(writer, SLOTS)
+                    return frames[i].copy()
+            return Slot()
+
+    reader.frames, frames = RacingFrames(reader.frames), reader.frames
+    assert reader._take(1, copy=True) is None
+    reader.frames = frames
+
+    ret, frame, seq, _ = reader.read_new(timeout=0)
+    assert ret and seq == 1 + SLOTS and (frame == seq).all()
+
+
+def test_zero_copy_view_validity(bus):
+    writer, attach = bus
+    reader = attach(copy=False)
+    publish(writer, 1)
+    ret, view, seq, _ = reader.read_new(timeout=0)
+    assert ret and reader.valid(seq) and (view == 1).all()
+    publish(writer, SLOTS)
+    assert not reader.valid(seq)   # 뷰가 덮어써짐 → 결과를 버려야 함
+
+
+def test_close_stops_reader(bus):
+    writer, attach = bus
+    reader = attach()
+    publish(writer, 1)
+    assert reader.read_new(timeout=0)[0]
+    writer.close()
+    assert reader.stopped
+    assert reader.read_new(timeout=None)[:3] == (False, None, 1)   # 기다리지 않고 바로 종료를 알림
+
+
+def test_publish_rejects_wrong_shape(bus):
+    writer, _ = bus
+    with pytest.raises(ValueError):
+        writer.publish(np.zeros((2, 2, 3), np.uint8), 0.0)
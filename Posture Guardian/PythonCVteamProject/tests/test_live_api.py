@@ -0,0 +1,105 @@
+# test_live_api.py
+# 목적: WebSocket 프레임 만들기/읽기(길이 3종, 마스크, 크기 제한)와 서버의 close 1009 응답 확인
+
+import asyncio
+import base64
+import os
+import socket
+import struct
+
+import pytest
+
+from config import LIVE_API_MAX_FRAME_BYTES
+from live_api import LiveStateServer, _FrameTooLarge, _read_ws_frame, _unmask, ws_frame
+
+
+def client_frame(payload, opcode=0x1, mask=b"\x37\xfa\x21\x3d"):
+    """클라이언트 → 서버 프레임 (마스크 적용, mask=None이면 마스크 없음)"""
+    n = len(payload)
+    flag = 0x80 if mask else 0
+    if n < 126:
+        header = bytes([0x80 | opcode, flag | n])
+    elif n < 1 << 16:
+        header = bytes([0x80 | opcode, flag | 126]) + struct.pack("!H", n)
+    else:
+        header = bytes([0x80 | opcode, flag | 127]) + struct.pack("!Q", n)
+    if not mask:
+        return header + payload
+    return header + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+
+def read_frame(data, **kwargs):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await _read_ws_frame(reader, **kwargs)
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("n", [0, 1, 5, 125, 126, 127, 1000, 65535, LIVE_API_MAX_FRAME_BYTES])
+def test_masked_frame_round_trip(n):
+    payload = os.urandom(n)
+    assert read_frame(client_frame(payload, 0x9)) == (0x9, payload)
+
+
+def test_unmasked_frame():
+    assert read_frame(client_frame(b"hello", mask=None)) == (0x1, b"hello")
+
+
+def test_unmask_matches_bytewise_xor():
+    mask = b"\x00\xff\x10\x81"
+    for n in range(0, 13):
+        payload = os.urandom(n)
+        assert _unmask(payload, mask) == bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+
+@pytest.mark.parametrize("n", [LIVE_API_MAX_FRAME_BYTES + 1, 1 << 62])
+def test_oversized_frame_is_rejected_before_payload(n):
+    # 헤더만 보내도 길이만 보고 거절 (payload를 기다리거나 메모리를 잡지 않음)
+    header = bytes([0x82, 0x80 | 127]) + struct.pack("!Q", n)
+    with pytest.raises(_FrameTooLarge):
+        read_frame(header)
+
+
+def test_truncated_frame():
+    with pytest.raises(asyncio.IncompleteReadError):
+        read_frame(client_frame(b"hello")[:-1])
+
+
+@pytest.mark.parametrize("n, header", [
+    (5, b"\x81\x05"),
+    (126, b"\x81\x7e\x00\x7e"),
+    (70000, b"\x81\x7f" + struct.pack("!Q", 70000)),
+])
+def test_server_frame_header(n, header):
+    frame = ws_frame(b"x" * n)
+    assert frame[:len(header)] == header and len(frame) == len(header) + n
+
+
+def _recv_exactly(sock, n):
+    data = b""
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        assert chunk, "connection closed early"
+        data += chunk
+    return data
+
+
+def test_server_closes_oversized_frame_with_1009():
+    server = LiveStateServer()
+    host, port = server.start(0)
+    try:
+        with socket.create_connection((host, port), timeout=5) as sock:
+            key = base64.b64encode(os.urandom(16)).decode()
+            sock.sendall(f"GET /ws HTTP/1.1\r\nHost: {host}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                         f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode())
+            response = b""
+            while not response.endswith(b"\r\n\r\n"):
+                response += _recv_exactly(sock, 1)
+            assert response.startswith(b"HTTP/1.1 101")
+
+            sock.sendall(bytes([0x82, 0x80 | 127]) + struct.pack("!Q", LIVE_API_MAX_FRAME_BYTES + 1))
+            assert _recv_exactly(sock, 4) == b"\x88\x02" + struct.pack("!H", 1009)
+    finally:
+        server.stop()
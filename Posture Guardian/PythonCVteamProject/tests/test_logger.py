@@ -0,0 +1,75 @@
+# test_logger.py
+# 목적: EventLogWriter가 기록 실패(디스크 가득 참 등) 뒤에도 스레드를 유지하고 남은 이벤트를 다시 기록하는지 확인
+
+import csv
+import time
+
+import pytest
+
+import logger
+from logger import EventLogWriter
+
+
+@pytest.fixture(autouse=True)
+def fast_flush(monkeypatch):
+    monkeypatch.setattr(logger, "LOG_FLUSH_INTERVAL_SEC", 0.02)
+
+
+def _failing_writes(writer, count):
+    """처음 count번의 _write_batch 호출은 OSError를 냄"""
+    write_batch = writer._write_batch
+    remaining = [count]
+
+    def flaky(batch):
+        if remaining[0]:
+            remaining[0] -= 1
+            raise OSError(28, "No space left on device")
+        write_batch(batch)
+    writer._write_batch = flaky
+
+
+def _rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_write_error_is_retried(tmp_path):
+    path = tmp_path / "log.csv"
+    writer = EventLogWriter(path, rollups=False)
+    _failing_writes(writer, 2)
+    for i in range(5):
+        writer.put("Leaning", i)
+    deadline = time.monotonic() + 5
+    while writer.written < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    writer.close()
+
+    assert writer.stats() == {"written": 5, "pending": 0, "dropped": 0, "errors": 2}
+    rows = _rows(path)
+    assert rows[0] == logger.LOG_HEADER
+    assert [row[1:] for row in rows[1:]] == [["Leaning", str(i)] for i in range(5)]
+
+
+def test_persistent_error_drops_on_close(tmp_path):
+    writer = EventLogWriter(tmp_path / "log.csv", rollups=False)
+    _failing_writes(writer, 1000)
+    writer.put("Slouching", 1.0)
+    writer.close()
+
+    assert not writer._thread.is_alive()
+    stats = writer.stats()
+    assert stats["written"] == 0 and stats["dropped"] == 1 and stats["errors"] >= 1
+
+
+def test_partial_batch_is_not_written_twice(tmp_path):
+    path = tmp_path / "log.csv"
+    writer = EventLogWriter(path, rollups=False)
+    writer.close()
+    writer._file = open(path, "a", newline="", encoding="utf-8")
+    writer._writer = csv.writer(writer._file)
+
+    batch = [("event", logger.datetime.now(), "Turtle_Neck", 1.0), ("event", None, "Leaning", 2.0)]
+    with pytest.raises(AttributeError):
+        writer._write_batch(batch)
+    assert batch == [("event", None, "Leaning", 2.0)]   # 기록한 이벤트는 목록에서 빠짐
+    writer._file.close()
@@ -0,0 +1,53 @@
+# test_pipeline.py
+# 목적: 파이프라인 단계 사이 DropOldestQueue의 순서/가장 오래된 항목 버리기/종료 동작 확인
+
+import threading
+import time
+
+from pipeline import DropOldestQueue
+
+
+def test_fifo_order():
+    q = DropOldestQueue(3)
+    for i in range(3):
+        q.put(i)
+    assert len(q) == 3
+    assert [q.get(0) for _ in range(3)] == [0, 1, 2]
+    assert q.dropped == 0 and q.put_count == 3
+
+
+def test_full_queue_drops_oldest():
+    q = DropOldestQueue(2)
+    for i in range(5):
+        q.put(i)
+    assert q.dropped == 3 and q.put_count == 5
+    assert [q.get(0), q.get(0)] == [3, 4]
+
+
+def test_get_timeout_returns_none():
+    q = DropOldestQueue(2)
+    started = time.monotonic()
+    assert q.get(timeout=0.05) is None
+    assert time.monotonic() - started >= 0.04
+
+
+def test_get_wakes_on_put():
+    q = DropOldestQueue(2)
+    threading.Timer(0.05, q.put, args=("frame",)).start()
+    assert q.get(timeout=5) == "frame"
+
+
+def test_close_wakes_waiter_after_draining():
+    q = DropOldestQueue(2)
+    q.put("last")
+    q.close()
+    assert q.get(timeout=5) == "last"   # 닫혀도 남은 항목은 먼저 꺼냄
+    assert q.get(timeout=5) is None
+
+    waiter = DropOldestQueue(2)
+    results = []
+    thread = threading.Thread(target=lambda: results.append(waiter.get()))
+    thread.start()
+    waiter.close()
+    thread.join(5)
+    assert not thread.is_alive() and results == [None]
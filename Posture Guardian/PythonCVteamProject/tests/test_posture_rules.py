@@ -0,0 +1,119 @@
+# test_posture_rules.py
+# 목적: config.POSTURE_RULES + PostureRuleSet.evaluate가 이전 main.py의 Stage 3 if/else 판정과 같은 결과를 내는지 확인
+
+import math
+
+import numpy as np
+import pytest
+
+from config import (BAD_POSTURE_DURATION, NECK_ANGLE_THRESHOLD, LEAN_ANGLE_THRESHOLD_LOW, LEAN_ANGLE_THRESHOLD_HIGH,
+                    SLOUCH_RATIO_THRESHOLD, POSTURE_RULES)
+from posture_rules import PostureRuleSet
+from state_manager import StateManager
+
+
+class LegacyStage3:
+    """이전 main.py의 거북목/허리 기울임/구부정 판정을 그대로 옮긴 비교용 구현 (time.time() 대신 now 사용)"""
+
+    def __init__(self):
+        self.start = {"Turtle_Neck": None, "Leaning": None, "Slouching": None}
+        self.triggered = dict.fromkeys(self.start, False)
+
+    def _bad(self, event, now):
+        """나쁜 자세 프레임: (경고 중이면 True, 이번에 처음 경고했으면 True)"""
+        if self.start[event] is None:
+            self.start[event] = now
+        if now - self.start[event] > BAD_POSTURE_DURATION:
+            fired = not self.triggered[event]
+            self.triggered[event] = True
+            return True, fired
+        return False, False
+
+    def _clear(self, event):
+        self.start[event] = None
+        self.triggered[event] = False
+
+    def step(self, neck_angle, lean_angle, slouch_ratio, now):
+        """반환: ({경고 중인 이벤트: 메시지}, {처음 경고한 이벤트})"""
+        active, fired = {}, set()
+
+        if neck_angle and neck_angle < NECK_ANGLE_THRESHOLD:
+            on, first = self._bad("Turtle_Neck", now)
+            if on:
+                active["Turtle_Neck"] = "Turtle Neck!"
+            if first:
+                fired.add("Turtle_Neck")
+        else:
+            self._clear("Turtle_Neck")
+
+        if not (LEAN_ANGLE_THRESHOLD_LOW < lean_angle < LEAN_ANGLE_THRESHOLD_HIGH):
+            on, first = self._bad("Leaning", now)
+            if on:
+                active["Leaning"] = "Leaning Forward!" if lean_angle > LEAN_ANGLE_THRESHOLD_HIGH else "Leaning Back!"
+            if first:
+                fired.add("Leaning")
+        else:
+            self._clear("Leaning")
+
+        if slouch_ratio is not None:   # 이전 코드: torso_v <= 0.01이면 판정하지 않음 (상태 유지)
+            if slouch_ratio > SLOUCH_RATIO_THRESHOLD:
+                on, first = self._bad("Slouching", now)
+                if on:
+                    active["Slouching"] = "Slouching!"
+                if first:
+                    fired.add("Slouching")
+            else:
+                self._clear("Slouching")
+        return active, fired
+
+
+def _rule_step(rule_set, state, metrics, now, dt):
+    evaluation = rule_set.evaluate(metrics, state, now, dt)
+    active = {}
+    for i in evaluation.active:
+        rule = rule_set[i]
+        active[rule.event] = rule.message_for("above" if evaluation.above[i] else "below")
+    return active, {rule_set[i].event for i in np.flatnonzero(evaluation.fired)}
+
+
+def _run_both(frames, dt=0.5):
+    legacy = LegacyStage3()
+    rule_set = PostureRuleSet(POSTURE_RULES)
+    state = StateManager(len(rule_set))
+    for i, (neck, lean, slouch) in enumerate(frames):
+        now = 1000.0 + i * dt
+        metrics = {"neck_angle": neck, "lean_angle": lean,
+                   "slouch_ratio": math.nan if slouch is None else slouch}
+        yield i, legacy.step(neck, lean, slouch, now), _rule_step(rule_set, state, metrics, now, dt)
+
+
+def test_random_sequences_match_legacy_checks():
+    rng = np.random.default_rng(7)
+    # 경계값(150, 85, 95, 0.09)과 NaN이 자주 나오도록 정수/격자 값으로 생성
+    n = 4000
+    necks = rng.choice([140.0, 149.0, 150.0, 151.0, 160.0], n)
+    leans = rng.choice([80.0, 85.0, 86.0, 90.0, 94.0, 95.0, 96.0, math.nan], n)
+    slouches = rng.choice([0.05, 0.09, 0.1, 0.2, None], n)
+    # 같은 값이 유지 시간 이상 이어지도록 구간 단위로 반복
+    frames = [(necks[i // 15], leans[i // 15], slouches[i // 15]) for i in range(n)]
+    for i, old, new in _run_both(frames):
+        assert new == old, f"frame {i}: {frames[i]}"
+
+
+@pytest.mark.parametrize("lean, message", [
+    (LEAN_ANGLE_THRESHOLD_HIGH, "Leaning Back!"),        # 정확히 95도: 나쁜 자세, 방향은 이전처럼 Back
+    (LEAN_ANGLE_THRESHOLD_HIGH + 0.1, "Leaning Forward!"),
+    (LEAN_ANGLE_THRESHOLD_LOW, "Leaning Back!"),
+    (math.nan, "Leaning Back!"),
+])
+def test_lean_boundary_direction(lean, message):
+    frames = [(160.0, lean, 0.05)] * 20
+    *_, (_, old, new) = _run_both(frames)
+    assert old[0] == {"Leaning": message}
+    assert new[0] == old[0]
+
+
+def test_lean_inside_range_is_good():
+    frames = [(160.0, 90.0, 0.05)] * 20
+    *_, (_, old, new) = _run_both(frames)
+    assert old == new == ({}, set())
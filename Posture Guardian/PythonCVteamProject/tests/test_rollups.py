@@ -0,0 +1,78 @@
+# test_rollups.py
+# 목적: 기록 중 갱신한 요약(RollupStore)과 CSV로 다시 만든 요약(rebuild_from_csv)이 같은지, 다시 만들어도 중복/손실이 없는지 확인
+
+import csv
+from datetime import datetime, timedelta
+
+from rollups import RollupStore, daily_report, minute_report, partition_days, rebuild_from_csv, weekly_report
+
+START = datetime(2025, 11, 13, 23, 58, 30)
+EVENTS = [(START + timedelta(seconds=37 * i), event, 100.0 + i)
+          for i, event in enumerate(["Turtle_Neck", "Leaning", "Slouching"] * 6)]   # 자정을 넘겨 이틀에 걸침
+
+
+def _write_csv(path, rows, extra=()):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", "event_type", "value"])
+        for when, event, value in rows:
+            writer.writerow([when.strftime("%Y-%m-%d %H:%M:%S"), event, round(value, 2)])
+        writer.writerows(extra)
+
+
+def _live_store(directory):
+    """logger 기록 스레드처럼 경고 + 지속 시간을 반영한 요약"""
+    store = RollupStore(directory)
+    for when, event, value in EVENTS:
+        store.add_event(event, value, when)
+        store.add_duration(event, 6.5, when)
+    store.flush()
+
+
+def _reports(directory):
+    return {day: (daily_report(directory, day), minute_report(directory, day)) for day in partition_days(directory)}
+
+
+def _without_durations(reports):
+    def strip(node):
+        if isinstance(node, dict):
+            return {k: strip(v) for k, v in node.items() if k != "bad_seconds"}
+        if isinstance(node, tuple):
+            return tuple(strip(v) for v in node)
+        return node
+    return strip(reports)
+
+
+def test_rebuild_matches_live_counts(tmp_path):
+    live, rebuilt = tmp_path / "live", tmp_path / "rebuilt"
+    _live_store(live)
+    _write_csv(tmp_path / "log.csv", EVENTS)
+    assert rebuild_from_csv([tmp_path / "log.csv"], rebuilt) == len(EVENTS)
+
+    assert partition_days(live) == partition_days(rebuilt) == ["2025-11-13", "2025-11-14"]
+    assert _without_durations(_reports(rebuilt)) == _without_durations(_reports(live))
+
+
+def test_rebuild_keeps_durations_and_is_idempotent(tmp_path):
+    directory = tmp_path / "rollups"
+    _live_store(directory)
+    before = _reports(directory)
+    _write_csv(tmp_path / "log.csv", EVENTS, extra=[["not a date", "Leaning", "1"], ["2025-11-14 00:00:00", "Leaning", "x"]])
+
+    for _ in range(2):
+        assert rebuild_from_csv([tmp_path / "log.csv"], directory) == len(EVENTS)   # 잘못된 행은 건너뜀
+        assert _reports(directory) == before
+    assert not list(directory.glob(".rebuild-*"))   # 임시 디렉터리 정리
+
+
+def test_rebuild_from_rotated_files(tmp_path):
+    half = len(EVENTS) // 2
+    _write_csv(tmp_path / "log_2025-11-13.csv", EVENTS[:half])
+    _write_csv(tmp_path / "log.csv", EVENTS[half:])
+    rebuild_from_csv([tmp_path / "log_2025-11-13.csv", tmp_path / "log.csv"], tmp_path / "rollups")
+
+    report = weekly_report(tmp_path / "rollups", "2025-11-14")
+    assert list(report["days"])[-2:] == ["2025-11-13", "2025-11-14"]
+    totals = report["events"]
+    assert sum(s["count"] for s in totals.values()) == len(EVENTS)
+    assert totals["Turtle_Neck"]["min"] == 100.0 and totals["Slouching"]["max"] == 100.0 + len(EVENTS) - 1
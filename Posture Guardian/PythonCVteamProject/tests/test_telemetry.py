@@ -0,0 +1,39 @@
+# test_telemetry.py
+# 목적: Prometheus 라벨 이스케이프(_escape_label)와 /metrics 텍스트에 좌석 이름이 안전하게 들어가는지 확인
+
+import re
+
+import pytest
+
+from telemetry import Telemetry, _escape_label
+
+
+@pytest.mark.parametrize("value, escaped", [
+    ("desk1", "desk1"),
+    ('say "hi"', 'say \\"hi\\"'),
+    ("C:\\seat", "C:\\\\seat"),
+    ("line1\nline2", "line1\\nline2"),
+    ('\\"', '\\\\\\"'),            # 백슬래시를 먼저 바꿔야 따옴표 이스케이프가 두 번 처리되지 않음
+    ("창가 자리", "창가 자리"),
+    (3, "3"),
+])
+def test_escape_label(value, escaped):
+    assert _escape_label(value) == escaped
+
+
+def _unescape(text):
+    return re.sub(r'\\(["\\n])', lambda m: "\n" if m.group(1) == "n" else m.group(1), text)
+
+
+def test_prometheus_text_keeps_seat_label_on_one_line():
+    seat = 'desk "A"\\1\nnext'
+    telemetry = Telemetry(seat)
+    telemetry.observe("pose", 0.004)
+    lines = telemetry.prometheus_text().splitlines()
+
+    pattern = re.compile(r'seat="((?:[^"\\]|\\.)*)"')
+    samples = [line for line in lines if not line.startswith("#")]
+    assert samples
+    for line in samples:
+        match = pattern.search(line)
+        assert match and _unescape(match.group(1)) == seat
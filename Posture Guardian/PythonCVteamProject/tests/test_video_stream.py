@@ -0,0 +1,71 @@
+# test_video_stream.py
+# 목적: VideoStream의 순번(seq) 기반 프레임 전달과 스트림 종료 처리 확인 (실제 카메라 대신 가짜 캡처 사용)
+
+import numpy as np
+
+import video_stream
+from video_stream import VideoStream
+
+
+class FakeCapture:
+    """정해진 프레임들을 돌려준 뒤 읽기 실패(ret=False)를 반환하는 cv2.VideoCapture 대용"""
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.released = False
+
+    def read(self):
+        if self.frames:
+            return True, self.frames.pop(0)
+        return False, None
+
+    def grab(self):
+        return bool(self.frames)
+
+    def release(self):
+        self.released = True
+
+
+def _frames(n):
+    return [np.full((4, 4, 3), i, np.uint8) for i in range(1, n + 1)]
+
+
+def _open(monkeypatch, tmp_path, frames):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"")   # 동영상 파일로 인식시키기 위한 빈 파일 (첫 읽기 실패에서 종료)
+    capture = FakeCapture(frames)
+    monkeypatch.setattr(video_stream.cv2, "VideoCapture", lambda src: capture)
+    return VideoStream(str(path)), capture
+
+
+def test_failed_read_keeps_last_good_frame(monkeypatch, tmp_path):
+    stream, capture = _open(monkeypatch, tmp_path, _frames(3))
+    stream.start()
+    with stream._cond:
+        assert stream._cond.wait_for(lambda: stream.stopped, timeout=5)
+
+    # 끝에서 실패한 읽기가 가져가지 않은 마지막 프레임을 지우면 안 됨
+    ret, frame, seq, timestamp = stream.read_new(timeout=1)
+    assert ret and seq == 3 and timestamp is not None
+    assert frame[0, 0, 0] == 3
+
+    ret, frame, seq, _ = stream.read_new(timeout=1)
+    assert not ret and frame is None and seq == 3
+
+    assert stream.read()[0] is True
+    stats = stream.stats()
+    assert stats["captured"] == 3 and stats["dropped"] == 2 and stats["duplicates"] == 1
+
+
+def test_read_new_returns_each_frame_once(monkeypatch, tmp_path):
+    stream, _ = _open(monkeypatch, tmp_path, _frames(1))
+    ret, frame, seq, _ = stream.read_new(timeout=0)
+    assert ret and seq == 1 and frame[0, 0, 0] == 1
+    assert stream.read_new(timeout=0)[0] is False
+
+
+def test_open_failure_stops_stream(monkeypatch, tmp_path):
+    monkeypatch.setattr(video_stream.time, "sleep", lambda s: None)
+    stream, _ = _open(monkeypatch, tmp_path, [])
+    assert stream.stopped
+    assert stream.read_new(timeout=0)[:2] == (False, None)
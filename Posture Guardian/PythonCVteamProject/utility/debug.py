@@ -2,45 +2,18 @@ import cv2
 import mediapipe as mp
 import numpy as np
 import time
-import math
-from threading import Thread
+import sys
+from pathlib import Path
 
-# ... (VideoStream 클래스, calculate_angle_2d 함수 동일) ...
-class VideoStream:
-    def __init__(self, src=0):
-        self.cap = cv2.VideoCapture(src)
-        print("Connecting to stream...")
-        time.sleep(1.0) 
-        (self.ret, self.frame) = self.cap.read()
-        self.stopped = False
-        if not self.ret:
-             print("🚨 ERROR: Stream connection failed.")
-             self.stopped = True
-    def start(self):
-        if not self.stopped:
-            Thread(target=self.update, args=(), daemon=True).start()
-        return self
-    def update(self):
-        while True:
-            if self.stopped: self.cap.release(); return
-            (self.ret, self.frame) = self.cap.read()
-    def read(self):
-        return self.ret, self.frame
-    def stop(self):
-        self.stopped = True
-def calculate_angle_2d(a, b, c):
-    try:
-        p_a = np.array([a.x, a.y])
-        p_b = np.array([b.x, b.y])
-        p_c = np.array([c.x, c.y])
-        ba = p_a - p_b
-        bc = p_c - p_b
-        cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
-        angle_rad = np.arccos(np.clip(cosine_angle, -1.0, 1.0))
-        return np.degrees(angle_rad)
-    except Exception as e:
-        return None
-# -----------------------------------------------
+# action 폴더의 자세 계산 커널을 메인 프로그램과 공유
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "action"))
+from posture_analysis import compute_posture_metrics, landmarks_to_array, LEFT_SHOULDER
+from config import SLOUCH_RATIO_THRESHOLD
+# 카메라는 main.py와 같은 VideoStream으로 열고, "bus:<이름>"을 주면 frame_bus.py 공유 메모리에서 프레임을 받음
+# (main.py와 함께 실행할 때 카메라에 RTSP 연결을 하나 더 열지 않음)
+#   python debug.py bus:desk1
+from video_stream import parse_source
+from frame_bus import open_stream
 
 # --- MediaPipe 포즈 모델 초기화 ---
 mp_pose = mp.solutions.pose
@@ -52,7 +25,8 @@ username = ""
 password = ""
 ip_address = ""
 rtsp_url = f"rtsp://{username}:{password}@{ip_address}:554/stream2" 
-cap = VideoStream(rtsp_url).start()
+source = parse_source(sys.argv[1]) if len(sys.argv) > 1 else rtsp_url
+cap = open_stream(source)
 # -----------------------------------------------
 
 print("✅ Angle Debugger (RTSP Mode) - Press 'q' to quit.")
@@ -68,32 +42,19 @@ while True:
     pose_results = pose.process(image_rgb)
     
     if pose_results.pose_landmarks:
-        landmarks = pose_results.pose_landmarks.landmark
+        lm = landmarks_to_array(pose_results.pose_landmarks)
         frame_h, frame_w, _ = frame.shape
         
         try:
-            ear = landmarks[mp_pose.PoseLandmark.LEFT_EAR.value]
-            shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-            hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-            
-            # --- 1. 거북목 각도 (Neck) ---
-            current_neck_angle = calculate_angle_2d(ear, shoulder, hip)
-            
-            # --- 2. 기울임 각도 (Lean) ---
-            dy = -(shoulder.y - hip.y) 
-            dx = shoulder.x - hip.x
-            current_lean_angle = np.degrees(np.arctan2(dy, dx))
-            
-            # --- 3. (★추가★) 구부정 비율 (Slouch Ratio) ---
-            current_slouch_ratio = None
-            torso_h_dist = abs(shoulder.x - hip.x)
-            torso_v_dist = abs(shoulder.y - hip.y)
-            if torso_v_dist > 0.01:
-                current_slouch_ratio = torso_h_dist / torso_v_dist
+            # --- 거북목 각도 / 기울임 각도 / 구부정 비율을 main.py와 같은 커널로 계산 ---
+            metrics = compute_posture_metrics(lm)
+            current_neck_angle = None if np.isnan(metrics["neck_angle"]) else metrics["neck_angle"]
+            current_lean_angle = metrics["lean_angle"]
+            current_slouch_ratio = None if np.isnan(metrics["slouch_ratio"]) else metrics["slouch_ratio"]
             # -----------------------------------------------
 
             # --- 각도를 화면에 실시간 표시 ---
-            shoulder_px = (int(shoulder.x * frame_w), int(shoulder.y * frame_h))
+            shoulder_px = (int(lm[LEFT_SHOULDER, 0] * frame_w), int(lm[LEFT_SHOULDER, 1] * frame_h))
             
             if current_neck_angle is not None:
                 cv2.putText(frame, f"Neck: {current_neck_angle:.1f}", 
@@ -107,7 +68,7 @@ while True:
             
             # (★추가★)
             if current_slouch_ratio is not None:
-                color = (0, 0, 255) if current_slouch_ratio > 0.3 else (0, 255, 255) # 0.3 임계값 테스트
+                color = (0, 0, 255) if current_slouch_ratio > SLOUCH_RATIO_THRESHOLD else (0, 255, 255) # main.py와 같은 임계값 (사용자별 값은 calibrate.py)
                 cv2.putText(frame, f"Slouch Ratio: {current_slouch_ratio:.2f}", 
                             (shoulder_px[0] + 10, shoulder_px[1] + 60), 
                             cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)